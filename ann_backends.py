@@ -0,0 +1,299 @@
+import math
+
+import numpy as np
+
+# Rows processed per matrix product when assigning vectors to centroids, to bound temporary memory
+_ASSIGN_CHUNK = 16384
+
+
+def exact_search(vectors, squared_norms, query, k):
+    """
+    Exact top-k squared L2 search over all vectors.
+
+    Args:
+        vectors (np.ndarray): float32 matrix, shape (n_rows, dim).
+        squared_norms (np.ndarray): Squared norm of each row.
+        query (np.ndarray): float32 query vector.
+        k (int): Number of neighbours, at most n_rows.
+
+    Returns:
+        tuple: Row indices and squared L2 distances, both sorted by increasing distance.
+    """
+    # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2; ||q||^2 is constant, so it is left out of the ranking
+    scores = squared_norms - 2.0 * (vectors @ query)
+    if k < len(vectors):
+        candidates = np.argpartition(scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(vectors))
+    return rerank(vectors, query, candidates, k)
+
+
+def rerank(vectors, query, candidates, k):
+    """Compute exact distances for candidate rows and return the k nearest, sorted."""
+    # Recomputed directly rather than from the expansion, to avoid cancellation error
+    diff = vectors[candidates] - query
+    distances = np.einsum("ij,ij->i", diff, diff)
+    order = np.argsort(distances, kind="stable")[:k]
+    return candidates[order], distances[order]
+
+
+class ExactBackend:
+    """Brute-force search: one matrix-vector product per query. Always exact."""
+
+    name = "exact"
+
+    def build(self, vectors, squared_norms=None):
+        """
+        Index a vector matrix.
+
+        Args:
+            vectors (np.ndarray): float32 matrix, shape (n_rows, dim). Kept by reference.
+            squared_norms (np.ndarray): Squared row norms, computed if omitted.
+        """
+        self.vectors = vectors
+        self.squared_norms = (squared_norms if squared_norms is not None
+                              else np.einsum("ij,ij->i", vectors, vectors))
+        return self
+
+    def search(self, query, k):
+        """
+        Find the k nearest rows to a query vector.
+
+        Returns:
+            tuple: Row indices and squared L2 distances, both sorted by increasing distance.
+        """
+        return exact_search(self.vectors, self.squared_norms, query, min(k, len(self.vectors)))
+
+    def memory_bytes(self):
+        """Bytes held by the index beyond the vectors themselves."""
+        return 0
+
+
+class HNSWBackend:
+    """
+    Hierarchical navigable small world graph (hnswlib). Requires the optional `hnswlib` package.
+
+    `ef_search` trades recall for speed at query time; `m` and `ef_construction` at build time.
+    """
+
+    name = "hnsw"
+
+    def __init__(self, m=16, ef_construction=200, ef_search=128):
+        """
+        Args:
+            m (int): Graph links per node.
+            ef_construction (int): Candidate list size while building.
+            ef_search (int): Candidate list size while searching; raised to k when smaller.
+        """
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+
+    def build(self, vectors, squared_norms=None):
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("The hnsw ANN backend requires hnswlib: pip install hnswlib") from None
+
+        self.index = hnswlib.Index(space="l2", dim=vectors.shape[1])
+        self.index.init_index(max_elements=max(1, len(vectors)), M=self.m, ef_construction=self.ef_construction)
+        if len(vectors):
+            self.index.add_items(vectors, np.arange(len(vectors)))
+        self.index.set_ef(self.ef_search)
+        self.size = len(vectors)
+        return self
+
+    def search(self, query, k):
+        k = min(k, self.size)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if k > self.ef_search:
+            self.index.set_ef(k)
+        # One thread per query: concurrency comes from the serving workers
+        labels, distances = self.index.knn_query(query, k=k, num_threads=1)
+        if k > self.ef_search:
+            self.index.set_ef(self.ef_search)
+        return labels[0].astype(np.int64), distances[0]
+
+    def memory_bytes(self):
+        # The serialized index holds the vectors too; count only the graph
+        return self.index.index_file_size() - self.size * self.index.dim * 4
+
+
+def kmeans(x, k, iterations=10, seed=0):
+    """
+    Lloyd's k-means in NumPy.
+
+    Args:
+        x (np.ndarray): float32 training vectors, shape (n, dim).
+        k (int): Number of centroids; at most n.
+        iterations (int): Assignment/update rounds.
+        seed (int): Seed of the initial centroid sample.
+
+    Returns:
+        np.ndarray: float32 centroids, shape (k, dim).
+    """
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign(x, centroids)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        sums[filled] = np.add.reduceat(x[order], starts[filled], axis=0)
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Restart empty clusters on random training points
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), size=len(empty), replace=False)]
+    return centroids
+
+
+def assign(x, centroids):
+    """Return the index of the nearest centroid of every row of x."""
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), _ASSIGN_CHUNK):
+        chunk = x[start:start + _ASSIGN_CHUNK]
+        labels[start:start + len(chunk)] = np.argmin(centroid_norms - 2.0 * (chunk @ centroids.T), axis=1)
+    return labels
+
+
+class IVFPQBackend:
+    """
+    Inverted file index with product-quantized residuals, in NumPy.
+
+    Vectors are bucketed by their nearest of `nlist` coarse centroids; each vector's residual
+    to its centroid is compressed to `m` one-byte codes. A query scans the `nprobe` closest
+    buckets with per-subspace distance lookup tables, then, with `refine`, recomputes exact
+    distances for the best `refine * k` candidates from the full vectors.
+    """
+
+    name = "ivfpq"
+
+    def __init__(self, nlist=0, nprobe=16, m=16, refine=4, train_size=50000, iterations=10, seed=0):
+        """
+        Args:
+            nlist (int): Number of buckets; 0 picks about 4 * sqrt(n_rows).
+            nprobe (int): Buckets scanned per query.
+            m (int): PQ subquantizers; must divide the dimension.
+            refine (int): Candidates re-ranked exactly, as a multiple of k. 0 returns PQ distances.
+            train_size (int): Vectors sampled to train the centroids and codebooks.
+            iterations (int): k-means iterations.
+            seed (int): Random seed for training.
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.m = m
+        self.refine = refine
+        self.train_size = train_size
+        self.iterations = iterations
+        self.seed = seed
+
+    def build(self, vectors, squared_norms=None):
+        n, dim = vectors.shape
+        self.vectors = vectors
+        self.size = n
+        if n == 0:
+            return self
+        if dim % self.m:
+            raise ValueError(f"PQ subquantizers ({self.m}) must divide the dimension ({dim})")
+        rng = np.random.default_rng(self.seed)
+        sample = vectors[np.sort(rng.choice(n, size=min(n, self.train_size), replace=False))]
+        sample = np.asarray(sample, dtype=np.float32)
+
+        nlist = min(self.nlist or max(1, int(4 * math.sqrt(n))), len(sample))
+        self.centroids = kmeans(sample, nlist, self.iterations, self.seed)
+        labels = assign(vectors, self.centroids)
+
+        # One codebook of up to 256 centroids per subspace, trained on residuals
+        dsub = dim // self.m
+        residuals = (sample - self.centroids[assign(sample, self.centroids)]).reshape(len(sample), self.m, dsub)
+        codewords = min(256, len(sample))
+        self.codebooks = np.stack([
+            kmeans(np.ascontiguousarray(residuals[:, j]), codewords, self.iterations, self.seed + j)
+            for j in range(self.m)
+        ])
+
+        # Rows are stored grouped by bucket: bucket b owns rows order[offsets[b]:offsets[b + 1]]
+        self.order = np.argsort(labels, kind="stable")
+        self.offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=nlist), out=self.offsets[1:])
+        self.codes = np.empty((n, self.m), dtype=np.uint8)
+        # ||q - c - r||^2 = ||q - c||^2 + (||r||^2 + 2 c.r) - 2 q.r, with r the decoded residual;
+        # the middle term does not depend on the query and is stored per row
+        self.row_terms = np.empty(n, dtype=np.float32)
+        for start in range(0, n, _ASSIGN_CHUNK):
+            rows = self.order[start:start + _ASSIGN_CHUNK]
+            centroids = self.centroids[labels[rows]]
+            residual = (vectors[rows] - centroids).reshape(len(rows), self.m, dsub)
+            codes = self.codes[start:start + len(rows)]
+            for j in range(self.m):
+                codes[:, j] = assign(np.ascontiguousarray(residual[:, j]), self.codebooks[j])
+            decoded = self.codebooks[np.arange(self.m), codes].reshape(len(rows), dim)
+            self.row_terms[start:start + len(rows)] = np.einsum("ij,ij->i", decoded, decoded + 2 * centroids)
+        # Flat lookup positions: code c of subspace j reads entry j * codewords + c of the query table
+        self.code_offsets = np.arange(self.m, dtype=np.int64) * codewords
+        return self
+
+    def search(self, query, k):
+        k = min(k, self.size)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        coarse = np.einsum("ij,ij->i", self.centroids - query, self.centroids - query)
+        probes = np.argsort(coarse)[:self.nprobe]
+        starts, ends = self.offsets[probes], self.offsets[probes + 1]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        # Storage positions of every row in the probed buckets, without a Python loop
+        positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+
+        # One table per query: inner product of each query subvector with every codeword
+        table = np.einsum("md,mcd->mc", query.reshape(self.m, -1), self.codebooks).ravel()
+        inner = table[self.codes[positions] + self.code_offsets].sum(axis=1)
+        distances = np.repeat(coarse[probes], lengths) + self.row_terms[positions] - 2 * inner
+        candidates = self.order[positions]
+
+        keep = min(len(candidates), k * self.refine if self.refine else k)
+        if keep < len(candidates):
+            best = np.argpartition(distances, keep - 1)[:keep]
+            candidates, distances = candidates[best], distances[best]
+        if self.refine:
+            return rerank(self.vectors, query, candidates, k)
+        order = np.argsort(distances, kind="stable")[:k]
+        return candidates[order], distances[order]
+
+    def memory_bytes(self):
+        if self.size == 0:
+            return 0
+        return (self.codes.nbytes + self.row_terms.nbytes + self.order.nbytes + self.offsets.nbytes
+                + self.centroids.nbytes + self.codebooks.nbytes)
+
+
+ANN_BACKENDS = {"exact": ExactBackend, "hnsw": HNSWBackend, "ivfpq": IVFPQBackend}
+
+
+def create_backend(config):
+    """
+    Build the ANN backend selected in config.yml.
+
+    Args:
+        config (dict): Loaded configuration; reads the `ann` block.
+
+    Returns:
+        ExactBackend | HNSWBackend | IVFPQBackend: The unbuilt backend.
+    """
+    ann = config['ann']
+    backend = ann['backend']
+    if backend == "hnsw":
+        return HNSWBackend(m=ann['hnsw_m'], ef_construction=ann['hnsw_ef_construction'], ef_search=ann['hnsw_ef_search'])
+    if backend == "ivfpq":
+        return IVFPQBackend(nlist=ann['ivf_nlist'], nprobe=ann['ivf_nprobe'], m=ann['pq_subquantizers'],
+                            refine=ann['ivf_refine'])
+    if backend != "exact":
+        raise ValueError(f"Unknown ANN backend {backend!r}; expected one of {sorted(ANN_BACKENDS)}")
+    return ExactBackend()
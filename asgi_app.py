@@ -0,0 +1,190 @@
+import asyncio
+import time
+
+import httpx
+from quart import Quart, Response, render_template, request, jsonify
+
+from async_utils import async_generate_profile, async_generate_profile_events
+from async_utils import async_retrieve_skills_from_chroma
+from metrics import PROFILE_CACHE_REQUESTS, REGISTRY, REQUEST_SECONDS, StageTimer
+from services import Services
+from utils import format_sse
+
+# Initialize the ASGI app. It exposes the same API contract as main.py, but every request
+# is a coroutine, so one process can keep hundreds of LLM calls in flight.
+# Run with: uvicorn asgi_app:app
+app = Quart(__name__)
+# Services are built lazily or during warm-up (see main.py)
+services = Services("config.yml")
+config = services.config
+# Cache of generated profiles; identical concurrent requests share one LLM call
+profile_cache = services.profile_cache
+http_client = None
+warm_up_thread = None
+
+
+async def wait_for_services():
+    """Wait for the warm-up thread without blocking the event loop."""
+    if warm_up_thread is not None and warm_up_thread.is_alive():
+        await asyncio.to_thread(warm_up_thread.join)
+
+
+@app.before_serving
+async def open_http_client():
+    """Create the pooled HTTP client used by the fallback keyword scrape."""
+    global http_client, warm_up_thread
+    http_client = httpx.AsyncClient(timeout=10)
+    # Build the remaining services off the event loop; requests needing them wait for it
+    warm_up_thread = services.warm_up(background=True, async_client=True)
+    if not config['settings']['warm_up_in_background']:
+        await wait_for_services()
+
+
+@app.after_serving
+async def close_http_client():
+    """Close the pooled HTTP client."""
+    await http_client.aclose()
+
+
+@app.route('/')
+async def home():
+    """Render the homepage."""
+    return await render_template('index.html')
+
+@app.route('/social-profile-upgrade')
+async def social_profile_upgrade():
+    """Render the Social Media Profile Upgrade page."""
+    return await render_template('social-profile-upgrade.html')
+
+@app.route('/resume-upgrade')
+async def resume_upgrade():
+    """Render the Resume Upgrade page."""
+    return await render_template('resume-upgrade.html')
+
+@app.route('/submit-feedback', methods=['POST'])
+async def submit_feedback():
+    """Handle feedback submissions."""
+    try:
+        data = await request.get_json()
+        stars = data.get("stars")
+        comments = data.get("comments")
+
+        # Log the received feedback
+        print(f"Received feedback: {stars} stars, Comment: {comments}")
+
+        return jsonify({"message": "Feedback submitted successfully!"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/generate-profile', methods=['POST'])
+async def generate_user_profile():
+    """API endpoint to generate a professional profile."""
+    try:
+        user_input = await request.get_json()
+        start_time = time.time()
+        await wait_for_services()
+        timings = StageTimer()
+        profile, cache_status = await profile_cache.get_or_compute_async(
+            user_input, lambda: async_generate_profile(
+                user_input, services.skills_index, services.async_client, http_client=http_client, timings=timings))
+        end_time = time.time()
+        PROFILE_CACHE_REQUESTS.inc(cache_status)
+        REQUEST_SECONDS.observe(end_time - start_time, "generate-profile")
+
+        response = {
+            "profile": profile,
+            "stats": {
+                "time_taken": round(end_time - start_time, 2),
+                "stages_ms": timings.as_dict(),
+                "cache": profile_cache.stats(cache_status)
+            }
+        }
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/generate-profile/stream', methods=['POST'])
+async def generate_user_profile_stream():
+    """API endpoint to generate a professional profile as server-sent events (same events as main.py)."""
+    user_input = await request.get_json()
+    start_time = time.time()
+
+    async def event_stream():
+        # Not single-flight: each client gets its own token stream; the finished profile still fills the cache
+        try:
+            cached_profile = profile_cache.get(user_input)
+            if cached_profile is not None:
+                PROFILE_CACHE_REQUESTS.inc("hit")
+                REQUEST_SECONDS.observe(time.time() - start_time, "generate-profile-stream")
+                stats = {"time_taken": round(time.time() - start_time, 2), "cache": profile_cache.stats("hit")}
+                yield format_sse("profile", {"profile": cached_profile, "stats": stats})
+                return
+
+            await wait_for_services()
+            timings = StageTimer()
+            async for event, data in async_generate_profile_events(
+                    user_input, services.skills_index, services.async_client, http_client=http_client, timings=timings):
+                if event == "retrieval":
+                    data["stats"] = {"time_taken": round(time.time() - start_time, 2)}
+                elif event == "profile":
+                    profile_cache.put(user_input, data)
+                    PROFILE_CACHE_REQUESTS.inc("miss")
+                    REQUEST_SECONDS.observe(time.time() - start_time, "generate-profile-stream")
+                    stats = {
+                        "time_taken": round(time.time() - start_time, 2),
+                        "stages_ms": timings.as_dict(),
+                        "cache": profile_cache.stats("miss"),
+                    }
+                    data = {"profile": data, "stats": stats}
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"error": str(e)})
+
+    response = Response(
+        event_stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.timeout = None
+    return response
+
+@app.route('/api/retrieve-skills', methods=['POST'])
+async def retrieve_skills():
+    """API endpoint to retrieve trending skills."""
+    try:
+        profession = (await request.get_json()).get("profession")
+        await wait_for_services()
+        keywords = await async_retrieve_skills_from_chroma(
+            profession, services.skills_index, threshold=1e-2)
+        return jsonify({"keywords": keywords})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Prometheus metrics of this process: per-stage latency histograms and pipeline counters."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/health/live', methods=['GET'])
+async def health_live():
+    """Liveness probe: answers as long as the process can serve requests."""
+    return jsonify({"status": "alive"}), 200
+
+@app.route('/api/health/ready', methods=['GET'])
+async def health_ready():
+    """Readiness probe: serves the cached dependency status, 503 until every dependency is healthy."""
+    ready = services.is_ready()
+    response = {"ready": ready, "health": services.health_status(), "startup": services.startup_report()}
+    return jsonify(response), 200 if ready else 503
+
+@app.route('/api/health-check', methods=['GET'])
+async def health_check():
+    """API endpoint to check the health of the system, served from the background probes."""
+    try:
+        return jsonify({"health": services.health_status()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+if __name__ == "__main__":
+    app.run(debug=True)
@@ -0,0 +1,216 @@
+import asyncio
+import time
+
+import httpx
+from bs4 import BeautifulSoup
+
+from http_cache import default_session
+from metrics import FALLBACKS, LLM_ERRORS, StageTimer
+from skills_index import SkillsIndex
+from utils import (
+    build_prompt,
+    parse_profile_response,
+    parse_user_input,
+    retrieve_skills_from_chroma,
+    retrieve_skills_from_index,
+)
+
+
+async def async_chat_gpt(prompt, client, model="gpt-3.5-turbo"):
+    """
+    Generates a response using GPT-3.5 Turbo without blocking the event loop.
+
+    Args:
+        prompt (str): The input prompt for GPT.
+        client (AsyncOpenAI): An initialized AsyncOpenAI client.
+
+    Returns:
+        str: The generated content from GPT.
+    """
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        LLM_ERRORS.inc()
+        print(f"Error in async_chat_gpt: {e}")
+        return ""
+
+
+async def async_chat_gpt_stream(prompt, client, model="gpt-3.5-turbo"):
+    """
+    Generates a response using GPT-3.5 Turbo, yielding the content as it is produced.
+
+    Args:
+        prompt (str): The input prompt for GPT.
+        client (AsyncOpenAI): An initialized AsyncOpenAI client.
+
+    Yields:
+        str: Successive pieces of the generated content.
+    """
+    try:
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        LLM_ERRORS.inc()
+        print(f"Error in async_chat_gpt_stream: {e}")
+
+
+async def async_fetch_trending_keywords(profession, headers, max_keywords=10, http_client=None):
+    """
+    Fetch trending keywords for a given profession without blocking the event loop.
+
+    Args:
+        profession (str): The profession to fetch keywords for.
+        headers (dict): Headers for the HTTP request.
+        max_keywords (int): Maximum number of keywords to fetch.
+        http_client (httpx.AsyncClient): Shared client to reuse connections. A temporary one is used if omitted.
+
+    Returns:
+        list: A list of trending keywords.
+    """
+    search_url = f"https://www.google.com/search?q=trending+skills+for+{profession.replace(' ', '+')}"
+    headers = {key: value for key, value in headers.items() if value}
+    try:
+        # Shares the on-disk response cache of the synchronous fetchers; its SQLite I/O runs off the loop
+        cache = default_session().cache
+        response = await asyncio.to_thread(cache.get, search_url)
+        if response is None:
+            if http_client is None:
+                async with httpx.AsyncClient() as temporary_client:
+                    response = await temporary_client.get(search_url, headers=headers)
+            else:
+                response = await http_client.get(search_url, headers=headers)
+            response.raise_for_status()
+            await asyncio.to_thread(cache.put, search_url, response.status_code, response.headers, response.content)
+
+        soup = BeautifulSoup(response.text, "html.parser")
+        keywords = [suggestion.text for suggestion in soup.select("div.B0jnne")]
+
+        return list(set(keywords))[:max_keywords]
+    except Exception as e:
+        print(f"Error fetching trending keywords for {profession}: {e}")
+        return []
+
+
+async def async_retrieve_skills_from_chroma(profession, vectorstore, threshold=1e-5, timings=None):
+    """
+    Retrieve trending skills for a given profession without blocking the event loop.
+
+    With the in-memory skills index the profession is embedded asynchronously and the
+    search runs inline, since it is a single vectorized computation. A Chroma vectorstore
+    is queried in a worker thread.
+
+    Args:
+        profession (str): The profession to search for.
+        vectorstore (SkillsIndex | Chroma): The in-memory skills index, or an initialized ChromaDB instance.
+        threshold (float): Minimum acceptable relevance score.
+        timings (StageTimer): Records the embed, vector search and keyword merge stages.
+
+    Returns:
+        tuple: A list of trending keywords, minimum similarity score, and maximum similarity score.
+    """
+    if timings is None:
+        timings = StageTimer()
+    if not isinstance(vectorstore, SkillsIndex):
+        return await asyncio.to_thread(retrieve_skills_from_chroma, profession, vectorstore, threshold, timings)
+    try:
+        with timings.stage("embed"):
+            query_vector = await vectorstore.embedding.aembed_query(profession)
+        return retrieve_skills_from_index(query_vector, vectorstore, threshold, timings)
+    except Exception as e:
+        print(f"Error retrieving skills from ChromaDB: {e}")
+        return [], None, None
+
+
+async def async_generate_profile(user_input, vectorstore, client, http_client=None, timings=None):
+    """
+    Generate a professional profile using user input and ChromaDB, asynchronously.
+
+    Args:
+        user_input (dict): Dictionary with keys `profession`, `experience_level`, `keywords`, and optionally `background`.
+        vectorstore (SkillsIndex | Chroma): The in-memory skills index or an initialized ChromaDB instance.
+        client (AsyncOpenAI): Initialized AsyncOpenAI client.
+        http_client (httpx.AsyncClient): Shared client for the fallback keyword scrape.
+        timings (StageTimer): Collects the time spent in each pipeline stage.
+
+    Returns:
+        dict: Generated elevator pitch and project descriptions.
+    """
+    if timings is None:
+        timings = StageTimer()
+    fields = parse_user_input(user_input)
+    profession = fields["profession"]
+
+    trending_keywords, min_score, max_score = await async_retrieve_skills_from_chroma(
+        profession, vectorstore, threshold=fields["threshold_relevance"], timings=timings)
+    if not trending_keywords:
+        print(f"Fetching trending keywords for {profession}...")
+        FALLBACKS.inc()
+        headers = {"User-Agent": user_input.get("headers")}
+        with timings.stage("fallback_scrape"):
+            trending_keywords = await async_fetch_trending_keywords(profession, headers, http_client=http_client)
+        print(f"Trending keywords: {trending_keywords}")
+
+    with timings.stage("prompt_build"):
+        prompt = build_prompt(fields, trending_keywords)
+    with timings.stage("llm_call"):
+        generated_text = await async_chat_gpt(prompt, client)
+    with timings.stage("json_parse"):
+        return parse_profile_response(generated_text, min_score, max_score)
+
+
+async def async_generate_profile_events(user_input, vectorstore, client, http_client=None, timings=None):
+    """
+    Asynchronous counterpart of `utils.generate_profile_events`.
+
+    Args:
+        user_input (dict): Dictionary with keys `profession`, `experience_level`, `keywords`, and optionally `background`.
+        vectorstore (SkillsIndex | Chroma): The in-memory skills index or an initialized ChromaDB instance.
+        client (AsyncOpenAI): Initialized AsyncOpenAI client.
+        http_client (httpx.AsyncClient): Shared client for the fallback keyword scrape.
+        timings (StageTimer): Collects the time spent in each pipeline stage.
+
+    Yields:
+        tuple: (event name, JSON-serializable payload).
+    """
+    if timings is None:
+        timings = StageTimer()
+    fields = parse_user_input(user_input)
+    profession = fields["profession"]
+
+    trending_keywords, min_score, max_score = await async_retrieve_skills_from_chroma(
+        profession, vectorstore, threshold=fields["threshold_relevance"], timings=timings)
+    source = "vector_store"
+    if not trending_keywords:
+        FALLBACKS.inc()
+        headers = {"User-Agent": user_input.get("headers")}
+        with timings.stage("fallback_scrape"):
+            trending_keywords = await async_fetch_trending_keywords(profession, headers, http_client=http_client)
+        source = "web_search"
+    yield "retrieval", {
+        "keywords": trending_keywords,
+        "source": source,
+        "similarity_scores": {"min_score": min_score, "max_score": max_score},
+    }
+
+    with timings.stage("prompt_build"):
+        prompt = build_prompt(fields, trending_keywords)
+    tokens = []
+    llm_start = time.perf_counter()
+    async for token in async_chat_gpt_stream(prompt, client):
+        tokens.append(token)
+        yield "token", {"text": token}
+    timings.record("llm_call", time.perf_counter() - llm_start)
+
+    with timings.stage("json_parse"):
+        profile = parse_profile_response("".join(tokens).strip(), min_score, max_score)
+    yield "profile", profile
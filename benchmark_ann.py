@@ -0,0 +1,107 @@
+import argparse
+import time
+
+import numpy as np
+
+from ann_backends import ExactBackend, HNSWBackend, IVFPQBackend
+
+
+def make_corpus(rows, dim, n_queries, clusters=None, spread=0.35, seed=0):
+    """
+    Generate a clustered synthetic corpus and queries drawn from the same distribution.
+
+    Uniform random vectors have no neighbourhood structure for an ANN index to exploit, while
+    title embeddings group by field; a Gaussian mixture around unit-norm centres models that.
+
+    Args:
+        rows (int): Corpus size.
+        dim (int): Embedding dimensionality.
+        n_queries (int): Number of query vectors.
+        clusters (int): Mixture components; about sqrt(rows) if omitted.
+        spread (float): Standard deviation of each component, relative to unit-norm centres.
+        seed (int): Random seed.
+
+    Returns:
+        tuple: float32 corpus of shape (rows, dim) and queries of shape (n_queries, dim).
+    """
+    rng = np.random.default_rng(seed)
+    clusters = clusters or max(1, int(np.sqrt(rows)))
+    centres = rng.standard_normal((clusters, dim), dtype=np.float32)
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+
+    def sample(n):
+        points = centres[rng.integers(0, clusters, n)]
+        points += rng.standard_normal((n, dim), dtype=np.float32) * (spread / np.sqrt(dim))
+        return points
+
+    return sample(rows), sample(n_queries)
+
+
+def make_backends(names, args):
+    """Instantiate the requested backends with the command line parameters."""
+    backends = {
+        "exact": lambda: ExactBackend(),
+        "hnsw": lambda: HNSWBackend(m=args.hnsw_m, ef_construction=args.hnsw_ef_construction,
+                                    ef_search=args.hnsw_ef_search),
+        "ivfpq": lambda: IVFPQBackend(nprobe=args.ivf_nprobe, m=args.pq_subquantizers, refine=args.ivf_refine),
+    }
+    return [backends[name]() for name in names]
+
+
+def benchmark(backend, vectors, queries, truth, k):
+    """
+    Build one backend and measure it against exact results.
+
+    Args:
+        backend: An unbuilt backend from ann_backends.py.
+        vectors (np.ndarray): The corpus.
+        queries (np.ndarray): Query vectors.
+        truth (list): Exact top-k row indices of each query.
+        k (int): Number of neighbours per query.
+
+    Returns:
+        dict: Build seconds, index memory in bytes, queries per second and mean recall@k.
+    """
+    start = time.perf_counter()
+    backend.build(vectors, np.einsum("ij,ij->i", vectors, vectors))
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [backend.search(query, k)[0] for query in queries]
+    query_seconds = time.perf_counter() - start
+
+    recall = np.mean([len(np.intersect1d(found, exact)) / len(exact) for found, exact in zip(results, truth)])
+    return {
+        "build_s": build_seconds,
+        # Every backend also needs the float32 vectors, for search or for exact re-ranking
+        "memory_bytes": vectors.nbytes + backend.memory_bytes(),
+        "qps": len(queries) / query_seconds,
+        "recall": recall,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ANN backends by build time, memory, QPS and recall.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=128,
+                        help="Embedding size; mxbai-embed-large is 1024, which needs 4 GiB per million rows.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--backends", nargs="+", default=["exact", "hnsw", "ivfpq"], choices=["exact", "hnsw", "ivfpq"])
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--hnsw-ef-construction", type=int, default=200)
+    parser.add_argument("--hnsw-ef-search", type=int, default=128)
+    parser.add_argument("--ivf-nprobe", type=int, default=16)
+    parser.add_argument("--pq-subquantizers", type=int, default=16)
+    parser.add_argument("--ivf-refine", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'backend':>8} {'build':>9} {'memory':>11} {'QPS':>9} {f'recall@{args.k}':>10}")
+    for rows in args.rows:
+        vectors, queries = make_corpus(rows, args.dim, args.queries)
+        exact = ExactBackend().build(vectors)
+        truth = [exact.search(query, args.k)[0] for query in queries]
+        for backend in make_backends(args.backends, args):
+            result = benchmark(backend, vectors, queries, truth, args.k)
+            print(f"{rows:>9} {backend.name:>8} {result['build_s']:>8.2f}s "
+                  f"{result['memory_bytes'] / 2**20:>7.1f} MiB {result['qps']:>9.0f} {result['recall']:>10.3f}", flush=True)
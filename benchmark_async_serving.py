@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import aiohttp
+import numpy as np
+
+
+
+def serve_flask(app, port, threaded):
+    """Serve the Flask app with werkzeug in a background thread."""
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", port, app, threaded=threaded)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_asgi(app, port):
+    """Serve the ASGI app with uvicorn in a background thread."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def warm_embedding_cache(services, profession):
+    """
+    Seed the embedding cache so the benchmark does not depend on a running Ollama server.
+
+    The seeded vector is a stored row's, not the profession's, so the app's embedding cache is
+    switched to memory only first: the vector must never reach the shared on-disk cache.
+    """
+    from embedding_cache import normalize_query
+
+    # Read when the skills index is built, which has not happened yet
+    services.config['paths']['embedding_cache'] = None
+    skills_index = services.skills_index
+    skills_index.embedding.cache.put(normalize_query(profession), skills_index.vectors[0].tolist())
+
+
+async def run_load(url, payload, n_requests, concurrency):
+    """
+    Send `n_requests` POSTs with at most `concurrency` in flight.
+
+    Returns:
+        tuple: Wall time in seconds, the latencies of successful requests in seconds, and the number of failures.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    # aiohttp rather than httpx: httpx's connection pool itself becomes the bottleneck at hundreds of connections
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=600)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def one_request():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    async with session.post(url, json=payload) as response:
+                        response.raise_for_status()
+                        await response.read()
+                    latencies.append(time.perf_counter() - start)
+                except aiohttp.ClientError:
+                    # e.g. connections refused once a single-threaded server's listen backlog is full
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(n_requests)))
+        return time.perf_counter() - start, np.array(latencies), errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Flask and ASGI apps against a local mock LLM server.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock LLM seconds per completion.")
+    args = parser.parse_args()
+
+    # The mock LLM runs in its own process so it does not compete with the app under test for the GIL
+    mock_port = 8100
+    mock_server = subprocess.Popen(
+        [sys.executable, "mock_llm_server.py", "--port", str(mock_port), "--latency", str(args.latency)])
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{mock_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+    import asgi_app
+    import main
+
+    payload = {
+        "profession": "Software Engineer",
+        "experience_level": "mid-level",
+        "keywords": ["Python"],
+        "background": "",
+        "similarity_score_input": 50,
+    }
+    warm_embedding_cache(main.services, payload["profession"])
+    warm_embedding_cache(asgi_app.services, payload["profession"])
+
+    servers = {
+        "flask (1 thread, like a sync worker)": lambda port: serve_flask(main.app, port, threaded=False),
+        "flask (thread per request)": lambda port: serve_flask(main.app, port, threaded=True),
+        "asgi (single event loop)": lambda port: serve_asgi(asgi_app.app, port),
+    }
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, mock LLM latency {args.latency}s\n")
+    print(f"{'server':<38} {'wall':>8} {'ok req/s':>9} {'p50':>8} {'p99':>8} {'errors':>7}")
+    for port, (name, serve) in enumerate(servers.items(), start=8101):
+        server = serve(port)
+        wall, latencies, errors = asyncio.run(
+            run_load(f"http://127.0.0.1:{port}/api/generate-profile", payload, args.requests, args.concurrency))
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (float("nan"), float("nan"))
+        print(f"{name:<38} {wall:>7.2f}s {len(latencies) / wall:>9.1f} {p50:>7.2f}s {p99:>7.2f}s {errors:>7}")
+        if hasattr(server, "should_exit"):
+            server.should_exit = True
+        else:
+            server.shutdown()
+    mock_server.terminate()
@@ -0,0 +1,66 @@
+import argparse
+import os
+import shutil
+import tempfile
+
+import chromadb
+import numpy as np
+
+from build_job_skills_database import build_canonicalizer
+from config_loader import load_config
+from keyword_vocab import metadata_keywords
+from token_counter import count_tokens, is_exact
+
+
+def load_rows(persist_directory, collection_name):
+    """
+    Read the embeddings and keyword lists of a Chroma collection from a temporary copy.
+
+    Returns:
+        tuple: Embedding matrix and the keyword list of each row.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        # Chroma may write to the database it opens; leave the real store untouched
+        copy = os.path.join(directory, "store")
+        shutil.copytree(persist_directory, copy)
+        collection = chromadb.PersistentClient(path=copy).get_collection(collection_name)
+        data = collection.get(include=["embeddings", "metadatas"])
+    return np.asarray(data["embeddings"], dtype=np.float32), [metadata_keywords(m) for m in data["metadatas"]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure prompt keyword tokens before and after skill canonicalization.")
+    parser.add_argument("--k", type=int, default=50, help="Rows retrieved per query, as in retrieval.")
+    parser.add_argument("--similarity-score", type=float, nargs="+", default=[0, 50, 90, 99, 100],
+                        help="Values of the app's similarity_score_input slider.")
+    args = parser.parse_args()
+
+    config = load_config()
+    canonicalizer = build_canonicalizer(config['paths']['job_skills_dataset'], config['paths']['skill_aliases'])
+    vectors, keywords = load_rows(config['paths']['persist_directory'], config['settings']['collection_name'])
+
+    # Every stored row serves as a query: its own embedding is the embedded profession
+    squared_norms = np.einsum("ij,ij->i", vectors, vectors)
+    distances = squared_norms[:, None] - 2 * vectors @ vectors.T + squared_norms[None, :]
+    neighbours = np.argsort(distances, axis=1)[:, :args.k]
+
+    print(f"{len(vectors)} queries, k={args.k}, tokens counted with "
+          f"{'tiktoken' if is_exact() else 'an approximate tokenizer (tiktoken unavailable)'}\n")
+    print(f"{'slider':>6} {'threshold':>9} {'keywords before':>16} {'after':>7} "
+          f"{'tokens before':>14} {'after':>7} {'reduction':>10}")
+    for slider in args.similarity_score:
+        threshold = 1 - slider / 100
+        counts, tokens = [], []
+        for query, rows in enumerate(neighbours):
+            relevant = [row for row in rows if 1 / (1 + max(distances[query, row], 0.0)) >= threshold]
+            merged = [keyword for row in relevant for keyword in keywords[row]]
+            before = list(set(merged))
+            after = canonicalizer.canonicalize_all(merged)
+            counts.append((len(before), len(after)))
+            tokens.append((count_tokens(", ".join(before)), count_tokens(", ".join(after))))
+        counts, tokens = np.array(counts), np.array(tokens)
+        before_tokens, after_tokens = tokens.mean(axis=0)
+        reduction = 1 - after_tokens / before_tokens if before_tokens else 0.0
+        print(f"{slider:>6g} {threshold:>9.2f} {counts[:, 0].mean():>16.1f} {counts[:, 1].mean():>7.1f} "
+              f"{before_tokens:>14.1f} {after_tokens:>7.1f} {reduction:>10.1%}")
@@ -0,0 +1,94 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Imports the Flask app, warms its services up eagerly (like the app did before the service
+# container) or in the background, then starts serving.
+SERVER_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import main
+print(f"IMPORT {time.perf_counter() - start:.4f}", flush=True)
+main.services.warm_up(background=sys.argv[2] == "background")
+main.app.run(port=int(sys.argv[1]))
+"""
+
+
+def poll(url, timeout, accept_status=(200,)):
+    """
+    Request a URL until it answers with an accepted status.
+
+    Returns:
+        tuple: Seconds waited and the decoded JSON body, or (None, None) on timeout.
+    """
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status in accept_status:
+                    return time.perf_counter() - start, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code in accept_status:
+                return time.perf_counter() - start, json.loads(e.read())
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    return None, None
+
+
+def measure(mode, port, timeout):
+    """
+    Start the app in a fresh process and time its startup.
+
+    Args:
+        mode (str): "eager" or "background" warm-up.
+        port (int): Port to serve on.
+        timeout (float): Seconds to wait for each milestone.
+
+    Returns:
+        dict: Import time of main.py, time to the first accepted request, time until warm-up
+            finished and the startup report.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", SERVER_SCRIPT, str(port), mode],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        first_request = None
+        if poll(f"http://127.0.0.1:{port}/api/health/live", timeout)[0] is not None:
+            first_request = time.perf_counter() - start
+
+        # /api/health/ready includes the startup report; warm-up is done once it has a total
+        warm = None
+        report = {}
+        while time.perf_counter() - start < timeout:
+            _, body = poll(f"http://127.0.0.1:{port}/api/health/ready", timeout, accept_status=(200, 503))
+            report = (body or {}).get("startup", {})
+            if "warm_up_total" in report:
+                warm = time.perf_counter() - start
+                break
+            time.sleep(0.05)
+    finally:
+        process.terminate()
+        output = process.communicate()[0]
+    import_time = next((float(line.split()[1]) for line in output.splitlines() if line.startswith("IMPORT ")), None)
+    return {"import": import_time, "first_request": first_request, "warm": warm, "report": report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold start of the Flask app.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    print(f"{'warm-up':<12} {'import':>8} {'first request':>14} {'warm':>8}  startup report")
+    for mode in ("eager", "background"):
+        for _ in range(args.runs):
+            result = measure(mode, args.port, args.timeout)
+            first_request = f"{result['first_request']:.2f}s" if result["first_request"] is not None else "timeout"
+            warm = f"{result['warm']:.2f}s" if result["warm"] is not None else "timeout"
+            print(f"{mode:<12} {result['import']:>7.2f}s {first_request:>14} {warm:>8}  {result['report']}")
@@ -0,0 +1,103 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from dataset_store import convert_csv_to_parquet, dataset_stats
+
+# Each load runs in a fresh interpreter so its peak memory is measured on its own
+LOADERS = {
+    "csv: read_csv + parse skills": """
+import pandas as pd
+from keyword_vocab import parse_keywords
+df = pd.read_csv(path)
+skills = df['Trending Skills'].map(parse_keywords).tolist()
+rows = len(skills)
+""",
+    "parquet: read_table (mmap) + to_pylist": """
+from dataset_store import read_dataset
+skills = read_dataset(path).column('Trending Skills').to_pylist()
+rows = len(skills)
+""",
+    "parquet: read_table (mmap), Arrow only": """
+from dataset_store import read_dataset
+rows = read_dataset(path).num_rows
+""",
+    "csv: dataset_stats": """
+from dataset_store import dataset_stats
+rows = dataset_stats(path)['jobs']
+""",
+    "parquet: dataset_stats": """
+from dataset_store import dataset_stats
+rows = dataset_stats(path)['jobs']
+""",
+}
+
+# Modules are imported before the clock starts; peak memory is the process's VmHWM, which,
+# unlike ru_maxrss, is not inherited from the forking benchmark process
+LOAD_SCRIPT = """
+import sys, time
+import pandas, pyarrow.parquet, dataset_store, keyword_vocab
+path = sys.argv[1]
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+with open("/proc/self/status") as status:
+    peak_kib = next(int(line.split()[1]) for line in status if line.startswith("VmHWM"))
+print(rows, elapsed, peak_kib)
+"""
+
+
+def make_csv(path, rows, seed=0):
+    """Write a synthetic CSV dataset with list repr skills, like the scraper's output."""
+    rng = random.Random(seed)
+    skills = [f"Skill {i}" for i in range(5000)]
+    pd.DataFrame({
+        "Job Title": [f"Job Title {i}" for i in range(rows)],
+        "Trending Skills": [str(rng.sample(skills, rng.randint(5, 30))) for _ in range(rows)],
+    }).to_csv(path, index=False)
+
+
+def run_loader(body, path):
+    """
+    Run one loader in a subprocess.
+
+    Returns:
+        tuple: Rows loaded, seconds and peak RSS in MiB.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD_SCRIPT.format(body=body), path],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout.split()
+    return int(output[0]), float(output[1]), int(output[2]) / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare loading the job skills dataset from CSV and Parquet.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'loader':<40} {'seconds':>9} {'rows/s':>12} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            csv_path = os.path.join(directory, f"dataset_{rows}.csv")
+            parquet_path = os.path.join(directory, f"dataset_{rows}.parquet")
+            make_csv(csv_path, rows)
+            start = time.perf_counter()
+            convert_csv_to_parquet(csv_path, parquet_path)
+            convert_seconds = time.perf_counter() - start
+            assert dataset_stats(csv_path) == dataset_stats(parquet_path)
+
+            for name, body in LOADERS.items():
+                path = parquet_path if name.startswith("parquet") else csv_path
+                loaded, seconds, peak = run_loader(body, path)
+                assert loaded == rows
+                print(f"{rows:>9} {name:<40} {seconds:>9.3f} {rows / seconds:>12,.0f} {peak:>9.0f}")
+            print(f"{rows:>9} {'file size (MiB): csv / parquet':<40} "
+                  f"{os.path.getsize(csv_path) / 2 ** 20:>9.1f} {os.path.getsize(parquet_path) / 2 ** 20:>12.1f}")
+            print(f"{rows:>9} {'csv -> parquet conversion (s)':<40} {convert_seconds:>9.2f}\n")
@@ -0,0 +1,106 @@
+import argparse
+import tempfile
+import time
+
+import chromadb
+from langchain_core.documents import Document
+
+from ingestion import BatchSizeTuner, CollectionSync, HashEmbeddings, document_id, ingest_records
+
+
+def make_records(rows, revision=0, changed=0.0):
+    """
+    Yield synthetic (id, text, metadata) records shaped like the job skills collection.
+
+    Args:
+        rows (int): Number of records.
+        revision (int): Skills revision given to the changed records.
+        changed (float): Fraction of the records, spread evenly, that get `revision`.
+    """
+    step = round(1 / changed) if changed else 0
+    for i in range(rows):
+        title = f"Job Title {i}"
+        version = revision if step and i % step == 0 else 0
+        skills = [f"Skill {i % 97}", f"Skill {(i + version) % 89}"]
+        yield document_id(title), title, {"trending_keywords": str(skills)}
+
+
+def run_sequential(collection, embedding, rows, batch_size):
+    """Embed and add one batch at a time, as the builder did before the pipeline."""
+    start = time.perf_counter()
+    batch = []
+    for record in make_records(rows):
+        batch.append(record)
+        if len(batch) == batch_size:
+            _add(collection, embedding, batch)
+            batch = []
+    if batch:
+        _add(collection, embedding, batch)
+    elapsed = time.perf_counter() - start
+    return {"documents": rows, "seconds": round(elapsed, 2), "docs_per_second": round(rows / elapsed, 1),
+            "batch_size": batch_size}
+
+
+def _add(collection, embedding, batch):
+    documents = [Document(page_content=text, metadata=metadata) for _, text, metadata in batch]
+    collection.add(
+        ids=[record_id for record_id, _, _ in batch],
+        documents=[doc.page_content for doc in documents],
+        metadatas=[doc.metadata for doc in documents],
+        embeddings=embedding.embed_documents([doc.page_content for doc in documents]),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure vectorstore ingestion throughput with an offline embedder.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--baseline-rows", type=int, default=5_000, help="Rows for the sequential baseline.")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--latency", type=float, default=0.02, help="Embedder seconds per request.")
+    parser.add_argument("--latency-per-text", type=float, default=0.0002, help="Embedder seconds per text.")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--max-batch-size", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--changed", type=float, default=0.01, help="Fraction of rows changed before the rebuild.")
+    args = parser.parse_args()
+
+    embedding = HashEmbeddings(args.dim, latency=args.latency, latency_per_text=args.latency_per_text)
+    with tempfile.TemporaryDirectory() as directory:
+        client = chromadb.PersistentClient(path=directory)
+        write_batch_size = client.get_max_batch_size()
+        results = {}
+
+        collection = client.create_collection("sequential")
+        results["sequential"] = run_sequential(collection, embedding, args.baseline_rows, args.batch_size)
+
+        collection = client.create_collection("pipelined")
+        results[f"pipelined, {args.concurrency} in flight"] = ingest_records(
+            collection, make_records(args.rows), embedding, batch_size=args.batch_size,
+            concurrency=args.concurrency, write_batch_size=write_batch_size)
+
+        collection = client.create_collection("tuned")
+        tuner = BatchSizeTuner(args.batch_size, args.max_batch_size)
+        results[f"pipelined + tuned, {args.concurrency} in flight"] = ingest_records(
+            collection, CollectionSync(collection).changed_records(make_records(args.rows)), embedding, batch_size=args.batch_size,
+            concurrency=args.concurrency, tuner=tuner, write_batch_size=write_batch_size)
+        assert collection.count() == args.rows
+
+        # Rebuild after changing a fraction of the rows and dropping the last one
+        start = time.perf_counter()
+        sync = CollectionSync(collection)
+        result = ingest_records(
+            collection, sync.changed_records(make_records(args.rows - 1, revision=1, changed=args.changed)),
+            embedding, batch_size=tuner.size, concurrency=args.concurrency, write_batch_size=write_batch_size)
+        sync.delete_stale()
+        result["seconds"] = round(time.perf_counter() - start, 2)
+        results[f"incremental rebuild, {args.changed:.0%} changed"] = result
+        assert collection.count() == args.rows - 1
+        print(f"Incremental rebuild: {sync.counts}")
+
+    print(f"\nEmbedder: dim {args.dim}, {args.latency * 1000:g} ms per request + "
+          f"{args.latency_per_text * 1000:g} ms per text\n")
+    print(f"{'setup':<34} {'documents':>10} {'seconds':>9} {'docs/s':>9} {'batch':>6}")
+    for name, result in results.items():
+        print(f"{name:<34} {result['documents']:>10} {result['seconds']:>9.2f} "
+              f"{result['docs_per_second']:>9.1f} {result['batch_size']:>6}")
+    print(f"\nTuner steps (batch size, docs/s): {tuner.history}")
@@ -0,0 +1,111 @@
+import argparse
+import copy
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmark_canonicalization import load_rows
+from build_job_skills_database import build_canonicalizer
+from config_loader import load_config
+from keyword_ranking import prompt_settings
+from skills_index import SkillsIndex
+from token_counter import count_tokens, is_exact
+from utils import build_keywords_str, build_prompt, chat_gpt, create_prompt, get_client, parse_user_input
+
+
+def start_mock_process(port, latency, prompt_token_latency):
+    """
+    Run mock_llm_server.py in its own process with a per-prompt-token delay.
+
+    Returns:
+        subprocess.Popen: The server process; it is listening when this returns.
+    """
+    process = subprocess.Popen([
+        sys.executable, "mock_llm_server.py", "--port", str(port), "--distribution", "constant",
+        "--latency", str(latency), "--prompt-token-latency", str(prompt_token_latency),
+    ], stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # The "listening" line
+    return process
+
+
+def prompts_for(skills_index, query_vector, fields, top_n, token_budget, k):
+    """
+    Build the prompt of one request the old way (every retrieved keyword) and the new way.
+
+    Returns:
+        tuple: The prompt without and with relevance ranking and the token budget.
+    """
+    indices, distances = skills_index.search(query_vector, k=k)
+    relevance = 1 / (1 + distances)
+    relevant = relevance >= fields["threshold_relevance"]
+    merged = skills_index.merge_keywords(indices[relevant])
+    before = create_prompt(fields["profession"], fields["experience_level"],
+                           build_keywords_str(fields["user_keywords"], merged), fields["background"])
+    ranked = skills_index.rank_keywords(indices[relevant], relevance[relevant], top_n)
+    after = build_prompt(fields, ranked, token_budget)
+    return before, after
+
+
+def mean_latency(client, prompts):
+    """Mean seconds per completion of the given prompts."""
+    latencies = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        chat_gpt(prompt, client)
+        latencies.append(time.perf_counter() - start)
+    return float(np.mean(latencies))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure prompt tokens and LLM latency with and without relevance-ranked, token-budgeted keywords.")
+    parser.add_argument("--k", type=int, default=50, help="Rows retrieved per query, as in retrieval.")
+    parser.add_argument("--similarity-score", type=float, nargs="+", default=[0, 50, 90, 99, 100],
+                        help="Values of the app's similarity_score_input slider.")
+    parser.add_argument("--queries", type=int, default=200, help="Stored rows used as queries.")
+    parser.add_argument("--llm-calls", type=int, default=10, help="Completions timed per slider value and variant.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fixed mock LLM seconds per completion.")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.002,
+                        help="Mock LLM seconds per prompt token.")
+    parser.add_argument("--real-llm", action="store_true",
+                        help="Time completions with the configured LLM backend instead of the mock server.")
+    args = parser.parse_args()
+
+    config = copy.deepcopy(load_config())
+    top_n, token_budget = prompt_settings()
+    canonicalizer = build_canonicalizer(config['paths']['job_skills_dataset'], config['paths']['skill_aliases'])
+    vectors, keywords = load_rows(config['paths']['persist_directory'], config['settings']['collection_name'])
+    skills_index = SkillsIndex.from_keywords([""] * len(vectors), vectors, keywords)
+    skills_index.set_canonicalizer(canonicalizer)
+    queries = vectors[np.linspace(0, len(vectors) - 1, min(args.queries, len(vectors))).astype(int)]
+
+    mock = None
+    if not args.real_llm:
+        port = 8201
+        mock = start_mock_process(port, args.latency, args.prompt_token_latency)
+        config['llm'].update({"backend": "mock", "mock_url": f"http://127.0.0.1:{port}/v1", "mock_autostart": False})
+    client = get_client(config)
+
+    print(f"{len(queries)} queries, k={args.k}, top {top_n} keywords, budget {token_budget} prompt tokens, counted with "
+          f"{'tiktoken' if is_exact() else 'an approximate tokenizer (tiktoken unavailable)'}")
+    if mock is not None:
+        print(f"Mock LLM: {args.latency}s per completion + {args.prompt_token_latency * 1000:g}ms per prompt token")
+    print(f"\n{'slider':>6} {'tokens before':>14} {'after':>7} {'max after':>10} "
+          f"{'latency before':>15} {'after':>7} {'reduction':>10}")
+    try:
+        for slider in args.similarity_score:
+            fields = parse_user_input({"profession": "Software Engineer", "experience_level": "mid-level",
+                                       "keywords": ["Python", "SQL"], "similarity_score_input": slider})
+            prompts = [prompts_for(skills_index, q, fields, top_n, token_budget, args.k) for q in queries]
+            tokens = np.array([(count_tokens(before), count_tokens(after)) for before, after in prompts])
+            timed = prompts[:args.llm_calls]
+            latency_before = mean_latency(client, [before for before, _ in timed])
+            latency_after = mean_latency(client, [after for _, after in timed])
+            reduction = 1 - latency_after / latency_before if latency_before else 0.0
+            print(f"{slider:>6g} {tokens[:, 0].mean():>14.1f} {tokens[:, 1].mean():>7.1f} {tokens[:, 1].max():>10} "
+                  f"{latency_before:>14.2f}s {latency_after:>6.2f}s {reduction:>10.1%}")
+    finally:
+        if mock is not None:
+            mock.terminate()
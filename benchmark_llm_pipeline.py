@@ -0,0 +1,127 @@
+import argparse
+import copy
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config_loader import load_config
+from utils import generate_profile, generate_profile_events, get_client, get_skills_index
+
+PROFESSIONS = ["Data Scientist", "Software Engineer", "Product Manager", "UX Designer", "DevOps Engineer"]
+
+
+def start_mock_process(port, args):
+    """
+    Run mock_llm_server.py in its own process, so it does not compete with the pipeline for the GIL.
+
+    Returns:
+        subprocess.Popen: The server process; it is listening when this returns.
+    """
+    process = subprocess.Popen([
+        sys.executable, "mock_llm_server.py", "--port", str(port),
+        "--latency", str(args.latency), "--distribution", args.distribution,
+        "--latency-sigma", str(args.latency_sigma), "--token-delay", str(args.token_delay),
+        "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate),
+        "--retry-after", str(args.retry_after), "--seed", str(args.seed),
+    ], stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # The "listening" line
+    return process
+
+
+def run_one(user_input, skills_index, client, llm_options, stream):
+    """
+    Generate one profile end to end.
+
+    Returns:
+        tuple: Latency in seconds, time to the first token in seconds (None unless streaming), and success.
+    """
+    start = time.perf_counter()
+    if not stream:
+        profile = generate_profile(user_input, skills_index, client, llm_options=llm_options)
+        return time.perf_counter() - start, None, "error" not in profile
+    first_token, profile = None, {}
+    for event, data in generate_profile_events(user_input, skills_index, client):
+        if event == "token" and first_token is None:
+            first_token = time.perf_counter() - start
+        elif event == "profile":
+            profile = data
+    return time.perf_counter() - start, first_token, bool(profile) and "error" not in profile
+
+
+def benchmark(skills_index, client, llm_options, n_requests, concurrency, stream=False):
+    """
+    Run `n_requests` profile generations with `concurrency` in flight.
+
+    Returns:
+        dict: Throughput, latency percentiles and the number of failed profiles.
+    """
+    user_inputs = [{
+        "profession": PROFESSIONS[i % len(PROFESSIONS)],
+        "experience_level": "mid-level",
+        "keywords": ["Python", "SQL"],
+        "background": "",
+        # Every retrieved row passes the threshold, so no request falls back to a web search
+        "similarity_score_input": 100,
+    } for i in range(n_requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda u: run_one(u, skills_index, client, llm_options, stream), user_inputs))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _, _ in results])
+    first_tokens = np.array([first for _, first, _ in results if first is not None])
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "throughput": n_requests / wall,
+        "p50": p50, "p95": p95, "p99": p99, "max": latencies.max(),
+        "ttft_p50": np.percentile(first_tokens, 50) if len(first_tokens) else float("nan"),
+        "failures": sum(not ok for _, _, ok in results),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure end-to-end profile generation throughput and tail latency against the mock LLM server.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency", type=float, default=1.0, help="Mean mock LLM seconds per completion.")
+    parser.add_argument("--distribution", default="lognormal",
+                        choices=["constant", "uniform", "exponential", "lognormal"])
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--max-retries", type=int, default=3, help="chat_gpt retries after transient errors.")
+    parser.add_argument("--stream", action="store_true", help="Stream completions and report time to first token.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    port = 8200
+    mock = start_mock_process(port, args)
+    config = copy.deepcopy(load_config())
+    config['llm'].update({"backend": "mock", "mock_url": f"http://127.0.0.1:{port}/v1", "mock_autostart": False})
+    # Hash embeddings need no Ollama server; they match the stored vectors only in dimension
+    if os.environ.get("BENCHMARK_OLLAMA") != "1":
+        config['settings']['embedding_model'] = "hash"
+
+    skills_index = get_skills_index(config=config)
+    client = get_client(config).with_options(max_retries=0)
+    llm_options = {"max_retries": args.max_retries, "backoff_base": 0.1, "backoff_max": 2.0}
+
+    print(f"{args.requests} requests, mock latency {args.distribution} mean {args.latency}s, "
+          f"errors {args.error_rate:.0%}, 429s {args.rate_limit_rate:.0%}{', streaming' if args.stream else ''}\n")
+    print(f"{'concurrency':>11} {'profiles/s':>10} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} "
+          f"{'ttft p50':>9} {'failed':>7}")
+    try:
+        for concurrency in args.concurrency:
+            r = benchmark(skills_index, client, llm_options, args.requests, concurrency, args.stream)
+            ttft = f"{r['ttft_p50']:>8.2f}s" if args.stream else f"{'-':>9}"
+            print(f"{concurrency:>11} {r['throughput']:>10.2f} {r['p50']:>6.2f}s {r['p95']:>6.2f}s "
+                  f"{r['p99']:>6.2f}s {r['max']:>6.2f}s {ttft} {r['failures']:>7}")
+    finally:
+        mock.terminate()
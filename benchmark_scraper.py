@@ -0,0 +1,58 @@
+import argparse
+import time
+
+from build_job_skills_datasets import build_job_skills_dataset
+from rate_limit import HostRateLimiter
+from stub_serp_server import start_stub_server
+
+
+def run(server, titles, concurrency, rate, burst, max_retries):
+    """
+    Build a dataset against the stub server and measure throughput.
+
+    Returns:
+        dict: Titles per second, rows collected, requests sent and 429 responses received.
+    """
+    with server.lock:
+        server.requests = server.throttled = 0
+    rate_limiter = HostRateLimiter(rate, burst) if rate else None
+    search_url = f"http://127.0.0.1:{server.server_port}/search?q={{query}}"
+
+    start = time.perf_counter()
+    df = build_job_skills_dataset(
+        titles, {"User-Agent": "benchmark"}, 10, concurrency=concurrency,
+        max_retries=max_retries, delay=0.5, max_delay=10, rate_limiter=rate_limiter, search_url=search_url)
+    elapsed = time.perf_counter() - start
+    return {
+        "titles_per_second": len(titles) / elapsed,
+        "rows": len(df),
+        "requests": server.requests,
+        "throttled": server.throttled,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure scraper throughput against a local stub search server.")
+    parser.add_argument("--titles", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub seconds per accepted request.")
+    parser.add_argument("--max-rps", type=float, default=20, help="Stub requests per second before 429.")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Stub probability of a random 429.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency, max_rps=args.max_rps, error_rate=args.error_rate)
+    titles = [f"Job Title {i}" for i in range(args.titles)]
+    setups = {
+        "sequential, no limiter": dict(concurrency=1, rate=None, burst=None),
+        f"{args.concurrency} threads, no limiter": dict(concurrency=args.concurrency, rate=None, burst=None),
+        f"{args.concurrency} threads, {args.max_rps:g} req/s bucket": dict(
+            concurrency=args.concurrency, rate=args.max_rps, burst=args.max_rps / 4),
+    }
+
+    results = {name: run(server, titles, max_retries=5, **setup) for name, setup in setups.items()}
+    print(f"\n{args.titles} titles, stub latency {args.latency}s, stub limit {args.max_rps:g} req/s, "
+          f"random 429 rate {args.error_rate:g}\n")
+    print(f"{'setup':<36} {'titles/s':>9} {'rows':>6} {'requests':>9} {'429s':>6}")
+    for name, result in results.items():
+        print(f"{name:<36} {result['titles_per_second']:>9.2f} {result['rows']:>6} "
+              f"{result['requests']:>9} {result['throttled']:>6}")
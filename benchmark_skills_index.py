@@ -0,0 +1,110 @@
+import argparse
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+from skills_index import SkillsIndex
+
+
+def make_corpus(rows, dim, seed=0):
+    """Generate a synthetic corpus of unit-norm float32 vectors."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((rows, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def build_chroma_collection(vectors, persist_directory):
+    """Load the corpus into an L2 Chroma collection, the way build_job_skills_database.py does."""
+    client = chromadb.PersistentClient(path=persist_directory)
+    collection = client.create_collection("benchmark", metadata={"hnsw:space": "l2"})
+    batch_size = client.get_max_batch_size()
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size]
+        collection.add(
+            ids=[str(i) for i in range(start, start + len(batch))],
+            embeddings=batch,
+            metadatas=[{"trending_keywords": "['Python', 'SQL']"}] * len(batch),
+            documents=[f"Job {i}" for i in range(start, start + len(batch))],
+        )
+    return collection
+
+
+def time_queries(search, queries):
+    """Run every query once and return per-query latencies in milliseconds."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def benchmark(rows, dim, n_queries, k, seed=0):
+    """
+    Compare top-k latency of the in-memory SkillsIndex against a Chroma collection.
+
+    Args:
+        rows (int): Number of rows in the synthetic corpus.
+        dim (int): Embedding dimensionality.
+        n_queries (int): Number of queries to time.
+        k (int): Number of neighbours per query.
+        seed (int): Random seed.
+
+    Returns:
+        dict: Latency percentiles for both paths and the largest distance mismatch on shared hits.
+    """
+    vectors = make_corpus(rows, dim, seed)
+    queries = make_corpus(n_queries, dim, seed + 1)
+
+    start = time.perf_counter()
+    index = SkillsIndex.from_keywords([f"Job {i}" for i in range(rows)], vectors, [["Python", "SQL"]] * rows)
+    index_build = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as persist_directory:
+        start = time.perf_counter()
+        collection = build_chroma_collection(vectors, persist_directory)
+        chroma_build = time.perf_counter() - start
+
+        index_latencies = time_queries(lambda q: index.search(q, k=k), queries)
+        chroma_latencies = time_queries(lambda q: collection.query(query_embeddings=[q], n_results=k), queries)
+
+        # Distances must agree for rows returned by both paths
+        max_diff = 0.0
+        for query in queries[:10]:
+            indices, distances = index.search(query, k=k)
+            result = collection.query(query_embeddings=[query], n_results=k)
+            chroma_distances = dict(zip(map(int, result["ids"][0]), result["distances"][0]))
+            for i, d in zip(indices, distances):
+                if int(i) in chroma_distances:
+                    max_diff = max(max_diff, abs(float(d) - chroma_distances[int(i)]))
+
+    return {
+        "rows": rows,
+        "index_build_s": index_build,
+        "chroma_build_s": chroma_build,
+        "index_p50_ms": np.percentile(index_latencies, 50),
+        "index_p99_ms": np.percentile(index_latencies, 99),
+        "chroma_p50_ms": np.percentile(chroma_latencies, 50),
+        "chroma_p99_ms": np.percentile(chroma_latencies, 99),
+        "max_distance_diff": max_diff,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy skills index against Chroma.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=1024, help="Embedding size (mxbai-embed-large is 1024).")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'index build':>12} {'chroma build':>13} {'index p50':>10} {'index p99':>10} "
+          f"{'chroma p50':>11} {'chroma p99':>11} {'max |dd|':>9}")
+    for rows in args.rows:
+        result = benchmark(rows, args.dim, args.queries, args.k)
+        print(f"{result['rows']:>9} {result['index_build_s']:>11.2f}s {result['chroma_build_s']:>12.2f}s "
+              f"{result['index_p50_ms']:>8.2f}ms {result['index_p99_ms']:>8.2f}ms "
+              f"{result['chroma_p50_ms']:>9.2f}ms {result['chroma_p99_ms']:>9.2f}ms {result['max_distance_diff']:>9.2e}")
@@ -0,0 +1,91 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+from benchmark_skills_index import make_corpus
+from config_loader import load_config
+from skills_index import SkillsIndex
+
+MODES = {
+    "private": "each worker loads its own copy (previous behaviour)",
+    "preload": "loaded into memory once in the master, then forked",
+    "mmap": "memory-mapped read-only files, shared through the page cache",
+}
+
+
+def read_memory(pid):
+    """Return the RSS and PSS of a process in MiB, from /proc/<pid>/smaps_rollup."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as file:
+        for line in file:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values["Rss"], values["Pss"]
+
+
+def worker(index_dir, mode, shared_index, queries, ready, done):
+    """Serve queries from the index the way a web worker would, then wait to be measured."""
+    skills_index = shared_index if shared_index is not None else SkillsIndex.load(index_dir, mmap=mode == "mmap")
+    for query in queries:
+        indices, _ = skills_index.search(query, k=50)
+        skills_index.merge_keywords(indices)
+    ready.release()
+    done.wait()
+
+
+def measure(index_dir, mode, workers, queries):
+    """
+    Fork the workers for one sharing mode and measure their memory.
+
+    Returns:
+        tuple: Mean RSS and mean PSS per worker in MiB.
+    """
+    context = multiprocessing.get_context("fork")
+    shared_index = None
+    if mode != "private":
+        shared_index = SkillsIndex.load(index_dir, mmap=mode == "mmap")
+        shared_index.search(queries[0], k=50)  # Fault the pages in before forking
+    ready = context.Semaphore(0)
+    done = context.Event()
+    processes = [
+        context.Process(target=worker, args=(index_dir, mode, shared_index, queries, ready, done))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.acquire()
+    memory = np.array([read_memory(process.pid) for process in processes])
+    done.set()
+    for process in processes:
+        process.join()
+    return memory[:, 0].mean(), memory[:, 1].mean()
+
+
+if __name__ == "__main__":
+    config = load_config("config.yml")
+    parser = argparse.ArgumentParser(description="Measure per-worker memory of the skills index sharing modes.")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=config['settings']['workers'])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    vectors = make_corpus(args.rows, args.dim)
+    rng = np.random.default_rng(0)
+    keywords = [[f"skill {i}" for i in rng.integers(0, 5000, 10)] for _ in range(args.rows)]
+    queries = make_corpus(args.queries, args.dim, seed=1)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        SkillsIndex.from_keywords([f"Job {i}" for i in range(args.rows)], vectors, keywords).save(index_dir)
+        del vectors, keywords
+        index_mib = sum(os.path.getsize(os.path.join(index_dir, name)) for name in os.listdir(index_dir)) / 2 ** 20
+        print(f"{args.rows} rows x {args.dim} dims ({index_mib:.0f} MiB on disk), {args.workers} workers\n")
+        print(f"{'mode':<9} {'RSS/worker':>11} {'PSS/worker':>11} {'total PSS':>10}  description")
+        for mode, description in MODES.items():
+            rss, pss = measure(index_dir, mode, args.workers, queries)
+            print(f"{mode:<9} {rss:>8.0f} MiB {pss:>8.0f} MiB {pss * args.workers:>6.0f} MiB  {description}")
@@ -1,10 +1,18 @@
 import os
-import pandas as pd
+import time
 from langchain_chroma import Chroma
-from langchain.schema import Document
 from langchain_community.embeddings.ollama import OllamaEmbeddings
 from tqdm import tqdm
 from config_loader import load_config
+from dataset_store import iter_dataset_columns
+from ingestion import BatchSizeTuner, CollectionSync, HashEmbeddings, document_id, ingest_records
+from keyword_vocab import (
+    KEYWORDS_METADATA_KEY,
+    KEYWORD_IDS_METADATA_KEY,
+    KeywordVocabulary,
+    encode_ids,
+)
+from skill_canonicalizer import SkillCanonicalizer, load_aliases
 
 
 def custom_relevance_score_fn(similarity_score: float) -> float:
@@ -13,25 +21,72 @@ def custom_relevance_score_fn(similarity_score: float) -> float:
     return relevance_score
 
 
-def load_csv_data(file_path, limit=None):
-    """Load data from a CSV file."""
-    try:
-        df = pd.read_csv(file_path)
-        if limit:
-            df = df.iloc[:limit, :]
-        return df
-    except Exception as e:
-        print(f"Error loading CSV data: {e}")
-        return pd.DataFrame()
+def build_canonicalizer(file_path, aliases_path, limit=None):
+    """
+    Build the skill canonicalization table from the skills of the dataset.
+
+    Args:
+        file_path (str): Path of the dataset, Parquet or CSV.
+        aliases_path (str): Alias file (see input/skill_aliases.yml).
+        limit (int): Maximum number of rows to read.
+
+    Returns:
+        SkillCanonicalizer: The canonicalizer.
+    """
+    aliases, filler_words = load_aliases(aliases_path)
+    skills = (skill for _, chunk in iter_dataset_columns(file_path, limit=limit) for row in chunk for skill in row)
+    return SkillCanonicalizer.build(skills, aliases, filler_words)
+
+
+def prepare_records(titles, keywords, vocabulary, canonicalizer=None):
+    """
+    Turn a chunk of dataset rows into (id, text, metadata) records.
+
+    Each row's skills are canonicalized and interned into `vocabulary`; the metadata stores
+    both the keyword list and its keyword ID array.
 
+    Args:
+        titles (list): Job titles of the chunk.
+        keywords (list): Skill lists of the chunk, aligned with `titles`.
+        vocabulary (KeywordVocabulary): Vocabulary extended with the chunk's keywords.
+        canonicalizer (SkillCanonicalizer): Collapses spelling variants within each row.
 
-def prepare_documents(df):
-    """Prepare LangChain Document objects from a DataFrame."""
-    documents = []
-    for _, row in tqdm(df.iterrows(), total=len(df), desc="Converting data to documents"):
-        doc = Document(page_content=row['Job Title'], metadata={"Trending Skills": row['Trending Skills']})
-        documents.append(doc)
-    return documents
+    Returns:
+        list: The chunk's records, in row order.
+    """
+    if canonicalizer is not None:
+        keywords = [canonicalizer.canonicalize_all(row) for row in keywords]
+    ids = [document_id(title) for title in titles]
+    metadatas = [
+        {KEYWORDS_METADATA_KEY: str(row), KEYWORD_IDS_METADATA_KEY: encode_ids(vocabulary.encode(row))}
+        for row in keywords
+    ]
+    return list(zip(ids, titles, metadatas))
+
+
+def iter_dataset_records(file_path, vocabulary, vocabulary_path=None, chunk_size=10000, limit=None,
+                         canonicalizer=None):
+    """
+    Stream the dataset as records, one chunk at a time.
+
+    Args:
+        file_path (str): Path of the dataset, Parquet or CSV.
+        vocabulary (KeywordVocabulary): Vocabulary extended with the dataset's keywords.
+        vocabulary_path (str): Where the vocabulary is saved after each chunk, before any of
+            the chunk's records are yielded, so stored keyword IDs never refer to unsaved keywords.
+        chunk_size (int): Rows per chunk.
+        limit (int): Maximum number of rows to read.
+        canonicalizer (SkillCanonicalizer): Applied to each row's skills.
+
+    Yields:
+        tuple: (id, text, metadata) records.
+    """
+    # Read errors propagate: a dataset cut short would make the sync delete the unread titles
+    for titles, keywords in iter_dataset_columns(file_path, chunk_size=chunk_size, limit=limit):
+        records = prepare_records(titles, keywords, vocabulary, canonicalizer)
+        if vocabulary_path:
+            vocabulary.save(vocabulary_path)
+        yield from records
 
 
 def initialize_vectorstore(config, embedding_function, relevance_score_fn):
@@ -46,34 +101,100 @@ def initialize_vectorstore(config, embedding_function, relevance_score_fn):
     )
 
 
-def add_documents_to_vectorstore(vectorstore, documents, batch_size=10):
-    """Add documents to the vectorstore in batches."""
-    for i in tqdm(range(0, len(documents), batch_size), desc="Adding documents to ChromaDB"):
-        batch = documents[i:i + batch_size]
-        vectorstore.add_documents(batch)
+def add_records_to_vectorstore(vectorstore, records, batch_size=10, concurrency=1, max_batch_size=None, prune=True):
+    """
+    Synchronize the vectorstore with a stream of records, embedding only new and changed ones.
+
+    Each record's ID is derived from its normalized job title and its metadata carries a
+    hash of its content, so a rebuild skips the documents already stored unchanged, upserts
+    the rest and, with `prune`, deletes stored documents whose titles are not among the records.
+
+    Records are consumed lazily. Embedding requests for up to `concurrency` batches run at
+    the same time while finished batches are written to the collection. With
+    `max_batch_size`, the batch size grows from `batch_size` while the observed embedding
+    throughput improves.
+
+    Args:
+        vectorstore (Chroma): Target vectorstore; its embedding function embeds the documents.
+        records (iterable): (id, text, metadata) records, one per job title.
+        batch_size (int): Documents per embedding request (the starting size when auto-tuning).
+        concurrency (int): Embedding requests in flight.
+        max_batch_size (int): Largest batch size the tuner may pick. None keeps `batch_size`.
+        prune (bool): Delete stored documents missing from the records. Only correct when the
+            records cover the whole dataset.
+
+    Returns:
+        dict: Rows read, rows per second, documents written, elapsed seconds, documents per
+            second, final batch size and the new/changed/unchanged/duplicate/deleted counts.
+    """
+    sync = CollectionSync(vectorstore._collection)
+    tuner = BatchSizeTuner(batch_size, max_batch_size) if max_batch_size else None
+    progress = tqdm(desc="Adding documents to ChromaDB", unit=" rows")
+
+    def counted(records):
+        for record in records:
+            yield record
+            progress.update()
+
+    start = time.perf_counter()
+    try:
+        stats = ingest_records(
+            vectorstore._collection, sync.changed_records(counted(records)), vectorstore.embeddings,
+            batch_size=batch_size, concurrency=concurrency, tuner=tuner,
+            write_batch_size=vectorstore._client.get_max_batch_size(),
+        )
+    finally:
+        progress.close()
+    elapsed = time.perf_counter() - start
+    if prune:
+        sync.delete_stale()
+    stats.update(sync.counts)
+    stats["rows"] = progress.n
+    stats["rows_per_second"] = round(progress.n / elapsed, 1) if elapsed > 0 else 0.0
     print("\nDatabase successfully saved to disk.")
+    print(f"Read {stats['rows']} rows in {elapsed:.2f} seconds ({stats['rows_per_second']:.1f} rows/second).")
+    print(f"{stats['new']} new, {stats['changed']} changed, {stats['unchanged']} unchanged, "
+          f"{stats['deleted']} deleted documents ({stats['duplicate']} duplicate titles skipped).")
+    print(f"Ingested {stats['documents']} documents ({stats['docs_per_second']:.1f} docs/second, "
+          f"batch size {stats['batch_size']}).")
+    return stats
 
 
 if __name__ == "__main__":
     # Load configuration
     config = load_config()
     
-    # Load data
-    file_path = config['paths']['job_skills_dataset']
-    df_limit = config['settings']['row_limit']
-    df = load_csv_data(file_path, limit=df_limit)
-    
-    # Prepare data
-    df['text'] = df['Job Title'] + ": " + df['Trending Skills']
-    
-    # Initialize embeddings
-    embedding = OllamaEmbeddings(model=config['settings']['embedding_model'])
+    # Initialize embeddings; the hash embedder builds an offline test store without the model server
+    if config['settings']['embedding_model'] == "hash":
+        embedding = HashEmbeddings()
+    else:
+        embedding = OllamaEmbeddings(model=config['settings']['embedding_model'])
     
     # Initialize ChromaDB
     vectorstore = initialize_vectorstore(config, embedding, custom_relevance_score_fn)
     
-    # Convert to LangChain Document objects
-    documents = prepare_documents(df)
+    # Build the skill canonicalization table; serving loads it to merge keywords the same way
+    dataset_path = config['paths']['job_skills_dataset']
+    canonicalizer = build_canonicalizer(dataset_path, config['paths']['skill_aliases'], limit=config['settings']['row_limit'])
+    canonicalizer.save(config['paths']['skill_canonical_table'])
+    print(f"Skill canonicalization table ({len(canonicalizer)} skills) saved to {config['paths']['skill_canonical_table']}")
     
-    # Add documents to vectorstore
-    add_documents_to_vectorstore(vectorstore, documents, batch_size=config['settings']['batch_size'])
+    # Stream the dataset in chunks, extending the keyword vocabulary of the existing collection
+    vocabulary_path = config['paths']['keyword_vocab']
+    vocabulary = KeywordVocabulary.load(vocabulary_path)
+    records = iter_dataset_records(
+        dataset_path, vocabulary, vocabulary_path,
+        chunk_size=config['settings']['ingest_chunk_size'], limit=config['settings']['row_limit'],
+        canonicalizer=canonicalizer,
+    )
+    
+    # Embed and write the new and changed rows as the chunks are read
+    add_records_to_vectorstore(
+        vectorstore, records,
+        batch_size=config['settings']['batch_size'],
+        concurrency=config['settings']['embedding_concurrency'],
+        max_batch_size=config['settings']['max_batch_size'] if config['settings']['auto_tune_batch_size'] else None,
+        # Titles past the row limit were not read, so they are only pruned when the whole dataset is
+        prune=not config['settings']['row_limit'],
+    )
+    print(f"Keyword vocabulary ({len(vocabulary)} keywords) saved to {vocabulary_path}")
@@ -2,9 +2,17 @@ import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import yaml
+import json
 import os 
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from config_loader import load_config
+from dataset_store import dataset_stats, is_parquet, write_dataset
+from http_cache import CachedSession, get_cached_session
+from rate_limit import HostRateLimiter, backoff_delay, parse_retry_after
+
+DEFAULT_SEARCH_URL = "https://www.google.com/search?q=trending+skills+for+{query}"
 
 def load_job_titles(csv_file):
     """Load job titles from a CSV file."""
@@ -15,33 +23,52 @@ def load_job_titles(csv_file):
         print(f"Error loading job titles: {e}")
         return []
 
-def fetch_trending_keywords(profession, headers, max_keywords, max_retries=3, delay=2):
+def fetch_trending_keywords(profession, headers, max_keywords, max_retries=3, delay=2, max_delay=60,
+                            rate_limiter=None, search_url=DEFAULT_SEARCH_URL, session=None):
     """
-    Fetch trending keywords for a given profession with retry and delay.
+    Fetch trending keywords for a given profession with retries and exponential backoff.
     
     Args:
         profession (str): The profession to fetch keywords for.
         headers (dict): Headers for the HTTP request.
         max_keywords (int): Maximum number of keywords to return.
-        max_retries (int): Number of retries in case of 429 errors.
-        delay (int): Time in seconds to wait between retries.
+        max_retries (int): Number of attempts in case of 429/5xx responses or connection errors.
+        delay (float): Base of the exponential backoff between retries, in seconds.
+        max_delay (float): Maximum backoff between retries, in seconds.
+        rate_limiter (HostRateLimiter): Shared per-host rate limiter. A 429 pauses the whole host.
+        search_url (str): Search URL template with a `{query}` placeholder.
+        session (CachedSession): Pooled session with the response cache. Cached pages skip the rate limiter.
     
     Returns:
         list: A list of trending keywords.
     """
+    # Build the search URL
+    url = search_url.format(query=profession.replace(' ', '+'))
+    if session is None:
+        session = CachedSession()
     for attempt in range(max_retries):
         try:
-            # Build the search URL
-            search_url = f"https://www.google.com/search?q=trending+skills+for+{profession.replace(' ', '+')}"
-            
-            # Perform the HTTP GET request
-            response = requests.get(search_url, headers=headers)
+            # A cached page costs neither network time nor rate-limit budget
+            response = session.cached(url)
+            if response is None:
+                if rate_limiter is not None:
+                    rate_limiter.acquire(url)
+
+                # Perform the HTTP GET request
+                response = session.fetch(url, headers=headers, timeout=30)
             
-            # Check for 429 status code
-            if response.status_code == 429:
-                print(f"429 Too Many Requests for {profession}. Retrying in {delay} seconds...")
-                time.sleep(delay)
-                continue  # Retry the request
+            # Back off on 429 and server errors, honoring Retry-After when the server sends it
+            if response.status_code == 429 or response.status_code >= 500:
+                wait = parse_retry_after(response.headers.get("Retry-After"))
+                if wait is None:
+                    wait = backoff_delay(attempt, delay, max_delay)
+                print(f"{response.status_code} for {profession}. Retrying in {wait:.1f} seconds...")
+                if rate_limiter is not None:
+                    # Every worker stops calling this host; the next acquire waits out the pause
+                    rate_limiter.pause(url, wait)
+                else:
+                    time.sleep(wait)
+                continue
             
             # Raise an HTTPError for other status codes
             response.raise_for_status()
@@ -60,40 +87,152 @@ def fetch_trending_keywords(profession, headers, max_keywords, max_retries=3, de
         except requests.exceptions.RequestException as e:
             print(f"Error fetching trending keywords for {profession} (Attempt {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
-                time.sleep(delay)  # Wait before retrying
-            else:
-                print(f"Failed to fetch keywords for {profession} after {max_retries} attempts.")
-                return []
+                time.sleep(backoff_delay(attempt, delay, max_delay))  # Wait before retrying
+
+    print(f"Failed to fetch keywords for {profession} after {max_retries} attempts.")
+    return []
+
+def load_checkpoint(checkpoint_path):
+    """
+    Read the results recorded in a checkpoint file.
+
+    Args:
+        checkpoint_path (str): Path of the JSONL checkpoint.
+
+    Returns:
+        dict: Skills fetched for each title; the last record of a title wins. A line cut
+            short by a crash is ignored.
+    """
+    results = {}
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return results
+    with open(checkpoint_path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+                results[record["Job Title"]] = record["Trending Skills"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    return results
+
+def build_job_skills_dataset(job_titles, headers, max_keywords, concurrency=1, checkpoint_path=None, **fetch_options):
+    """
+    Build a dataset of job titles and corresponding trending skills.
+
+    Titles are fetched concurrently by a thread pool; rows keep the order of `job_titles`.
+    With a checkpoint, every result is appended to it as soon as it is fetched, and titles
+    that already have skills in it are not fetched again, so an interrupted build resumes
+    where it stopped.
+
+    Args:
+        job_titles (list): Job titles to fetch.
+        headers (dict): Headers for the HTTP requests.
+        max_keywords (int): Maximum number of keywords per title.
+        concurrency (int): Number of titles fetched at the same time.
+        checkpoint_path (str): Append-only JSONL file recording each fetched title.
+        **fetch_options: Passed to `fetch_trending_keywords` (rate limiter, retries, search URL).
+
+    Returns:
+        pd.DataFrame: One row per title that returned skills.
+    """
+    results = load_checkpoint(checkpoint_path)
+    # Titles that came back empty are retried
+    pending = [title for title in dict.fromkeys(job_titles) if not results.get(title)]
+    if checkpoint_path and len(pending) < len(job_titles):
+        print(f"Resuming from {checkpoint_path}: {len(job_titles) - len(pending)} titles already fetched.")
+
+    checkpoint = None
+    if checkpoint_path:
+        os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+        # Terminate a line cut short by a crash so the next record starts on its own line
+        torn = False
+        if os.path.exists(checkpoint_path) and os.path.getsize(checkpoint_path) > 0:
+            with open(checkpoint_path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                torn = file.read(1) != b"\n"
+        checkpoint = open(checkpoint_path, "a", encoding="utf-8")
+        if torn:
+            checkpoint.write("\n")
+    checkpoint_lock = threading.Lock()
+
+    def fetch(title):
+        print(f"Fetching trending skills for {title}...")
+        skills = fetch_trending_keywords(title, headers, max_keywords, **fetch_options)
+        if checkpoint is not None:
+            with checkpoint_lock:
+                checkpoint.write(json.dumps({"Job Title": title, "Trending Skills": skills}) + "\n")
+                checkpoint.flush()
+        return skills
+
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        for title, skills in zip(pending, executor.map(fetch, pending)):
+            results[title] = skills
+    except BaseException:
+        # Do not start the queued titles on Ctrl-C or a crash; finished ones are checkpointed
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        executor.shutdown(wait=True)
+        if checkpoint is not None:
+            checkpoint.close()
 
-def build_job_skills_dataset(job_titles, headers, max_keywords):
-    """Build a dataset of job titles and corresponding trending skills."""
     dataset = []
-    
     for title in job_titles:
-        print(f"Fetching trending skills for {title}...")
-        skills = fetch_trending_keywords(title, headers, max_keywords)
-        
+        skills = results.get(title)
         if skills:
             dataset.append({
                 "Job Title": title,
                 "Trending Skills": skills
             })
     
-    return pd.DataFrame(dataset)
+    return pd.DataFrame(dataset, columns=["Job Title", "Trending Skills"])
+
+def finish_checkpoint(checkpoint_path, job_titles, job_skills_df):
+    """
+    Remove the checkpoint of a build once its dataset file has been saved.
+
+    The checkpoint only recovers an interrupted build: keeping it would make every later build
+    reuse its skills instead of fetching them again. Titles that returned no skills are
+    reported instead; the next build fetches them again along with the others.
+
+    Args:
+        checkpoint_path (str): Path of the JSONL checkpoint.
+        job_titles (list): Job titles of the build.
+        job_skills_df (pd.DataFrame): The saved dataset.
+
+    Returns:
+        list: The titles that returned no skills.
+    """
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    collected = set(job_skills_df["Job Title"])
+    empty = [title for title in dict.fromkeys(job_titles) if title not in collected]
+    if empty:
+        print(f"{len(empty)} titles returned no skills: {', '.join(empty[:20])}{' ...' if len(empty) > 20 else ''}")
+    return empty
 
 def save_dataset(df, output_file):
-    """Save the dataset to a CSV file, creating the directory if it does not exist."""
+    """
+    Save the dataset, creating the directory if it does not exist. Returns whether it was saved.
+
+    A `.parquet` path is written as Parquet with a native list column of skills; any other
+    path as CSV, with the skills as list repr strings.
+    """
     try:
         # Ensure the directory exists
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
         
-        # Save the DataFrame to a CSV file
-        df.to_csv(output_file, index=False)
+        # Save the DataFrame
+        if is_parquet(output_file):
+            write_dataset(df, output_file)
+        else:
+            df.to_csv(output_file, index=False)
         print(f"Dataset saved to {output_file}")
+        return True
     except Exception as e:
         print(f"Error saving dataset: {e}")
-
-import time
+        return False
 
 if __name__ == "__main__":
     # Load configuration
@@ -102,6 +241,16 @@ if __name__ == "__main__":
     max_keywords = config['settings']['max_keywords']
     job_titles_csv = config['paths']['job_titles_csv']
     output_file = config['paths']['job_skills_dataset']
+    checkpoint_path = config['paths']['dataset_checkpoint']
+    scraper = config['scraper']
+    fetch_options = {
+        "max_retries": scraper['max_retries'],
+        "delay": scraper['backoff_base'],
+        "max_delay": scraper['backoff_max'],
+        "rate_limiter": HostRateLimiter(scraper['requests_per_second'], scraper['burst']),
+        "search_url": scraper['search_url'],
+        "session": get_cached_session(config, pool_size=scraper['concurrency']),
+    }
     
     # Load job titles
     job_titles = load_job_titles(job_titles_csv)
@@ -111,25 +260,29 @@ if __name__ == "__main__":
     start_time = time.time()
     
     # Build dataset
-    job_skills_df = build_job_skills_dataset(job_titles, headers, max_keywords)
+    job_skills_df = build_job_skills_dataset(
+        job_titles, headers, max_keywords, concurrency=scraper['concurrency'],
+        checkpoint_path=checkpoint_path, **fetch_options)
     
     # End timing the data collection process
     end_time = time.time()
     time_taken = end_time - start_time
     
-    # Save dataset
-    save_dataset(job_skills_df, output_file)
+    # Save dataset, then drop the checkpoint: it is only needed to resume an interrupted build
+    if not save_dataset(job_skills_df, output_file):
+        raise SystemExit(1)
+    empty_titles = finish_checkpoint(checkpoint_path, job_titles, job_skills_df)
     
-    # Collect stats
-    num_jobs_collected = len(job_skills_df)
-    total_keywords = sum(len(row.split(", ")) for row in job_skills_df["Trending Skills"] if isinstance(row, str))
-    avg_keywords_per_job = total_keywords / num_jobs_collected if num_jobs_collected > 0 else 0
+    # Collect stats from the saved dataset
+    stats = dataset_stats(output_file)
     
     # Print stats
     print("\n=== Data Collection Statistics ===")
     print(f"Time taken: {time_taken:.2f} seconds")
-    print(f"Number of jobs collected: {num_jobs_collected}")
-    print(f"Total number of keywords collected: {total_keywords}")
-    print(f"Average number of keywords per job: {avg_keywords_per_job:.2f}")
+    print(f"Throughput: {len(job_titles) / time_taken:.2f} titles/second")
+    print(f"Number of jobs collected: {stats['jobs']}")
+    print(f"Titles without skills: {len(empty_titles)}")
+    print(f"Total number of keywords collected: {stats['total_keywords']}")
+    print(f"Average number of keywords per job: {stats['avg_keywords_per_job']:.2f}")
     print(f"Dataset saved to: {output_file}")
 
@@ -1,79 +1,335 @@
-import os
+import argparse
+import csv
 import json
-import pandas as pd
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
 from config_loader import load_config
+from records import EVALUATION_PREFIX, INPUT_PREFIX, PROFILE_PREFIX, list_records, record_file_name
+from run_store import EVAL_PROMPT_VERSION, RunStore
+
+try:
+    import orjson  # Parses the many small record files several times faster than json
+except ImportError:  # Declared in requirments.in; the standard library parser still works without it
+    orjson = None
+
+# Columns of the combined table; scores are numeric in Parquet so they can be aggregated directly
+COMBINED_SCHEMA = pa.schema([
+    pa.field("Input File", pa.string()),
+    pa.field("Profession", pa.string()),
+    pa.field("Experience Level", pa.string()),
+    pa.field("Keywords", pa.string()),
+    pa.field("Background", pa.string()),
+    pa.field("Similarity Score Input", pa.float64()),
+    pa.field("Elevator Pitch", pa.string()),
+    pa.field("About Me", pa.string()),
+    pa.field("Retrieved Keywords", pa.string()),
+    pa.field("Evaluation Keywords Quality", pa.float64()),
+    pa.field("Evaluation Relevance", pa.float64()),
+    pa.field("Evaluation Hallucination", pa.float64()),
+    pa.field("Evaluation Overall Quality", pa.float64()),
+    pa.field("Evaluation Explanation", pa.string()),
+])
+
+# File name prefix of each kind of record file joined into one row
+RECORD_KINDS = {"input": INPUT_PREFIX, "profile": PROFILE_PREFIX, "evaluation": EVALUATION_PREFIX}
+
+
+def read_json(path):
+    """Load a JSON file, with orjson when it is installed."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _join(keywords):
+    # Profiles store "No keywords retrieved." instead of a list when the model returned none
+    return ", ".join(keywords) if isinstance(keywords, list) else str(keywords or "")
+
+
+def combined_row(record_id, input_data, output_data, evaluation_data):
+    """
+    Build the combined row of one record.
+
+    Returns:
+        dict: Column -> value, in the order of `COMBINED_SCHEMA`.
+    """
+    evaluation = evaluation_data["evaluation"]
+    return {
+        "Input File": record_file_name(INPUT_PREFIX, record_id),
+        "Profession": input_data.get("profession", ""),
+        "Experience Level": input_data.get("experience_level", ""),
+        "Keywords": _join(input_data.get("keywords", [])),
+        "Background": input_data.get("background", ""),
+        "Similarity Score Input": input_data.get("similarity_score_input", ""),
+        "Elevator Pitch": output_data.get("elevator_pitch", ""),
+        "About Me": output_data.get("About Me", ""),
+        "Retrieved Keywords": _join(output_data.get("retrieved_keywords", [])),
+        "Evaluation Keywords Quality": evaluation.get("keywords_quality", ""),
+        "Evaluation Relevance": evaluation.get("relevance", ""),
+        "Evaluation Hallucination": evaluation.get("hallucination", ""),
+        "Evaluation Overall Quality": evaluation.get("overall_quality", ""),
+        "Evaluation Explanation": evaluation_data.get("explanation", ""),
+    }
+
+
+def combine_record(record_id, input_path, profile_path, evaluation_path):
+    """Read the three files of a record and build its combined row."""
+    return combined_row(record_id, read_json(input_path), read_json(profile_path), read_json(evaluation_path))
+
+
+def _combine_job(job):
+    # Runs in a worker process; errors are returned so one bad file does not stop the batch
+    record_id, paths = job
+    try:
+        return record_id, combine_record(record_id, *paths), None
+    except Exception as e:
+        return record_id, None, str(e)
+
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_table(rows):
+    columns = {}
+    for field in COMBINED_SCHEMA:
+        values = [row[field.name] for row in rows]
+        if pa.types.is_floating(field.type):
+            values = [_to_number(value) for value in values]
+        else:
+            values = [value if isinstance(value, str) else str(value) for value in values]
+        columns[field.name] = values
+    return pa.Table.from_pydict(columns, schema=COMBINED_SCHEMA)
+
+
+def match_records(input_dir, output_dir, evaluation_dir):
+    """
+    Pair the record files of the three directories by record ID.
+
+    Returns:
+        tuple: Record ID -> (input, profile, evaluation) paths for complete records, and
+            record ID -> names of the missing kinds for orphaned ones.
+    """
+    directories = {"input": input_dir, "profile": output_dir, "evaluation": evaluation_dir}
+    found = {kind: list_records(directories[kind], prefix) for kind, prefix in RECORD_KINDS.items()}
+    complete, orphans = {}, {}
+    for rid in sorted(set().union(*found.values())):
+        missing = [kind for kind in RECORD_KINDS if rid not in found[kind]]
+        if missing:
+            orphans[rid] = missing
+        else:
+            complete[rid] = tuple(found[kind][rid] for kind in RECORD_KINDS)
+    return complete, orphans
+
 
-def combine_json_to_csv(input_dir, output_dir, evaluation_dir, output_csv):
+def write_combined(batches, output_csv, output_parquet=None):
     """
-    Combines input, output, and evaluation JSON files into a single CSV file.
+    Append batches of combined rows to a CSV file and a Parquet file as they arrive.
+
+    The files are written under a temporary name and renamed once complete, so an interrupted
+    run never leaves a truncated table behind; the temporary files of a failed run are removed.
+
+    Args:
+        batches (iterable): Lists of rows from `combined_row`.
+        output_csv (str): Path to the resulting CSV file; None writes no CSV.
+        output_parquet (str): Path to the resulting Parquet file; None writes no Parquet.
+
+    Returns:
+        int: Number of rows written.
+    """
+    written = 0
+    completed = False
+    csv_file = parquet_writer = None
+    outputs = [path for path in (output_csv, output_parquet) if path]
+    for path in outputs:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        if output_csv:
+            csv_file = open(output_csv + ".tmp", "w", newline="", encoding="utf-8")
+            csv_writer = csv.DictWriter(csv_file, fieldnames=COMBINED_SCHEMA.names, lineterminator="\n")
+            csv_writer.writeheader()
+        if output_parquet:
+            parquet_writer = pq.ParquetWriter(output_parquet + ".tmp", COMBINED_SCHEMA, compression="zstd")
+        for rows in batches:
+            if not rows:
+                continue
+            if csv_file is not None:
+                csv_writer.writerows(rows)
+            if parquet_writer is not None:
+                parquet_writer.write_table(_to_table(rows))
+            written += len(rows)
+        completed = True
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+        if parquet_writer is not None:
+            parquet_writer.close()
+        if not completed:
+            for path in outputs:
+                if os.path.exists(path + ".tmp"):
+                    os.remove(path + ".tmp")
+
+    for path in outputs:
+        os.replace(path + ".tmp", path)
+        print(f"{'Parquet' if path == output_parquet else 'CSV'} file created: {path}")
+    return written
+
+
+def _report_orphans(orphans, suffix=""):
+    for rid, missing in list(orphans.items())[:20]:
+        print(f"Orphaned record {rid}: missing {', '.join(missing)}{suffix}")
+    if len(orphans) > 20:
+        print(f"... and {len(orphans) - 20} more orphaned records")
+
+
+def combine_json_to_csv(input_dir, output_dir, evaluation_dir, output_csv, output_parquet=None,
+                        workers=None, batch_size=5000):
+    """
+    Combines input, output, and evaluation JSON files into a single CSV file, and optionally Parquet.
+
+    Records are matched by ID and streamed: each batch of `batch_size` records is parsed by
+    `workers` processes and appended to the outputs, so memory does not grow with the number of
+    records. Records missing one of their files, or whose files cannot be parsed, are reported
+    and left out.
 
     Args:
         input_dir (str): Directory containing input JSON files.
         output_dir (str): Directory containing output JSON files.
         evaluation_dir (str): Directory containing evaluation JSON files.
-        output_csv (str): Path to the resulting CSV file.
+        output_csv (str): Path to the resulting CSV file; None writes no CSV.
+        output_parquet (str): Path to the resulting Parquet file; None writes no Parquet.
+        workers (int): Parsing processes; defaults to the number of CPUs, 1 parses in this process.
+        batch_size (int): Records parsed and written at a time.
+
+    Returns:
+        dict: Number of rows written, record IDs that failed to parse, and orphaned record IDs
+            with the kinds of file they are missing.
+    """
+    complete, orphans = match_records(input_dir, output_dir, evaluation_dir)
+    _report_orphans(orphans, " file")
+
+    workers = workers or os.cpu_count() or 1
+    jobs = list(complete.items())
+    failed = []
+
+    def batches(executor):
+        for start in range(0, len(jobs), batch_size):
+            batch = jobs[start:start + batch_size]
+            if executor is not None:
+                results = executor.map(_combine_job, batch, chunksize=max(1, len(batch) // (workers * 4)))
+            else:
+                results = map(_combine_job, batch)
+            rows = []
+            for rid, row, error in results:
+                if error is None:
+                    rows.append(row)
+                else:
+                    print(f"Error processing record {rid}: {error}")
+                    failed.append(rid)
+            yield rows
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and jobs else None
+    try:
+        written = write_combined(batches(executor), output_csv, output_parquet)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    print(f"Combined {written} records; {len(failed)} failed, {len(orphans)} orphaned")
+    return {"rows": written, "failed": failed, "orphans": orphans}
+
+
+def combine_run(store, run_id, judge_model, output_csv, output_parquet=None, batch_size=5000,
+                prompt_version=EVAL_PROMPT_VERSION):
     """
-    rows = []
-
-    # Load input, output, and evaluation files
-    input_files = sorted([f for f in os.listdir(input_dir) if f.endswith(".json")])
-    output_files = sorted([f for f in os.listdir(output_dir) if f.endswith(".json")])
-    evaluation_files = sorted([f for f in os.listdir(evaluation_dir) if f.endswith(".json")])
-
-    if not (len(input_files) == len(output_files) == len(evaluation_files)):
-        print("Error: Input, output, and evaluation files count do not match.")
-        return
-
-    for input_file, output_file, evaluation_file in zip(input_files, output_files, evaluation_files):
-        try:
-            # Read JSON files
-            with open(os.path.join(input_dir, input_file), "r") as infile:
-                input_data = json.load(infile)
-            with open(os.path.join(output_dir, output_file), "r") as outfile:
-                output_data = json.load(outfile)
-            with open(os.path.join(evaluation_dir, evaluation_file), "r") as evalfile:
-                evaluation_data = json.load(evalfile)
-
-            # Extract fields for the CSV
-            row = {
-                "Input File": input_file,
-                "Profession": input_data.get("profession", ""),
-                "Experience Level": input_data.get("experience_level", ""),
-                "Keywords": ", ".join(input_data.get("keywords", [])),
-                "Background": input_data.get("background", ""),
-                "Similarity Score Input": input_data.get("similarity_score_input", ""),
-                "Elevator Pitch": output_data.get("elevator_pitch", ""),
-                "About Me": output_data.get("About Me", ""),
-                "Retrieved Keywords": ", ".join(output_data.get("retrieved_keywords", [])),
-                "Evaluation Keywords Quality": evaluation_data["evaluation"].get("keywords_quality", ""),
-                "Evaluation Relevance": evaluation_data["evaluation"].get("relevance", ""),
-                "Evaluation Hallucination": evaluation_data["evaluation"].get("hallucination", ""),
-                "Evaluation Overall Quality": evaluation_data["evaluation"].get("overall_quality", ""),
-                "Evaluation Explanation": evaluation_data.get("explanation", "")
-            }
-
-            rows.append(row)
-
-        except Exception as e:
-            print(f"Error processing files: {input_file}, {output_file}, {evaluation_file}")
-            print(f"Error: {e}")
-            continue
-
-    # Create DataFrame and save to CSV
-    df = pd.DataFrame(rows)
-    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-    df.to_csv(output_csv, index=False)
-    print(f"CSV file created: {output_csv}")
+    Combine the inputs, profiles and evaluations of a run in the run store into a CSV file, and optionally Parquet.
+
+    The join is a single indexed query streamed `batch_size` rows at a time. Records lacking a
+    profile or an evaluation by `judge_model` with `prompt_version`, or whose row cannot be
+    built, are reported and left out.
+
+    Args:
+        store (RunStore): The run store.
+        run_id (str): The run.
+        judge_model (str): Model whose evaluations are combined.
+        output_csv (str): Path to the resulting CSV file; None writes no CSV.
+        output_parquet (str): Path to the resulting Parquet file; None writes no Parquet.
+        batch_size (int): Records written at a time.
+        prompt_version (str): Evaluation prompt version of the combined evaluations.
+
+    Returns:
+        dict: Number of rows written, record IDs whose row could not be built, and orphaned record
+            IDs with what they are missing.
+    """
+    orphans = store.incomplete_records(run_id, judge_model, prompt_version)
+    _report_orphans(orphans)
+    failed = []
+
+    def batches():
+        rows = []
+        for record in store.iter_complete(run_id, judge_model, prompt_version, batch_size):
+            try:
+                rows.append(combined_row(*record))
+            except Exception as e:
+                print(f"Error processing record {record[0]}: {e!r}")
+                failed.append(record[0])
+                continue
+            if len(rows) >= batch_size:
+                yield rows
+                rows = []
+        yield rows
+
+    written = write_combined(batches(), output_csv, output_parquet)
+    print(f"Combined {written} records of run {run_id}; {len(failed)} failed, {len(orphans)} orphaned")
+    return {"rows": written, "failed": failed, "orphans": orphans}
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Join inputs, profiles and evaluations by record ID into one CSV and Parquet table.")
+    parser.add_argument("--run-id", default=None, help="Run to combine (default: the latest).")
+    parser.add_argument("--judge-model", default="gpt-4", help="Model whose evaluations are combined.")
+    parser.add_argument("--prompt-version", default=EVAL_PROMPT_VERSION,
+                        help="Evaluation prompt version of the combined evaluations (default: the current one).")
+    parser.add_argument("--from-files", action="store_true",
+                        help="Join the per-record JSON files instead of a run in the run store.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Parsing processes with --from-files (default: number of CPUs).")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Records parsed and written at a time.")
+    parser.add_argument("--no-parquet", action="store_true", help="Write only the CSV file.")
+    args = parser.parse_args()
+
     # Load configuration
     config = load_config()
-    
-    # Directories
-    input_dir = os.path.join(config["paths"]["input_dir"], "generate_profile")
-    output_dir = os.path.join(config["paths"]["output_dir"], "generate_profile")
-    evaluation_dir = os.path.join(config["paths"]["output_dir"], "evaluate_profile_generation")
+
     output_csv = os.path.join(config["paths"]["output_dir"], "API_evaluation_by_ai.csv")
+    output_parquet = None if args.no_parquet else os.path.splitext(output_csv)[0] + ".parquet"
+
+    start = time.perf_counter()
+    if args.from_files:
+        # Directories
+        input_dir = os.path.join(config["paths"]["input_dir"], "generate_profile")
+        output_dir = os.path.join(config["paths"]["output_dir"], "generate_profile")
+        evaluation_dir = os.path.join(config["paths"]["output_dir"], "evaluate_profile_generation")
 
-    # Combine JSON files to CSV
-    combine_json_to_csv(input_dir, output_dir, evaluation_dir, output_csv)
+        # Combine JSON files to CSV
+        combine_json_to_csv(input_dir, output_dir, evaluation_dir, output_csv, output_parquet,
+                            workers=args.workers, batch_size=args.batch_size)
+    else:
+        store = RunStore(config["paths"]["run_store"])
+        run_id = args.run_id or store.latest_run()
+        if run_id is None:
+            print("Error: The run store is empty; use --from-files or `python run_store.py import` first.")
+            sys.exit(1)
+        combine_run(store, run_id, args.judge_model, output_csv, output_parquet, batch_size=args.batch_size,
+                    prompt_version=args.prompt_version)
+        store.close()
+    print(f"Done in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,147 @@
+import argparse
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from keyword_vocab import parse_keywords
+
+TITLE_COLUMN = "Job Title"
+SKILLS_COLUMN = "Trending Skills"
+
+# Skills are stored as a native list column, so readers never parse list repr strings
+DATASET_SCHEMA = pa.schema([
+    pa.field(TITLE_COLUMN, pa.string()),
+    pa.field(SKILLS_COLUMN, pa.list_(pa.string())),
+])
+
+# Column names used by CSV datasets written before the builder settled on `Job Title`/`Trending Skills`
+LEGACY_DATASET_COLUMNS = {"job_title": TITLE_COLUMN, "trending_keywords": SKILLS_COLUMN}
+
+
+def is_parquet(path):
+    """Return whether a dataset path names a Parquet file."""
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def write_dataset(df, path):
+    """
+    Write a job skills dataset as Parquet.
+
+    Args:
+        df (pd.DataFrame): Rows with a `Job Title` column and a `Trending Skills` column of lists.
+        path (str): Output path.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(df[[TITLE_COLUMN, SKILLS_COLUMN]], schema=DATASET_SCHEMA, preserve_index=False)
+    pq.write_table(table, path, compression="zstd")
+
+
+def read_dataset(path, memory_map=True):
+    """
+    Read a whole Parquet dataset as an Arrow table.
+
+    Args:
+        path (str): Parquet file.
+        memory_map (bool): Map the file instead of reading it into memory.
+
+    Returns:
+        pa.Table: Table with the `DATASET_SCHEMA` columns.
+    """
+    return pq.read_table(path, columns=DATASET_SCHEMA.names, memory_map=memory_map)
+
+
+def iter_dataset_columns(path, chunk_size=10000, limit=None):
+    """
+    Read a job skills dataset in chunks of plain Python columns.
+
+    Parquet files are memory-mapped and read a record batch at a time. CSV files, whose
+    skills are list repr strings, are read with pandas and parsed; the older
+    `job_title`/`trending_keywords` column names are accepted.
+
+    Args:
+        path (str): Parquet or CSV dataset.
+        chunk_size (int): Rows per chunk.
+        limit (int): Maximum number of rows to read. None or 0 reads every row.
+
+    Yields:
+        tuple: (titles, skills) lists of one chunk; each skills entry is a list of strings.
+    """
+    remaining = limit or None
+    if is_parquet(path):
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(
+            batch_size=chunk_size, columns=DATASET_SCHEMA.names)
+        for batch in batches:
+            if remaining is not None:
+                if remaining <= 0:
+                    return
+                batch = batch.slice(0, remaining)
+                remaining -= batch.num_rows
+            yield (batch.column(TITLE_COLUMN).to_pylist(),
+                   [skills or [] for skills in batch.column(SKILLS_COLUMN).to_pylist()])
+        return
+
+    for chunk in pd.read_csv(path, chunksize=chunk_size, nrows=remaining):
+        chunk = chunk.rename(columns=LEGACY_DATASET_COLUMNS)
+        yield chunk[TITLE_COLUMN].astype(str).tolist(), chunk[SKILLS_COLUMN].map(parse_keywords).tolist()
+
+
+def dataset_stats(path):
+    """
+    Count the jobs and keywords of a dataset.
+
+    Args:
+        path (str): Parquet or CSV dataset.
+
+    Returns:
+        dict: Number of jobs, total keywords and average keywords per job.
+    """
+    jobs = total = 0
+    if is_parquet(path):
+        # List lengths are counted in Arrow, a batch at a time; skills never become Python objects
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(columns=[SKILLS_COLUMN]):
+            jobs += batch.num_rows
+            total += pc.sum(pc.list_value_length(batch.column(SKILLS_COLUMN))).as_py() or 0
+    else:
+        for titles, skills in iter_dataset_columns(path):
+            jobs += len(titles)
+            total += sum(len(row) for row in skills)
+    return {
+        "jobs": jobs,
+        "total_keywords": total,
+        "avg_keywords_per_job": total / jobs if jobs else 0,
+    }
+
+
+def convert_csv_to_parquet(csv_path, parquet_path, chunk_size=100000):
+    """
+    Convert a CSV dataset, with list repr skills, to Parquet one chunk at a time.
+
+    Args:
+        csv_path (str): Input CSV.
+        parquet_path (str): Output Parquet file.
+        chunk_size (int): Rows converted per chunk; each becomes a row group.
+
+    Returns:
+        int: Number of rows written.
+    """
+    os.makedirs(os.path.dirname(parquet_path) or ".", exist_ok=True)
+    rows = 0
+    with pq.ParquetWriter(parquet_path, DATASET_SCHEMA, compression="zstd") as writer:
+        for titles, skills in iter_dataset_columns(csv_path, chunk_size=chunk_size):
+            writer.write_table(pa.table([titles, skills], schema=DATASET_SCHEMA))
+            rows += len(titles)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a job skills dataset CSV to Parquet.")
+    parser.add_argument("csv_path")
+    parser.add_argument("parquet_path", nargs="?", help="Defaults to the CSV path with a .parquet extension.")
+    args = parser.parse_args()
+
+    parquet_path = args.parquet_path or os.path.splitext(args.csv_path)[0] + ".parquet"
+    rows = convert_csv_to_parquet(args.csv_path, parquet_path)
+    print(f"Converted {rows} rows from {args.csv_path} to {parquet_path}")
@@ -0,0 +1,284 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+from metrics import EMBEDDING_CACHE_LOOKUPS
+
+
+def normalize_query(text):
+    """
+    Normalize a query string so that trivially different spellings share a cache entry.
+
+    Args:
+        text (str): The raw query text (e.g. a profession).
+
+    Returns:
+        str: The text with surrounding whitespace removed, inner whitespace collapsed and case folded.
+    """
+    return re.sub(r"\s+", " ", text or "").strip().casefold()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of query embeddings.
+
+    The first tier is an in-process LRU. The second tier is a SQLite database on disk, which
+    survives restarts and is shared by every worker process pointing at the same file.
+    Entries are keyed by (embedding_model, normalized text); the on-disk store is wiped
+    whenever it is opened with a different embedding model than the one it was built with.
+    """
+
+    def __init__(self, path, embedding_model, max_entries=1024, max_disk_entries=100000):
+        """
+        Args:
+            path (str): Path of the SQLite file backing the cache. `None` disables the disk tier.
+            embedding_model (str): Name of the embedding model the vectors come from.
+            max_entries (int): Maximum number of embeddings kept in memory.
+            max_disk_entries (int): Maximum number of embeddings kept on disk.
+        """
+        self.path = path
+        self.embedding_model = embedding_model
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = self._open_disk_store() if path else None
+        self._disk_pid = os.getpid()
+
+    @property
+    def _conn(self):
+        """SQLite connection of the current process. A worker forked from the process that opened the cache opens its own."""
+        if self._disk is not None and self._disk_pid != os.getpid():
+            # SQLite connections must not be used across fork; the inherited one is left untouched
+            self._disk = self._open_disk_store()
+            self._disk_pid = os.getpid()
+        return self._disk
+
+    def _open_disk_store(self):
+        """Open the SQLite store and drop its contents if it was built for another model."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, "
+                "last_used REAL NOT NULL, PRIMARY KEY (model, text))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'embedding_model'").fetchone()
+            if row is None or row[0] != self.embedding_model:
+                if row is not None:
+                    print(f"Embedding model changed from {row[0]} to {self.embedding_model}; clearing embedding cache.")
+                conn.execute("DELETE FROM embeddings")
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('embedding_model', ?)",
+                    (self.embedding_model,),
+                )
+        return conn
+
+    def get(self, text):
+        """
+        Look up the embedding of a normalized text.
+
+        Args:
+            text (str): Normalized query text.
+
+        Returns:
+            list: The cached embedding, or None if it is not cached.
+        """
+        key = (self.embedding_model, text)
+        with self._lock:
+            vector = self._get_memory(key)
+            if vector is not None:
+                return vector
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT vector FROM embeddings WHERE model = ? AND text = ?", key
+                    ).fetchone()
+                    if row is not None:
+                        vector = array("f", row[0]).tolist()
+                        with self._conn:
+                            self._conn.execute(
+                                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text = ?",
+                                (time.time(), *key),
+                            )
+                        self._remember(key, vector)
+                        self.disk_hits += 1
+                        EMBEDDING_CACHE_LOOKUPS.inc("disk")
+                        return vector
+                except sqlite3.Error as e:
+                    print(f"Error reading embedding cache: {e}")
+
+            self.misses += 1
+            EMBEDDING_CACHE_LOOKUPS.inc("miss")
+            return None
+
+    def get_memory(self, text):
+        """
+        Look up the embedding of a normalized text in the in-memory tier only, without disk I/O.
+
+        Args:
+            text (str): Normalized query text.
+
+        Returns:
+            list: The cached embedding, or None if it is not in memory.
+        """
+        with self._lock:
+            return self._get_memory((self.embedding_model, text))
+
+    def _get_memory(self, key):
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            EMBEDDING_CACHE_LOOKUPS.inc("memory")
+        return vector
+
+    def put(self, text, vector):
+        """
+        Store the embedding of a normalized text in both tiers.
+
+        Args:
+            text (str): Normalized query text.
+            vector (list): The embedding to cache.
+        """
+        key = (self.embedding_model, text)
+        with self._lock:
+            self._remember(key, vector)
+            if self._conn is None:
+                return
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO embeddings (model, text, vector, last_used) VALUES (?, ?, ?, ?)",
+                        (*key, array("f", vector).tobytes(), time.time()),
+                    )
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN ("
+                        "SELECT rowid FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,),
+                    )
+            except sqlite3.Error as e:
+                print(f"Error writing embedding cache: {e}")
+
+    def _remember(self, key, vector):
+        """Insert into the in-memory LRU, evicting the least recently used entries."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached embedding from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM embeddings")
+
+    def stats(self):
+        """
+        Report cache counters.
+
+        Returns:
+            dict: Hit/miss counters, the hit rate and the current in-memory size.
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "embedding_model": self.embedding_model,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves query embeddings from an `EmbeddingCache`.
+
+    Only `embed_query` is cached; document embeddings used at ingestion time are passed
+    straight through to the wrapped model.
+    """
+
+    def __init__(self, embedding, cache):
+        """
+        Args:
+            embedding (Embeddings): The embedding model to wrap (e.g. OllamaEmbeddings).
+            cache (EmbeddingCache): The cache to read from and write to.
+        """
+        self.embedding = embedding
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        return self.embedding.embed_documents(texts)
+
+    def embed_query(self, text):
+        normalized = normalize_query(text)
+        vector = self.cache.get(normalized)
+        if vector is None:
+            vector = self.embedding.embed_query(normalized)
+            self.cache.put(normalized, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        normalized = normalize_query(text)
+        # Only the in-memory tier is read on the event loop; SQLite reads and writes can wait on disk and locks
+        vector = self.cache.get_memory(normalized)
+        if vector is None:
+            vector = await asyncio.to_thread(self.cache.get, normalized)
+        if vector is None:
+            vector = await self.embedding.aembed_query(normalized)
+            await asyncio.to_thread(self.cache.put, normalized, vector)
+        return vector
+
+
+def get_cached_embedding(config):
+    """
+    Build the query embedding model configured in config.yml, wrapped in the embedding cache.
+
+    `settings.embedding_model: hash` selects the deterministic offline embedder that
+    build_job_skills_database.py uses under the same setting.
+
+    Args:
+        config (dict): Loaded configuration.
+
+    Returns:
+        CachedEmbeddings: The cached embedding model.
+    """
+    embedding_model = config['settings']['embedding_model']
+    if embedding_model == "hash":
+        from ingestion import HashEmbeddings
+
+        model = HashEmbeddings()
+    else:
+        from langchain_community.embeddings.ollama import OllamaEmbeddings
+
+        model = OllamaEmbeddings(model=embedding_model)
+    cache = EmbeddingCache(
+        config['paths']['embedding_cache'],
+        embedding_model,
+        max_entries=config['settings']['embedding_cache_size'],
+        max_disk_entries=config['settings']['embedding_cache_disk_size'],
+    )
+    return CachedEmbeddings(model, cache)
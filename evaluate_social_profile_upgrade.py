@@ -1,14 +1,23 @@
 import os, sys
 import json
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
 from utils import chat_gpt, get_client
 from config_loader import load_config
+from evaluation_cache import EvaluationCache, evaluation_key
+from rate_limit import RequestTokenLimiter
+from run_store import EVAL_PROMPT_VERSION, RunStore
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-import traceback
 # Load configuration
 config = load_config()
 
-import json
+# Scores the judge must return in its "evaluation" object
+EVALUATION_SCORES = ("keywords_quality", "relevance", "hallucination", "overall_quality")
 
+# Bump run_store.EVAL_PROMPT_VERSION whenever this prompt changes, so evaluations of the old prompt are not reused
 def get_eval_prompt(user_input, model_output):
     prompt = f"""
 
@@ -176,60 +185,124 @@ Your output:
     return prompt
 
 
-def evaluate_output(input_file, output_file, client, output_dir):
+def is_complete_evaluation(evaluation_data):
+    """Return whether a judge reply has an "evaluation" object with every score as a number."""
+    if not isinstance(evaluation_data, dict) or not isinstance(evaluation_data.get("evaluation"), dict):
+        return False
+    scores = evaluation_data["evaluation"]
+    return all(isinstance(scores.get(name), (int, float)) and not isinstance(scores.get(name), bool)
+               for name in EVALUATION_SCORES)
+
+
+def evaluate_output(record_id, user_input, model_output, client, cache=None, judge_model="gpt-4",
+                    llm_options=None):
     """
     Evaluate the quality of output based on input using ChatGPT.
 
+    A pair already judged with the same content, judge model and prompt version is answered
+    from the cache without calling the judge.
+
     Args:
-        input_file (str): Path to the input JSON file.
-        output_file (str): Path to the output JSON file.
+        record_id (str): ID of the record in its run.
+        user_input (dict): The user input the profile was generated from.
+        model_output (dict): The generated profile.
         client (OpenAI): Initialized OpenAI client.
-        output_dir (str): Directory to save the evaluation results.
+        cache (EvaluationCache): Cache of earlier evaluations.
+        judge_model (str): Model asked to evaluate.
+        llm_options (dict): Extra `chat_gpt` arguments (limiter, retries).
 
     Returns:
-        None
+        tuple: "cached", "evaluated" or "failed", and the evaluation (None if it failed). A reply
+            without every score fails, so it is neither cached nor stored and stays pending.
     """
     try:
-        with open(input_file, "r") as infile, open(output_file, "r") as outfile:
-            user_input = json.load(infile)
-            model_output = json.load(outfile)
+        key = evaluation_key(user_input, model_output, judge_model, EVAL_PROMPT_VERSION)
+        evaluation_data = cache.get(key) if cache is not None else None
+        if evaluation_data is not None and is_complete_evaluation(evaluation_data):
+            return "cached", evaluation_data
 
-        # Construct prompt
+        # Construct prompt and call ChatGPT
         prompt = get_eval_prompt(user_input, model_output)
-
-        # Call ChatGPT
-        evaluation = chat_gpt(prompt, client, model="gpt-4")
+        evaluation = chat_gpt(prompt, client, model=judge_model, **(llm_options or {}))
 
         # Parse evaluation as JSON
         try:
             evaluation_data = json.loads(evaluation)
         except json.JSONDecodeError:
-            print(f"Error: Unable to parse ChatGPT response as JSON. Response:\n{evaluation}")
-            return
-
-        # Save evaluation
-        os.makedirs(output_dir, exist_ok=True)
-        evaluation_file = os.path.join(output_dir, f"evaluation_{os.path.basename(input_file)}")
-        with open(evaluation_file, "w") as eval_file:
-            json.dump(evaluation_data, eval_file, indent=4)
-        print(f"Evaluation saved to: {evaluation_file}")
+            print(f"Error: Unable to parse ChatGPT response for record {record_id} as JSON. Response:\n{evaluation}")
+            return "failed", None
+        if not is_complete_evaluation(evaluation_data):
+            print(f"Error: ChatGPT response for record {record_id} lacks the evaluation scores. Response:\n{evaluation}")
+            return "failed", None
+        if cache is not None:
+            cache.put(key, judge_model, EVAL_PROMPT_VERSION, evaluation_data)
+        return "evaluated", evaluation_data
 
     except Exception as e:
-        print(f"Error evaluating input/output pair: {e}")
-        traceback.print_exc()
+        print(f"Error evaluating record {record_id}: {e}")
+        return "failed", None
+
 
 if __name__ == "__main__":
-    output_dir = os.path.join(config["paths"]["output_dir"], "generate_profile")
-    input_dir = os.path.join(config["paths"]["input_dir"], "generate_profile")
-    evaluation_dir = os.path.join(config["paths"]["output_dir"], "evaluate_profile_generation")
-    client = get_client()  
-    input_files = sorted([f for f in os.listdir(input_dir) if f.endswith(".json")])
-    output_files = sorted([f for f in os.listdir(output_dir) if f.endswith(".json")])
-    print(f"Found {len(input_files)} input files, {len(output_files)} output files")
-    if len(input_files) != len(output_files):
-        print("Error: The number of input and output files must match.")
-    else:
-        for input_file, output_file in zip(input_files, output_files):
-            input_path = os.path.join(input_dir, input_file)
-            output_path = os.path.join(output_dir, output_file)
-            evaluate_output(input_path, output_path, client, evaluation_dir)
+    batch = config["batch"]
+    parser = argparse.ArgumentParser(description="Evaluate generated profiles with an LLM judge.")
+    parser.add_argument("--concurrency", type=int, default=batch["concurrency"], help="Judge calls in flight.")
+    parser.add_argument("--judge-model", default="gpt-4")
+    parser.add_argument("--run-id", default=None, help="Run to evaluate (default: the latest).")
+    parser.add_argument("--export-files", action="store_true",
+                        help="Also write the run's evaluations as evaluation_user_input_NNN.json files.")
+    args = parser.parse_args()
+
+    store = RunStore(config["paths"]["run_store"])
+    run_id = args.run_id or store.latest_run()
+    if run_id is None:
+        print("Error: The run store is empty; generate profiles or `python run_store.py import` existing files first.")
+        sys.exit(1)
+
+    # Only profiles not yet judged by this model and prompt version are pending, so a re-run picks up where one stopped
+    pending = store.pending_evaluations(run_id, args.judge_model, EVAL_PROMPT_VERSION)
+    skipped = [rid for rid, missing in store.incomplete_records(run_id, args.judge_model, EVAL_PROMPT_VERSION).items() if "profile" in missing]
+    print(f"Run {run_id}: {len(pending)} profiles to evaluate")
+    if skipped:
+        print(f"Skipping {len(skipped)} records without a profile: {', '.join(skipped[:10])}{' ...' if len(skipped) > 10 else ''}")
+
+    cache = EvaluationCache(config["paths"]["evaluation_cache"])
+    # Retries are handled by chat_gpt, which also pauses the shared limiter on 429s
+    client = get_client().with_options(max_retries=0)
+    llm_options = {
+        "limiter": RequestTokenLimiter(batch["requests_per_minute"], batch["tokens_per_minute"],
+                                       batch["completion_tokens"]),
+        "max_retries": batch["max_retries"],
+        "backoff_base": batch["backoff_base"],
+        "backoff_max": batch["backoff_max"],
+    }
+
+    start = time.perf_counter()
+    statuses = Counter()
+    finished = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = executor.map(
+            lambda record: evaluate_output(*record, client, cache=cache, judge_model=args.judge_model,
+                                           llm_options=llm_options),
+            pending)
+        try:
+            for (rid, _, _), (status, evaluation_data) in tqdm(zip(pending, results), total=len(pending),
+                                                               desc="Evaluating profiles"):
+                statuses[status] += 1
+                if evaluation_data is not None:
+                    finished.append((rid, evaluation_data))
+                if len(finished) >= 100:
+                    store.add_evaluations(run_id, finished, args.judge_model, EVAL_PROMPT_VERSION)
+                    finished = []
+        finally:
+            store.add_evaluations(run_id, finished, args.judge_model, EVAL_PROMPT_VERSION)
+    cache.close()
+    print(f"Evaluated {len(pending)} records in {time.perf_counter() - start:.1f}s: "
+          f"{statuses['evaluated']} judged, {statuses['cached']} from cache, {statuses['failed']} failed.")
+    if args.export_files:
+        evaluation_dir = os.path.join(config["paths"]["output_dir"], "evaluate_profile_generation")
+        store.export_files(run_id, os.path.join(config["paths"]["input_dir"], "generate_profile"),
+                           os.path.join(config["paths"]["output_dir"], "generate_profile"), evaluation_dir,
+                           args.judge_model, EVAL_PROMPT_VERSION)
+        print(f"Exported run {run_id} to {evaluation_dir}")
+    store.close()
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def evaluation_key(user_input, model_output, judge_model, prompt_version):
+    """
+    Content hash identifying one judge call.
+
+    Args:
+        user_input (dict): The user input the profile was generated from.
+        model_output (dict): The generated profile.
+        judge_model (str): Model asked to evaluate.
+        prompt_version (str): Version of the evaluation prompt.
+
+    Returns:
+        str: Hex SHA-256 of the canonical JSON of all four; key order does not matter.
+    """
+    payload = json.dumps([user_input, model_output, judge_model, prompt_version], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class EvaluationCache:
+    """
+    SQLite cache of judge evaluations, keyed by `evaluation_key`.
+
+    An unchanged input/output pair judged by the same model with the same prompt version is
+    never sent to the judge twice. Safe to share between threads.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the SQLite file.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS evaluations ("
+                "key TEXT PRIMARY KEY, judge_model TEXT NOT NULL, prompt_version TEXT NOT NULL, "
+                "evaluation TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        """
+        Look up a cached evaluation.
+
+        Returns:
+            dict: The evaluation, or None if the pair was never judged.
+        """
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT evaluation FROM evaluations WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                print(f"Error reading evaluation cache: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, judge_model, prompt_version, evaluation):
+        """Store the evaluation of a pair."""
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO evaluations (key, judge_model, prompt_version, evaluation, created) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, judge_model, prompt_version, json.dumps(evaluation), time.time()),
+                    )
+            except sqlite3.Error as e:
+                print(f"Error writing evaluation cache: {e}")
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
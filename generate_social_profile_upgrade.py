@@ -1,12 +1,16 @@
 import os
 import sys
-import json
+import time
+import argparse
 import datetime
 import logging
-import traceback
 import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
 from config_loader import load_config
-from utils import get_client, get_vectorstore
+from rate_limit import RequestTokenLimiter
+from run_store import RunStore
+from utils import get_client, get_skills_index
 from utils import generate_profile
 
 # Add the parent directory to sys.path
@@ -64,12 +68,13 @@ log_dir = os.path.join(config["paths"]["logs_dir"], "profile_eval_logs")
 logger = setup_logger(log_dir)
 
 
-def generate_user_inputs(n=5):
+def generate_user_inputs(n=5, seed=None):
     """
     Generate a diverse set of user inputs for profile generation.
 
     Args:
         n (int): Number of user input dictionaries to generate.
+        seed (int): Random seed, for a reproducible set of inputs.
 
     Returns:
         list: A list of dictionaries with user input parameters.
@@ -122,70 +127,124 @@ def generate_user_inputs(n=5):
 
     similarity_scores = [20, 30, 40, 50, 60, 70, 80, 90]
 
+    rng = random.Random(seed)
     user_inputs = []
     for _ in range(n):
         user_inputs.append({
-            "profession": random.choice(professions),
-            "experience_level": random.choice(experience_levels),
-            "keywords": random.sample(random.choice(keywords), random.randint(2, 3)),
-            "background": random.choice(backgrounds),
-            "similarity_score_input": random.choice(similarity_scores),
+            "profession": rng.choice(professions),
+            "experience_level": rng.choice(experience_levels),
+            "keywords": rng.sample(rng.choice(keywords), rng.randint(2, 3)),
+            "background": rng.choice(backgrounds),
+            "similarity_score_input": rng.choice(similarity_scores),
         })
 
     return user_inputs
 
 
-def save_results(base_dir, subfolder, file_name, content):
+def generate_profiles(user_inputs, skills_index, client, concurrency=1, llm_options=None):
     """
-    Save the results to a JSON file in the specified directory and subfolder.
+    Generate profiles on a pool of worker threads, yielding them in input order.
+
+    A result is held back until every earlier input has been yielded, so the profiles are
+    stored in order even though the LLM calls complete out of order.
 
     Args:
-        base_dir (str): Base directory to save the results.
-        subfolder (str): Subfolder within the base directory (e.g., 'generate_profile').
-        file_name (str): Name of the output file.
-        content (dict): Content to save.
+        user_inputs (list): User input dictionaries.
+        skills_index (SkillsIndex): The in-memory skills index.
+        client (OpenAI): Initialized OpenAI client, shared by the workers.
+        concurrency (int): Number of profiles generated at once.
+        llm_options (dict): Extra `chat_gpt` arguments (limiter, retries) passed to `generate_profile`.
+
+    Yields:
+        tuple: (index, user input, profile); the profile is `{"error": ...}` if generation failed.
     """
-    try:
-        # Construct the target directory path
-        target_dir = os.path.join(base_dir, subfolder)
-        os.makedirs(target_dir, exist_ok=True)
-
-        # Create the file path and save the content
-        output_file = os.path.join(target_dir, f"{file_name}.json")
-        with open(output_file, "w") as f:
-            json.dump(content, f, indent=4)
-        logger.info(f"Saved results to {output_file}")
-    except Exception as e:
-        logger.error(f"Error saving results to {target_dir}: {e}")
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(generate_profile, user_input, skills_index, client, llm_options=llm_options): idx
+            for idx, user_input in enumerate(user_inputs)
+        }
+        finished, next_idx = {}, 0
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                finished[idx] = future.result()
+            except Exception as e:
+                logger.error(f"Error processing user input {idx + 1}: {e}")
+                finished[idx] = {"error": str(e)}
+            while next_idx in finished:
+                yield next_idx, user_inputs[next_idx], finished.pop(next_idx)
+                next_idx += 1
+
 
 if __name__ == "__main__":
+    batch = config["batch"]
+    parser = argparse.ArgumentParser(description="Generate profiles for random user inputs.")
+    parser.add_argument("--n", type=int, default=15, help="Number of user inputs to generate.")
+    parser.add_argument("--concurrency", type=int, default=batch["concurrency"], help="Profiles generated at once.")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the user inputs.")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None,
+                        help="Generate the missing and failed profiles of an earlier run instead of a new one.")
+    parser.add_argument("--export-files", action="store_true",
+                        help="Also write the run as user_input_NNN.json / profile_NNN.json files.")
+    args = parser.parse_args()
+
     output_dir = config["paths"]["output_dir"]
     input_dir = config["paths"]["input_dir"]
-    vectorstore = get_vectorstore()
-    client = get_client()
-
-    user_inputs = generate_user_inputs(n=15)
-
-    for idx, user_input in enumerate(user_inputs, start=1):
-        try:
-            logger.info(f"Processing user input {idx} of {len(user_inputs)}...")
-
-            # Save user input to the input directory under 'generate_profile' subfolder
-            input_file_name = f"user_input_{idx:03d}"
-            save_results(input_dir, "generate_profile", input_file_name, user_input)
-
-            # Generate the profile
-            profile = generate_profile(user_input, vectorstore, client)
-
-            # Save the profile results to the output directory under 'generate_profile' subfolder
-            output_file_name = f"profile_{idx:03d}"
-            save_results(output_dir, "generate_profile", output_file_name, profile)
+    store = RunStore(config["paths"]["run_store"])
+    if args.resume:
+        run_id = args.resume
+        if not store.has_run(run_id):
+            print(f"Error: Run {run_id} does not exist; `python run_store.py list` shows the runs.")
+            sys.exit(1)
+        pending = store.missing_profiles(run_id)
+    else:
+        user_inputs = generate_user_inputs(n=args.n, seed=args.seed)
+        # Record IDs sort in input order, whatever the batch size
+        width = max(3, len(str(len(user_inputs))))
+        pending = [(f"{idx + 1:0{width}d}", user_input) for idx, user_input in enumerate(user_inputs)]
+        run_id = store.create_run({"n": args.n, "seed": args.seed})
+        store.add_inputs(run_id, pending)
+    logger.info(f"Run {run_id}: generating {len(pending)} profiles")
+
+    skills_index = get_skills_index()
+    # Retries are handled by chat_gpt, which also pauses the shared limiter on 429s
+    client = get_client().with_options(max_retries=0)
+    llm_options = {
+        "limiter": RequestTokenLimiter(batch["requests_per_minute"], batch["tokens_per_minute"],
+                                       batch["completion_tokens"]),
+        "max_retries": batch["max_retries"],
+        "backoff_base": batch["backoff_base"],
+        "backoff_max": batch["backoff_max"],
+    }
+
+    start = time.perf_counter()
+    failures = 0
+    finished = []
+    results = generate_profiles([user_input for _, user_input in pending], skills_index, client,
+                                args.concurrency, llm_options)
+    try:
+        for idx, user_input, profile in tqdm(results, total=len(pending), desc="Generating profiles"):
+            finished.append((pending[idx][0], profile))
+            # Profiles are inserted in batches; an interrupted run keeps what was flushed and can be resumed
+            if len(finished) >= 100:
+                store.add_profiles(run_id, finished)
+                finished = []
+            if "error" in profile:
+                failures += 1
 
             # Log similarity scores and responses
-            similarity_scores = profile.get("similarity_scores", {})
-            logger.info(f"User Input: {user_input}")
-            logger.info(f"Generated Profile: {profile}")
-            logger.info(f"Similarity Scores: {similarity_scores}")
-        except Exception as e:
-            logger.error(f"Error processing user input {idx}: {e}")
-            traceback.print_exc()
+            logger.debug(f"User Input: {user_input}")
+            logger.debug(f"Generated Profile: {profile}")
+            logger.debug(f"Similarity Scores: {profile.get('similarity_scores', {})}")
+    finally:
+        store.add_profiles(run_id, finished)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Generated {len(pending) - failures} of {len(pending)} profiles in {elapsed:.1f}s "
+                f"({len(pending) / max(elapsed, 1e-9) * 60:.0f} per minute, concurrency {args.concurrency}); "
+                f"{failures} failed.")
+    if args.export_files:
+        store.export_files(run_id, os.path.join(input_dir, "generate_profile"),
+                           os.path.join(output_dir, "generate_profile"))
+        logger.info(f"Exported run {run_id} to {input_dir} and {output_dir}")
+    store.close()
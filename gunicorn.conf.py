@@ -0,0 +1,27 @@
+# Pre-fork production serving: gunicorn -c gunicorn.conf.py
+#
+# The app is imported and warmed up once in the master. The skills index arrays are
+# memory-mapped read-only, so the forked workers share their pages instead of each
+# holding a private copy.
+from config_loader import load_config
+
+wsgi_app = "main:app"
+bind = "127.0.0.1:5000"
+# Not assigned to a module-level `config`, which gunicorn would read as its own setting
+workers = load_config("config.yml")['settings']['workers']
+preload_app = True
+
+
+def on_starting(server):
+    """Build the shared services in the master, before any worker is forked."""
+    from main import services
+
+    # Threads do not survive fork, so health probing starts in each worker instead
+    services.warm_up(health_monitor=False)
+
+
+def post_fork(server, worker):
+    """Start this worker's background health probes."""
+    from main import services
+
+    services.start_health_monitor()
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from config_loader import load_config
+from skills_index import SkillsIndex
+
+
+class HealthMonitor:
+    """
+    Runs dependency health probes on a background thread and caches their results.
+
+    Request handlers only read the cached results, so health endpoints never wait on a
+    vector search, an LLM call or a config reload.
+    """
+
+    def __init__(self, probes, interval=30):
+        """
+        Args:
+            probes (dict): Maps a dependency name to a zero-argument callable. The callable
+                raises on failure and may return a message describing the healthy state.
+            interval (float): Seconds between two probe rounds.
+        """
+        self.probes = probes
+        self.interval = interval
+        self._results = {
+            name: {"status": "unknown", "message": "Not probed yet.", "latency_ms": None, "checked_at": None}
+            for name in probes
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start probing in a daemon thread. Calling it again has no effect."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the probing thread."""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe_all()
+            self._stop.wait(self.interval)
+
+    def probe_all(self):
+        """Run every probe once and record the results."""
+        for name, probe in self.probes.items():
+            start = time.perf_counter()
+            try:
+                message = probe()
+                result = {"status": "healthy", "message": message or "OK"}
+            except Exception as e:
+                result = {"status": "unhealthy", "message": str(e)}
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            result["checked_at"] = time.time()
+            with self._lock:
+                self._results[name] = result
+
+    def status(self):
+        """
+        Return the latest probe results.
+
+        Returns:
+            dict: Per dependency: status, message, last probe latency and age of the result in seconds.
+        """
+        now = time.time()
+        with self._lock:
+            results = {name: dict(result) for name, result in self._results.items()}
+        for result in results.values():
+            checked_at = result.pop("checked_at")
+            result["age_seconds"] = round(now - checked_at, 2) if checked_at is not None else None
+        return results
+
+    def is_ready(self):
+        """Whether every dependency passed its latest probe."""
+        with self._lock:
+            return all(result["status"] == "healthy" for result in self._results.values())
+
+
+def build_health_probes(vectorstore, client, config_file="config.yml", model="gpt-3.5-turbo"):
+    """
+    Build the standard probes for the vector store, the LLM and the configuration.
+
+    Args:
+        vectorstore (SkillsIndex | Chroma): The serving skills index, or an initialized ChromaDB instance.
+        client (OpenAI): Initialized OpenAI client.
+        config_file (str): Path of the configuration file.
+        model (str): Model that must be available.
+
+    Returns:
+        dict: Probes to pass to `HealthMonitor`.
+    """
+    def vector_store():
+        if isinstance(vectorstore, SkillsIndex):
+            query_vector = vectorstore.embedding.embed_query("Machine Learning Engineer")
+            results, _ = vectorstore.search(query_vector, k=1)
+        else:
+            results = vectorstore.similarity_search("Machine Learning Engineer", k=1)
+        return f"Vector store contains {len(results)} results for test query."
+
+    def llm_model():
+        # Looking the model up checks reachability and credentials without paying for a completion
+        client.models.retrieve(model)
+        return f"Model {model} is available."
+
+    def configuration():
+        load_config(config_file)
+        return "Configuration loaded successfully."
+
+    return {"vector_store": vector_store, "model": llm_model, "configuration": configuration}
@@ -0,0 +1,272 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from config_loader import load_config
+
+# The stored body is already decoded, so these headers no longer describe it
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class ResponseCache:
+    """
+    On-disk cache of successful HTTP responses, keyed by URL.
+
+    Bodies are zlib-compressed in a SQLite file (WAL mode), so the cache is shared by dataset
+    rebuilds, the serving fallback and every worker process. Entries expire after `ttl_seconds`
+    and the oldest are evicted once the compressed bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, path, ttl_seconds=86400, max_bytes=256 * 2 ** 20):
+        """
+        Args:
+            path (str): Path of the SQLite file.
+            ttl_seconds (float): Seconds a cached response stays valid.
+            max_bytes (int): Maximum total size of the compressed bodies.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        """SQLite connection of the current process, opened on first use and again after a fork."""
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "url TEXT PRIMARY KEY, status INTEGER NOT NULL, headers TEXT NOT NULL, "
+                    "body BLOB NOT NULL, size INTEGER NOT NULL, fetched_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at)")
+                # Running total of the body sizes, kept by triggers so every process sees the same figure
+                conn.execute("CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), "
+                             "total INTEGER NOT NULL)")
+                conn.execute("INSERT OR IGNORE INTO cache_size (id, total) "
+                             "SELECT 0, COALESCE(SUM(size), 0) FROM responses")
+                conn.execute("CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses "
+                             "BEGIN UPDATE cache_size SET total = total + NEW.size WHERE id = 0; END")
+                conn.execute("CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses "
+                             "BEGIN UPDATE cache_size SET total = total - OLD.size + NEW.size WHERE id = 0; END")
+                conn.execute("CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses "
+                             "BEGIN UPDATE cache_size SET total = total - OLD.size WHERE id = 0; END")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, url):
+        """
+        Look up a cached response.
+
+        Args:
+            url (str): Request URL.
+
+        Returns:
+            requests.Response: The cached response, with `from_cache` set, or None if it is missing or expired.
+        """
+        with self._lock:
+            try:
+                row = self._connection().execute(
+                    "SELECT status, headers, body FROM responses WHERE url = ? AND fetched_at >= ?",
+                    (url, time.time() - self.ttl_seconds),
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Error reading HTTP cache: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        status, headers, body = row
+        return build_response(url, status, json.loads(headers), zlib.decompress(body), from_cache=True)
+
+    def put(self, url, status, headers, content):
+        """
+        Store a response body and evict expired and excess entries.
+
+        Args:
+            url (str): Request URL.
+            status (int): HTTP status code.
+            headers (Mapping): Response headers.
+            content (bytes): Decoded response body.
+        """
+        headers = {key: value for key, value in headers.items() if key.lower() not in _DROPPED_HEADERS}
+        body = zlib.compress(content, 6)
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    # An upsert rather than INSERT OR REPLACE, whose implicit delete fires no trigger
+                    conn.execute(
+                        "INSERT INTO responses (url, status, headers, body, size, fetched_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET status = excluded.status, "
+                        "headers = excluded.headers, body = excluded.body, size = excluded.size, "
+                        "fetched_at = excluded.fetched_at",
+                        (url, status, json.dumps(headers), body, len(body), now),
+                    )
+                    conn.execute("DELETE FROM responses WHERE fetched_at < ?", (now - self.ttl_seconds,))
+                    total = conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+                    if total > self.max_bytes:
+                        # Drop the oldest responses until the cache fits again
+                        freed, victims = 0, []
+                        for victim, size in conn.execute("SELECT url, size FROM responses ORDER BY fetched_at"):
+                            if freed >= total - self.max_bytes:
+                                break
+                            victims.append((victim,))
+                            freed += size
+                        conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+            except sqlite3.Error as e:
+                print(f"Error writing HTTP cache: {e}")
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit and miss counts of this process and the hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+def build_response(url, status, headers, content, from_cache=False):
+    """
+    Build a `requests.Response` from stored parts.
+
+    Args:
+        url (str): Request URL.
+        status (int): HTTP status code.
+        headers (dict): Response headers.
+        content (bytes): Decoded response body.
+        from_cache (bool): Value of the `from_cache` attribute.
+
+    Returns:
+        requests.Response: A response usable like one returned by `requests.get`.
+    """
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.from_cache = from_cache
+    return response
+
+
+class CachedSession:
+    """
+    Pooled keep-alive `requests.Session` that serves successful GET responses from a `ResponseCache`.
+
+    `get` returns `requests.Response` objects either way; `response.from_cache` tells them apart.
+    """
+
+    def __init__(self, cache=None, pool_size=16):
+        """
+        Args:
+            cache (ResponseCache): Response cache. Without one, every request goes to the network.
+            pool_size (int): Maximum number of kept-alive connections per host.
+        """
+        self.cache = cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def cached(self, url):
+        """Return the cached response for `url`, or None. Never touches the network."""
+        return self.cache.get(url) if self.cache is not None else None
+
+    def get(self, url, **kwargs):
+        """
+        GET a URL, from the cache when possible.
+
+        Args:
+            url (str): Request URL.
+            **kwargs: Passed to `requests.Session.get` (headers, timeout, ...).
+
+        Returns:
+            requests.Response: The cached or fetched response.
+        """
+        response = self.cached(url)
+        if response is None:
+            response = self.fetch(url, **kwargs)
+        return response
+
+    def fetch(self, url, **kwargs):
+        """
+        GET a URL over the pooled connections, bypassing the cache lookup. A 200 response is cached.
+
+        Args:
+            url (str): Request URL.
+            **kwargs: Passed to `requests.Session.get` (headers, timeout, ...).
+
+        Returns:
+            requests.Response: The fetched response.
+        """
+        response = self.session.get(url, **kwargs)
+        response.from_cache = False
+        if self.cache is not None and response.status_code == 200:
+            self.cache.put(url, response.status_code, response.headers, response.content)
+        return response
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+
+def get_cached_session(config, pool_size=None):
+    """
+    Build the cached session configured in config.yml.
+
+    Args:
+        config (dict): Loaded configuration.
+        pool_size (int): Connections per host; defaults to `settings.http_pool_size`.
+
+    Returns:
+        CachedSession: The session.
+    """
+    cache = ResponseCache(
+        config['paths']['http_cache'],
+        ttl_seconds=config['settings']['http_cache_ttl'],
+        max_bytes=config['settings']['http_cache_max_mb'] * 2 ** 20,
+    )
+    return CachedSession(cache, pool_size=pool_size or config['settings']['http_pool_size'])
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def default_session(config_file="config.yml"):
+    """
+    Return the process-wide cached session, creating it on first use.
+
+    Args:
+        config_file (str): Configuration used when the session is created.
+
+    Returns:
+        CachedSession: The shared session.
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = get_cached_session(load_config(config_file))
+        return _default_session
@@ -0,0 +1,324 @@
+import hashlib
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+CONTENT_HASH_METADATA_KEY = "content_hash"
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic offline stand-in for the embedding model.
+
+    Each text maps to a unit vector drawn from a generator seeded with its hash, so the same
+    text always gets the same vector. `latency` and `latency_per_text` simulate the request
+    cost of a remote model, which is what the ingestion pipeline overlaps.
+    """
+
+    def __init__(self, dim=1024, latency=0.0, latency_per_text=0.0):
+        """
+        Args:
+            dim (int): Embedding dimensionality.
+            latency (float): Seconds each `embed_documents`/`embed_query` call sleeps.
+            latency_per_text (float): Additional seconds per text embedded.
+        """
+        self.dim = dim
+        self.latency = latency
+        self.latency_per_text = latency_per_text
+
+    def _embed(self, text):
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def embed_documents(self, texts):
+        if self.latency or self.latency_per_text:
+            time.sleep(self.latency + self.latency_per_text * len(texts))
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text).tolist()
+
+
+class BatchSizeTuner:
+    """
+    Picks the embedding batch size from observed throughput.
+
+    Starting from the configured size, the batch size doubles while documents per second
+    keep improving by at least `min_gain`, then settles on the best size seen.
+    """
+
+    def __init__(self, initial=10, maximum=1024, samples=8, min_gain=0.05):
+        """
+        Args:
+            initial (int): First batch size to try.
+            maximum (int): Largest batch size to try.
+            samples (int): Batches measured at each size before deciding.
+            min_gain (float): Relative throughput gain required to keep growing.
+        """
+        self.size = max(1, initial)
+        self.maximum = max(self.size, maximum)
+        self.samples = samples
+        self.min_gain = min_gain
+        self.settled = False
+        self.history = []
+        self._best_size = None
+        self._best_rate = 0.0
+        self._documents = 0
+        self._seconds = 0.0
+        self._count = 0
+        self._last = None
+        self._lock = threading.Lock()
+
+    def record(self, size, finished_at):
+        """
+        Report a batch leaving the embedding stage.
+
+        Throughput is measured between completions, so it covers the whole pipeline (requests
+        in flight, the model and back-pressure from the writer) rather than a single request.
+
+        Args:
+            size (int): Number of documents in the batch.
+            finished_at (float): `time.perf_counter()` when the batch finished.
+        """
+        with self._lock:
+            previous, self._last = self._last, finished_at
+            if self.settled or size != self.size or previous is None:
+                return
+            self._documents += size
+            self._seconds += finished_at - previous
+            self._count += 1
+            if self._count < self.samples:
+                return
+
+            rate = self._documents / self._seconds if self._seconds > 0 else float("inf")
+            self.history.append((self.size, round(rate, 1)))
+            if rate > self._best_rate * (1 + self.min_gain) and self.size < self.maximum:
+                self._best_size, self._best_rate = self.size, rate
+                self.size = min(self.size * 2, self.maximum)
+            else:
+                if rate > self._best_rate:
+                    self._best_size, self._best_rate = self.size, rate
+                self.size = self._best_size
+                self.settled = True
+            self._documents, self._seconds, self._count = 0, 0.0, 0
+
+
+def _batches(records, batch_size):
+    """Group records into lists, asking `batch_size()` for the size of each new batch."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size():
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest_records(collection, records, embedding, batch_size=10, concurrency=4, tuner=None, write_batch_size=5000):
+    """
+    Embed and write records with embedding requests running concurrently with the writes.
+
+    Up to `concurrency` batches are embedded at the same time on a thread pool while a
+    writer thread upserts the finished batches into the collection, merging those that finished
+    meanwhile into one write, so neither the model nor the store waits for the other.
+
+    Args:
+        collection (chromadb.Collection): Target collection (e.g. `vectorstore._collection`).
+        records (iterable): (id, text, metadata) tuples. Consumed lazily.
+        embedding (Embeddings): Model used to embed the texts.
+        batch_size (int): Documents per embedding request when no tuner is given.
+        concurrency (int): Embedding requests in flight.
+        tuner (BatchSizeTuner): Adjusts the batch size from observed throughput.
+        write_batch_size (int): Maximum documents per collection write.
+
+    Returns:
+        dict: Documents written, elapsed seconds, documents per second and final batch size.
+    """
+    start = time.perf_counter()
+    current_size = (lambda: tuner.size) if tuner is not None else (lambda: batch_size)
+    write_queue = queue.Queue(maxsize=max(2, concurrency))
+    written = [0]
+    errors = []
+
+    def embed(batch):
+        return batch, embedding.embed_documents([text for _, text, _ in batch])
+
+    def write_batch(pending, vectors):
+        collection.upsert(
+            ids=[record_id for record_id, _, _ in pending],
+            documents=[text for _, text, _ in pending],
+            metadatas=[metadata for _, _, metadata in pending],
+            embeddings=np.asarray(vectors, dtype=np.float32),
+        )
+        written[0] += len(pending)
+
+    def write():
+        finished = False
+        while not finished:
+            # Merge whatever the embedders have finished into one write; each write has a fixed cost
+            pending, vectors = [], []
+            item = write_queue.get()
+            while True:
+                if item is None:
+                    finished = True
+                    break
+                pending.extend(item[0])
+                vectors.extend(item[1])
+                if len(pending) >= write_batch_size:
+                    break
+                try:
+                    item = write_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not pending or errors:
+                continue  # Keep draining after a failure so the producer never blocks
+            try:
+                for i in range(0, len(pending), write_batch_size):
+                    write_batch(pending[i:i + write_batch_size], vectors[i:i + write_batch_size])
+            except Exception as e:
+                errors.append(e)
+
+    def hand_off(future):
+        batch, vectors = future.result()
+        if tuner is not None:
+            tuner.record(len(batch), time.perf_counter())
+        write_queue.put((batch, vectors))
+
+    writer = threading.Thread(target=write, name="ingestion-writer", daemon=True)
+    writer.start()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            in_flight = deque()
+            for batch in _batches(records, current_size):
+                in_flight.append(executor.submit(embed, batch))
+                # Hand finished batches to the writer in submission order, keeping `concurrency` in flight
+                while len(in_flight) >= concurrency or (in_flight and in_flight[0].done()):
+                    hand_off(in_flight.popleft())
+                if errors:
+                    break
+            while in_flight:
+                hand_off(in_flight.popleft())
+    finally:
+        write_queue.put(None)
+        writer.join()
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - start
+    return {
+        "documents": written[0],
+        "seconds": round(elapsed, 2),
+        "docs_per_second": round(written[0] / elapsed, 1) if elapsed > 0 else 0.0,
+        "batch_size": current_size(),
+    }
+
+
+def normalize_title(title):
+    """Case-fold a job title and collapse its whitespace."""
+    return " ".join(str(title).split()).casefold()
+
+
+def document_id(title):
+    """
+    Return the deterministic document ID of a job title.
+
+    Titles that differ only in case or whitespace share an ID, so rebuilding the database
+    replaces a title's document instead of adding another one.
+    """
+    return hashlib.blake2b(normalize_title(title).encode(), digest_size=16).hexdigest()
+
+
+def content_hash(text, metadata):
+    """Hash the stored content of a document: its text and metadata."""
+    payload = json.dumps([text, metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class CollectionSync:
+    """
+    Brings a collection in line with a dataset, touching only what changed.
+
+    Records are checked against the collection a chunk at a time: those whose ID and content
+    hash are already stored are skipped, so only new and changed rows are embedded and
+    upserted. Only the IDs of the records seen are kept, so that duplicates can be skipped
+    and stored documents whose IDs the dataset no longer contains (removed titles, or
+    documents written before IDs were deterministic) can be deleted by `delete_stale`.
+    """
+
+    def __init__(self, collection, page_size=5000):
+        """
+        Args:
+            collection (chromadb.Collection): Collection to synchronize.
+            page_size (int): Documents looked up or listed per collection request.
+        """
+        self.collection = collection
+        self.page_size = page_size
+        self.seen = set()
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0, "duplicate": 0, "deleted": 0}
+
+    def _stored_hashes(self, record_ids):
+        page = self.collection.get(ids=record_ids, include=["metadatas"])
+        return {record_id: (metadata or {}).get(CONTENT_HASH_METADATA_KEY)
+                for record_id, metadata in zip(page["ids"], page["metadatas"])}
+
+    def changed_records(self, records):
+        """
+        Filter records down to those that need embedding, stamping their content hash.
+
+        Args:
+            records (iterable): (id, text, metadata) tuples. Consumed lazily, `page_size` at a time.
+
+        Yields:
+            tuple: (id, text, metadata) of new and changed records. Only the first record
+                of an ID is kept.
+        """
+        chunk = []
+        for record in records:
+            if record[0] in self.seen:
+                self.counts["duplicate"] += 1
+                continue
+            self.seen.add(record[0])
+            chunk.append(record)
+            if len(chunk) >= self.page_size:
+                yield from self._changed(chunk)
+                chunk = []
+        if chunk:
+            yield from self._changed(chunk)
+
+    def _changed(self, chunk):
+        existing = self._stored_hashes([record_id for record_id, _, _ in chunk])
+        for record_id, text, metadata in chunk:
+            digest = content_hash(text, metadata)
+            stored = existing.get(record_id, ())
+            if stored == digest:
+                self.counts["unchanged"] += 1
+                continue
+            self.counts["new" if stored == () else "changed"] += 1
+            yield record_id, text, {**metadata, CONTENT_HASH_METADATA_KEY: digest}
+
+    def delete_stale(self):
+        """
+        Delete stored documents that were not among the records. Call after ingestion.
+
+        Returns:
+            int: Number of documents deleted.
+        """
+        # List every page before deleting, since deletions would shift the offsets
+        stale = []
+        for offset in range(0, self.collection.count(), self.page_size):
+            page = self.collection.get(include=[], limit=self.page_size, offset=offset)
+            stale.extend(record_id for record_id in page["ids"] if record_id not in self.seen)
+        for i in range(0, len(stale), self.page_size):
+            self.collection.delete(ids=stale[i:i + self.page_size])
+        self.counts["deleted"] = len(stale)
+        return len(stale)
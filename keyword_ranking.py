@@ -0,0 +1,83 @@
+import functools
+import heapq
+
+from config_loader import load_config
+from token_counter import count_tokens
+
+
+def top_keywords(scores, n):
+    """
+    Select the n highest-scoring keywords with a heap.
+
+    Args:
+        scores (dict): Keyword -> score. Ties keep the dictionary's order, so insert nearer hits first.
+        n (int): Number of keywords to keep; None or 0 keeps them all.
+
+    Returns:
+        list: The selected keywords, best first.
+    """
+    if not n:
+        return sorted(scores, key=scores.get, reverse=True)
+    return heapq.nlargest(n, scores, key=scores.get)
+
+
+def score_keywords(keyword_lists, relevances, canonicalize=None):
+    """
+    Score keywords by similarity-weighted frequency across search hits.
+
+    A keyword's score is the sum of the relevance scores of the hits that list it, so a skill
+    shared by many close titles outranks one that a single distant title mentions.
+
+    Args:
+        keyword_lists (list): Keyword list of each hit, nearest hit first.
+        relevances (list): Relevance score `1 / (1 + distance)` of each hit.
+        canonicalize (callable): Maps a keyword list to distinct canonical keywords.
+
+    Returns:
+        dict: Keyword -> score, in first-seen order.
+    """
+    scores = {}
+    for keywords, relevance in zip(keyword_lists, relevances):
+        # A skill listed twice by one hit (e.g. two spellings) counts once for that hit
+        keywords = canonicalize(keywords) if canonicalize is not None else dict.fromkeys(keywords)
+        for keyword in keywords:
+            scores[keyword] = scores.get(keyword, 0.0) + float(relevance)
+    return scores
+
+
+def fit_to_token_budget(keywords, max_tokens, model="gpt-3.5-turbo", separator=", "):
+    """
+    Keep the longest prefix of a keyword list whose joined string fits a token budget.
+
+    Args:
+        keywords (list): Keywords, most important first.
+        max_tokens (int): Token budget for the joined string; None keeps every keyword.
+        model (str): Model whose tokenizer measures the tokens.
+        separator (str): String the keywords are joined with.
+
+    Returns:
+        list: The keywords that fit.
+    """
+    if max_tokens is None:
+        return list(keywords)
+    kept, used = [], 0
+    for keyword in keywords:
+        # Tokens rarely span the separator, so per-keyword counts add up to the joined string's count
+        cost = count_tokens(keyword if not kept else separator + keyword, model)
+        if used + cost > max_tokens:
+            break
+        kept.append(keyword)
+        used += cost
+    return kept
+
+
+@functools.lru_cache(maxsize=None)
+def prompt_settings(config_file="config.yml"):
+    """
+    Read the keyword selection settings once per process.
+
+    Returns:
+        tuple: Maximum number of retrieved keywords and the prompt token budget (None if 0).
+    """
+    settings = load_config(config_file)['settings']
+    return settings['max_prompt_keywords'], settings['prompt_token_budget'] or None
@@ -0,0 +1,157 @@
+import ast
+import json
+import os
+
+import numpy as np
+
+# Metadata schema shared by build_job_skills_database.py (writer) and the retrieval code (reader)
+KEYWORDS_METADATA_KEY = "trending_keywords"
+KEYWORD_IDS_METADATA_KEY = "keyword_ids"
+LEGACY_KEYWORDS_METADATA_KEYS = ("Trending Skills",)
+
+
+def parse_keywords(value):
+    """
+    Parse a stored keyword list without evaluating arbitrary code.
+
+    Args:
+        value (str | list): A Python list repr such as "['SQL', 'Python']", or an already parsed list.
+
+    Returns:
+        list: The keywords, or an empty list if the value cannot be parsed.
+    """
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    try:
+        parsed = ast.literal_eval(value or "[]")
+    except (ValueError, SyntaxError):
+        return []
+    return list(parsed) if isinstance(parsed, (list, tuple, set)) else []
+
+
+def metadata_keywords(metadata):
+    """
+    Read the keyword list of a stored row, accepting the legacy metadata key.
+
+    Args:
+        metadata (dict): Metadata of one row of the collection.
+
+    Returns:
+        list: The row's keywords.
+    """
+    metadata = metadata or {}
+    for key in (KEYWORDS_METADATA_KEY, *LEGACY_KEYWORDS_METADATA_KEYS):
+        if key in metadata:
+            return parse_keywords(metadata[key])
+    return []
+
+
+def encode_ids(ids):
+    """Serialize keyword IDs for a Chroma metadata field, which only accepts scalars."""
+    return ",".join(str(i) for i in ids)
+
+
+def decode_ids(value):
+    """Parse keyword IDs written by `encode_ids`."""
+    if not value:
+        return np.empty(0, dtype=np.int32)
+    return np.array(value.split(","), dtype=np.int32)
+
+
+class KeywordVocabulary:
+    """
+    Interned keyword table: each distinct skill string gets a stable integer ID.
+
+    The vocabulary is built when the collection is ingested and saved next to it, so the
+    retrieval side can merge keyword sets as integer arrays instead of parsing strings.
+    """
+
+    def __init__(self, keywords=None):
+        """
+        Args:
+            keywords (list): Keywords in ID order, e.g. as loaded from a saved vocabulary.
+        """
+        self.keywords = []
+        self.ids = {}
+        self._array = None
+        for keyword in keywords or []:
+            self.intern(keyword)
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def intern(self, keyword):
+        """
+        Return the ID of a keyword, assigning the next free ID if it is new.
+
+        Args:
+            keyword (str): The keyword to intern.
+
+        Returns:
+            int: The keyword's ID.
+        """
+        keyword = keyword.strip()
+        keyword_id = self.ids.get(keyword)
+        if keyword_id is None:
+            keyword_id = len(self.keywords)
+            self.ids[keyword] = keyword_id
+            self.keywords.append(keyword)
+            self._array = None
+        return keyword_id
+
+    def encode(self, keywords):
+        """
+        Intern a list of keywords.
+
+        Args:
+            keywords (list): Keyword strings.
+
+        Returns:
+            list: Their IDs, without duplicates, in first-seen order.
+        """
+        ids = []
+        for keyword in keywords:
+            if not isinstance(keyword, str) or not keyword.strip():
+                continue
+            keyword_id = self.intern(keyword)
+            if keyword_id not in ids:
+                ids.append(keyword_id)
+        return ids
+
+    def decode(self, ids):
+        """
+        Map keyword IDs back to strings.
+
+        Args:
+            ids (array-like): Keyword IDs.
+
+        Returns:
+            list: The keyword strings.
+        """
+        if self._array is None:
+            self._array = np.array(self.keywords, dtype=object)
+        return self._array[np.asarray(ids, dtype=np.int64)].tolist()
+
+    def save(self, path):
+        """Write the vocabulary to a JSON file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump({"keywords": self.keywords}, file, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a vocabulary written by `save`.
+
+        Args:
+            path (str): Path of the vocabulary JSON file.
+
+        Returns:
+            KeywordVocabulary: The loaded vocabulary, or an empty one if the file does not exist.
+        """
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path, "r") as file:
+            return cls(json.load(file)["keywords"])
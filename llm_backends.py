@@ -0,0 +1,165 @@
+import os
+import socket
+import threading
+from urllib.parse import urlparse
+
+
+def get_api_key():
+    """
+    Read the OpenAI API key from the OPENAI_API_KEY environment variable, falling back to config.py.
+
+    Returns:
+        str: The API key, or None if neither is set.
+    """
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if api_key:
+        return api_key
+    try:
+        from config import open_ai_api_key  # Legacy location of the key
+        return open_ai_api_key
+    except ImportError:
+        return None
+
+
+class OpenAIBackend:
+    """
+    Chat completions from the OpenAI API, or from any OpenAI-compatible server given its `base_url`.
+
+    Every backend speaks the chat completions protocol, so `chat_gpt`, streaming and the async
+    pipeline work unchanged whichever one is selected.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url=None, timeout=60.0, max_retries=2):
+        """
+        Args:
+            base_url (str): API root such as "http://localhost:8000/v1". None uses OPENAI_BASE_URL or api.openai.com.
+            timeout (float): Seconds before a request times out.
+            max_retries (int): Retries done by the OpenAI client itself.
+        """
+        self.base_url = base_url or None
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+    def api_key(self):
+        """Return the API key sent with every request."""
+        return get_api_key()
+
+    def client(self):
+        """
+        Create a synchronous client.
+
+        Returns:
+            OpenAI: An initialized OpenAI client instance.
+        """
+        from openai import OpenAI
+
+        return OpenAI(api_key=self.api_key(), base_url=self.base_url, timeout=self.timeout,
+                      max_retries=self.max_retries)
+
+    def async_client(self):
+        """
+        Create an asynchronous client, for the ASGI app.
+
+        Returns:
+            AsyncOpenAI: An initialized AsyncOpenAI client instance.
+        """
+        from openai import AsyncOpenAI, DefaultAioHttpClient
+
+        try:
+            # The aiohttp transport (openai[aiohttp]) scales better than httpx with hundreds of open connections
+            http_client = DefaultAioHttpClient()
+        except RuntimeError:
+            http_client = None
+        return AsyncOpenAI(api_key=self.api_key(), base_url=self.base_url, timeout=self.timeout,
+                           max_retries=self.max_retries, http_client=http_client)
+
+
+class MockLLMBackend(OpenAIBackend):
+    """
+    The local mock server in mock_llm_server.py: no cost, no network and no API key.
+
+    With `autostart`, a server is started in this process the first time a client is created,
+    unless one already listens at `base_url`. Run `python mock_llm_server.py` separately for load
+    tests, so the server does not compete with the code under test for the GIL.
+    """
+
+    name = "mock"
+
+    def __init__(self, base_url="http://127.0.0.1:8001/v1", autostart=True, server_options=None,
+                 timeout=60.0, max_retries=2):
+        """
+        Args:
+            base_url (str): API root of the mock server.
+            autostart (bool): Start a server in this process if none is listening.
+            server_options (dict): Keyword arguments of `start_mock_server` (latency, error rates, ...).
+            timeout (float): Seconds before a request times out.
+            max_retries (int): Retries done by the OpenAI client itself.
+        """
+        super().__init__(base_url, timeout, max_retries)
+        self.autostart = autostart
+        self.server_options = server_options or {}
+        self.server = None
+        self._lock = threading.Lock()
+
+    def api_key(self):
+        return "mock"
+
+    def ensure_server(self):
+        """Start the in-process mock server if autostart is on and nothing listens at `base_url`."""
+        url = urlparse(self.base_url)
+        with self._lock:
+            if self.server is not None or not self.autostart:
+                return
+            try:
+                socket.create_connection((url.hostname, url.port), timeout=0.5).close()
+                return
+            except OSError:
+                pass
+            from mock_llm_server import start_mock_server
+
+            self.server = start_mock_server(url.hostname, url.port, **self.server_options)
+
+    def client(self):
+        self.ensure_server()
+        return super().client()
+
+    def async_client(self):
+        self.ensure_server()
+        return super().async_client()
+
+
+LLM_BACKENDS = {"openai": OpenAIBackend, "mock": MockLLMBackend}
+
+
+def create_llm_backend(config):
+    """
+    Build the LLM backend selected in config.yml.
+
+    Args:
+        config (dict): Loaded configuration; reads the `llm` block.
+
+    Returns:
+        OpenAIBackend | MockLLMBackend: The backend.
+    """
+    llm = config['llm']
+    backend = llm['backend']
+    if backend == "mock":
+        return MockLLMBackend(
+            base_url=llm['mock_url'],
+            autostart=llm['mock_autostart'],
+            server_options={
+                "latency": llm['mock_latency'],
+                "distribution": llm['mock_latency_distribution'],
+                "latency_sigma": llm['mock_latency_sigma'],
+                "error_rate": llm['mock_error_rate'],
+                "rate_limit_rate": llm['mock_rate_limit_rate'],
+                "seed": llm['mock_seed'],
+                "prompt_token_latency": llm['mock_prompt_token_latency'],
+            },
+            timeout=llm['timeout'],
+        )
+    if backend != "openai":
+        raise ValueError(f"Unknown LLM backend {backend!r}; expected one of {sorted(LLM_BACKENDS)}")
+    return OpenAIBackend(base_url=llm['base_url'], timeout=llm['timeout'])
@@ -1,21 +1,22 @@
-from flask import Flask, render_template, request, jsonify
-from langchain_community.embeddings.ollama import OllamaEmbeddings
-from langchain_chroma import Chroma
-from langchain.schema import Document
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 import time
-from config_loader import load_config
-from utils import get_vectorstore, get_client, retrieve_skills_from_chroma, generate_profile, chat_gpt
+from metrics import PROFILE_CACHE_REQUESTS, REGISTRY, REQUEST_SECONDS, StageTimer
+from services import Services
+from utils import retrieve_skills_from_chroma, generate_profile, generate_profile_events, format_sse
 
 # Initialize Flask app
 app = Flask(__name__)
-# Load configuration
-config = load_config("config.yml")
-embedding_model = config['settings']['embedding_model']
-persist_directory = config['paths']['persist_directory']
-
-# Initialize Chroma vectorstore
-vectorstore = get_vectorstore()
-client = get_client()
+# Services (vector store, skills index, LLM client) are built lazily or during warm-up,
+# so importing this module only reads the configuration
+services = Services("config.yml")
+config = services.config
+# Cache of generated profiles; identical concurrent requests share one LLM call
+profile_cache = services.profile_cache
+
+@app.before_request
+def start_services():
+    """Warm up on the first request when the server did not (`flask run`, waitress, uwsgi)."""
+    services.ensure_warm_up()
 
 @app.route('/')
 def home():
@@ -57,13 +58,19 @@ def generate_user_profile():
     try:
         user_input = request.json
         start_time = time.time()
-        profile = generate_profile(user_input, vectorstore, client)
+        timings = StageTimer()
+        profile, cache_status = profile_cache.get_or_compute(
+            user_input, lambda: generate_profile(user_input, services.skills_index, services.client, timings))
         end_time = time.time()
+        PROFILE_CACHE_REQUESTS.inc(cache_status)
+        REQUEST_SECONDS.observe(end_time - start_time, "generate-profile")
 
         response = {
             "profile": profile,
             "stats": {
-                "time_taken": round(end_time - start_time, 2)
+                "time_taken": round(end_time - start_time, 2),
+                "stages_ms": timings.as_dict(),
+                "cache": profile_cache.stats(cache_status)
             }
         }
         print("Response being sent:", response)
@@ -71,66 +78,90 @@ def generate_user_profile():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/generate-profile/stream', methods=['POST'])
+def generate_user_profile_stream():
+    """
+    API endpoint to generate a professional profile as server-sent events.
+
+    Sends `retrieval` as soon as keywords are retrieved, `token` for each LLM delta,
+    then `profile` with the same `profile`/`stats` body as /api/generate-profile.
+    """
+    user_input = request.json
+    start_time = time.time()
+
+    def event_stream():
+        # Not single-flight: each client gets its own token stream; the finished profile still fills the cache
+        try:
+            cached_profile = profile_cache.get(user_input)
+            if cached_profile is not None:
+                PROFILE_CACHE_REQUESTS.inc("hit")
+                REQUEST_SECONDS.observe(time.time() - start_time, "generate-profile-stream")
+                stats = {"time_taken": round(time.time() - start_time, 2), "cache": profile_cache.stats("hit")}
+                yield format_sse("profile", {"profile": cached_profile, "stats": stats})
+                return
+
+            timings = StageTimer()
+            for event, data in generate_profile_events(
+                    user_input, services.skills_index, services.client, timings):
+                if event == "retrieval":
+                    data["stats"] = {"time_taken": round(time.time() - start_time, 2)}
+                elif event == "profile":
+                    profile_cache.put(user_input, data)
+                    PROFILE_CACHE_REQUESTS.inc("miss")
+                    REQUEST_SECONDS.observe(time.time() - start_time, "generate-profile-stream")
+                    stats = {
+                        "time_taken": round(time.time() - start_time, 2),
+                        "stages_ms": timings.as_dict(),
+                        "cache": profile_cache.stats("miss"),
+                    }
+                    data = {"profile": data, "stats": stats}
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"error": str(e)})
+
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.route('/api/retrieve-skills', methods=['POST'])
 def retrieve_skills():
     """API endpoint to retrieve trending skills."""
     try:
         profession = request.json.get("profession")
         keywords = retrieve_skills_from_chroma(
-            profession, vectorstore, threshold = 1e-2)
+            profession, services.skills_index, threshold = 1e-2)
         return jsonify({"keywords": keywords})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/health-check', methods=['GET'])
-def health_check():
-    """API endpoint to check the health of the system."""
-    try:
-        health_status = {}
-
-        # Check vector store health
-        try:
-            vectorstore_test_query = vectorstore.similarity_search("Machine Learning Engineer", k=1)
-            health_status["vector_store"] = {
-                "status": "healthy",
-                "message": f"Vector store contains {len(vectorstore_test_query)} results for test query."
-            }
-        except Exception as e:
-            health_status["vector_store"] = {
-                "status": "unhealthy",
-                "message": str(e)
-            }
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics of this process: per-stage latency histograms and pipeline counters."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
-        # Check model availability
-        try:
-            prompt = "Test prompt for model health check."
-            model_response = chat_gpt(prompt, client)
-            health_status["model"] = {
-                "status": "healthy",
-                "message": "Model responded successfully."
-            }
-        except Exception as e:
-            health_status["model"] = {
-                "status": "unhealthy",
-                "message": str(e)
-            }
+@app.route('/api/health/live', methods=['GET'])
+def health_live():
+    """Liveness probe: answers as long as the process can serve requests."""
+    return jsonify({"status": "alive"}), 200
 
-        # Check configuration
-        try:
-            config_check = load_config()
-            health_status["configuration"] = {
-                "status": "healthy",
-                "message": "Configuration loaded successfully."
-            }
-        except Exception as e:
-            health_status["configuration"] = {
-                "status": "unhealthy",
-                "message": str(e)
-            }
+@app.route('/api/health/ready', methods=['GET'])
+def health_ready():
+    """Readiness probe: serves the cached dependency status, 503 until every dependency is healthy."""
+    ready = services.is_ready()
+    response = {"ready": ready, "health": services.health_status(), "startup": services.startup_report()}
+    return jsonify(response), 200 if ready else 503
 
-        return jsonify({"health": health_status}), 200
+@app.route('/api/health-check', methods=['GET'])
+def health_check():
+    """API endpoint to check the health of the system, served from the background probes."""
+    try:
+        return jsonify({"health": services.health_status()}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
+    # Accept requests right away; the first requests that need a service wait for the warm-up
+    services.warm_up(background=config['settings']['warm_up_in_background'])
     app.run(debug=True)
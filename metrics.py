@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Stages of the profile pipeline, in execution order
+STAGES = ("embed", "vector_search", "keyword_merge", "fallback_scrape", "prompt_build", "llm_call", "json_parse")
+
+# Latency buckets in seconds, from sub-millisecond in-memory work up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by label values."""
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        # An unlabelled counter is exported as 0 before its first increment
+        self._values = {} if self.labels else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        """Add `amount` to the series of the given label values."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        """Return the exposition lines of this counter."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values, optionally split by label values."""
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """Record one observation for the given label values."""
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        """Return the exposition lines of this histogram."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    labels = _format_labels(self.labels, label_values, [("le", bound)])
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labels, label_values, [("le", "+Inf")])
+                lines.append(f"{self.name}_bucket{labels} {series['count']}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {series['sum']}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics of one process, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, documentation, labels=()):
+        """Create and register a counter."""
+        metric = Counter(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        """Create and register a histogram."""
+        metric = Histogram(name, documentation, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Render every metric.
+
+        Returns:
+            str: The exposition text served at /metrics.
+        """
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram(
+    "profile_stage_seconds", "Time spent in each stage of profile generation.", labels=("stage",))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "profile_request_seconds", "End-to-end profile request latency.", labels=("endpoint",))
+PROFILE_CACHE_REQUESTS = REGISTRY.counter(
+    "profile_cache_requests_total", "Profile requests by cache outcome (hit, miss, coalesced).", labels=("status",))
+EMBEDDING_CACHE_LOOKUPS = REGISTRY.counter(
+    "embedding_cache_lookups_total", "Query embedding lookups by outcome (memory, disk, miss).", labels=("tier",))
+FALLBACKS = REGISTRY.counter(
+    "keyword_fallbacks_total", "Requests that fell back to scraping trending keywords.")
+JSON_PARSE_FAILURES = REGISTRY.counter(
+    "llm_json_parse_failures_total", "LLM completions that were not valid JSON.")
+LLM_ERRORS = REGISTRY.counter(
+    "llm_errors_total", "Failed LLM calls.")
+LLM_RETRIES = REGISTRY.counter(
+    "llm_retries_total", "LLM calls retried after a transient error.")
+
+
+class StageTimer:
+    """
+    Wall-clock time of each pipeline stage within one request.
+
+    Every timed stage is also recorded in the `profile_stage_seconds` histogram.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        """Add an already measured duration to stage `name`."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        STAGE_SECONDS.observe(seconds, name)
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: Milliseconds spent in each stage that ran, in pipeline order.
+        """
+        order = {name: i for i, name in enumerate(STAGES)}
+        return {
+            name: round(seconds * 1000, 2)
+            for name, seconds in sorted(self.stages.items(), key=lambda item: order.get(item[0], len(order)))
+        }
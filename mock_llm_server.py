@@ -0,0 +1,295 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+# Canned completion following the JSON schema requested by utils.create_prompt
+CANNED_PROFILE = {
+    "elevator_pitch": "I am a results-driven professional who turns complex problems into reliable, well-engineered solutions.",
+    "About Me": "I combine hands-on technical depth with clear communication to deliver measurable impact for my team and customers.",
+    "retrieved_keywords": ["Problem solving", "Python", "Communication"],
+    "reason": "The content reflects the requested profession and the provided keywords without inventing personal history.",
+}
+
+_PROFESSION = re.compile(r"'About Me' section for (.+?)\. The individual is an? (.+?) professional")
+_KEYWORDS = re.compile(r"keywords such as (.+?)(?: to enhance the relevance\.|\. Do not invent)", re.S)
+
+
+def profile_completion(prompt):
+    """
+    Build a profile completion for a `create_prompt` prompt.
+
+    The profession, experience level and first keywords of the prompt are filled into the
+    canned profile, so downstream parsing and evaluation see realistic, prompt-dependent output.
+
+    Args:
+        prompt (str): The user message.
+
+    Returns:
+        dict: A profile with the keys `create_prompt` asks for.
+    """
+    profession = _PROFESSION.search(prompt)
+    keywords = _KEYWORDS.search(prompt)
+    if not profession:
+        return CANNED_PROFILE
+    title, level = profession.groups()
+    keywords = [k.strip() for k in keywords.group(1).split(",") if k.strip()] if keywords else []
+    return {
+        "elevator_pitch": f"I am a {level} {title} who turns complex problems into reliable, well-engineered solutions.",
+        "About Me": f"As a {level} {title}, I combine hands-on depth in {', '.join(keywords[:3]) or 'my field'} "
+                    f"with clear communication to deliver measurable impact for my team and customers.",
+        "retrieved_keywords": keywords[:10],
+        "reason": CANNED_PROFILE["reason"],
+    }
+
+
+def evaluation_completion(prompt):
+    """
+    Build a judge completion for an evaluation prompt, with scores derived from the prompt hash.
+
+    Args:
+        prompt (str): The user message.
+
+    Returns:
+        dict: An evaluation in the format evaluate_social_profile_upgrade.py asks for.
+    """
+    digest = hashlib.blake2b(prompt.encode(), digest_size=4).digest()
+    scores = [60 + byte % 40 for byte in digest]
+    return {
+        "evaluation": dict(zip(("keywords_quality", "relevance", "hallucination", "overall_quality"), scores)),
+        "explanation": "Mock evaluation: scores are derived from the prompt, not judged.",
+    }
+
+
+def completion_for(messages):
+    """Return the completion text for a chat request: an evaluation or a profile, as JSON."""
+    prompt = "\n".join(str(message.get("content", "")) for message in messages or [])
+    if "expert evaluator" in prompt:
+        return json.dumps(evaluation_completion(prompt))
+    return json.dumps(profile_completion(prompt))
+
+
+def approximate_tokens(text):
+    """Approximate token count (about four characters per token), for the usage block."""
+    return max(1, len(text) // 4)
+
+
+class LatencyModel:
+    """
+    Seeded sampler of completion latencies.
+
+    Every distribution has mean `mean`: `uniform` draws from [0, 2 * mean], `exponential` has
+    rate 1 / mean and `lognormal` has shape `sigma`, so a larger sigma means a heavier tail at
+    the same mean.
+    """
+
+    def __init__(self, distribution="constant", mean=1.0, sigma=0.5, seed=0):
+        """
+        Args:
+            distribution (str): One of LATENCY_DISTRIBUTIONS.
+            mean (float): Mean latency in seconds.
+            sigma (float): Shape of the lognormal distribution.
+            seed (int): Random seed.
+        """
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}; expected one of {LATENCY_DISTRIBUTIONS}")
+        self.distribution = distribution
+        self.mean = mean
+        self.sigma = sigma
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """Draw one latency in seconds."""
+        if self.mean <= 0 or self.distribution == "constant":
+            return max(0.0, self.mean)
+        with self._lock:
+            if self.distribution == "uniform":
+                return self._random.uniform(0, 2 * self.mean)
+            if self.distribution == "exponential":
+                return self._random.expovariate(1 / self.mean)
+            # exp(N(mu, sigma)) has mean exp(mu + sigma^2 / 2)
+            return self._random.lognormvariate(math.log(self.mean) - self.sigma ** 2 / 2, self.sigma)
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Handler for a minimal OpenAI-compatible chat completions endpoint."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "gpt-3.5-turbo", "object": "model"}]})
+        elif "/models/" in self.path:
+            model = self.path.rstrip("/").rsplit("/", 1)[-1]
+            self._send_json(200, {"id": model, "object": "model", "created": 0, "owned_by": "mock"})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        # Injected failures answer at once, like a real rate limiter or overloaded gateway
+        outcome = self.server.draw_outcome()
+        if outcome == "rate_limit":
+            self._send_json(429, {"error": {"message": "Mock rate limit reached", "type": "rate_limit_error"}},
+                            headers={"Retry-After": f"{self.server.retry_after:g}"})
+            return
+        if outcome == "error":
+            self._send_json(500, {"error": {"message": "Mock server error", "type": "server_error"}})
+            return
+
+        prompt_tokens = approximate_tokens(json.dumps(request.get("messages")))
+        # Longer prompts take longer to process, as with a real model's prefill
+        time.sleep(self.server.latency.sample() + prompt_tokens * self.server.prompt_token_latency)
+        content = completion_for(request.get("messages"))
+        if request.get("stream"):
+            self._stream_completion(request, content)
+            return
+        completion_tokens = approximate_tokens(content)
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+
+    def _stream_completion(self, request, content):
+        """Send a completion as OpenAI-style server-sent event chunks."""
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+        for index, piece in enumerate(pieces):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": piece},
+                    "finish_reason": "stop" if index == len(pieces) - 1 else None,
+                }],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.server.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog large enough for load tests."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def draw_outcome(self):
+        """Decide whether the next completion succeeds, is rate limited or fails, from the seeded generator."""
+        with self.outcome_lock:
+            draw = self.outcome_random.random()
+        if draw < self.rate_limit_rate:
+            return "rate_limit"
+        if draw < self.rate_limit_rate + self.error_rate:
+            return "error"
+        return "ok"
+
+
+def start_mock_server(host="127.0.0.1", port=0, latency=1.0, token_delay=0.02, distribution="constant",
+                      latency_sigma=0.5, error_rate=0.0, rate_limit_rate=0.0, retry_after=1.0, seed=0,
+                      prompt_token_latency=0.0):
+    """
+    Start the mock LLM server in a background thread.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind; 0 picks a free port.
+        latency (float): Mean seconds to wait before answering each completion.
+        token_delay (float): Seconds between chunks of a streamed completion.
+        distribution (str): Latency distribution, one of LATENCY_DISTRIBUTIONS.
+        latency_sigma (float): Shape of the lognormal latency distribution.
+        error_rate (float): Fraction of completions answered with a 500 error.
+        rate_limit_rate (float): Fraction of completions answered with a 429 and `Retry-After`.
+        retry_after (float): Seconds sent in `Retry-After`.
+        seed (int): Seed of the latency and failure draws, so runs are repeatable.
+        prompt_token_latency (float): Extra seconds per (approximate) prompt token.
+
+    Returns:
+        MockLLMServer: The running server. Its base URL is `http://host:port/v1`.
+    """
+    server = MockLLMServer((host, port), MockLLMHandler)
+    server.latency = LatencyModel(distribution, latency, latency_sigma, seed)
+    server.token_delay = token_delay
+    server.prompt_token_latency = prompt_token_latency
+    server.error_rate = error_rate
+    server.rate_limit_rate = rate_limit_rate
+    server.retry_after = retry_after
+    server.outcome_random = random.Random(seed + 1)
+    server.outcome_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=1.0, help="Mean seconds per completion.")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="constant",
+                        help="Distribution of completion latencies.")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Shape of the lognormal distribution.")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed chunks.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of completions failing with 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of completions answered with 429.")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s.")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0, help="Extra seconds per prompt token.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_mock_server(args.host, args.port, args.latency, args.token_delay, args.distribution,
+                               args.latency_sigma, args.error_rate, args.rate_limit_rate, args.retry_after, args.seed,
+                               args.prompt_token_latency)
+    print(f"Mock LLM server listening on http://{args.host}:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
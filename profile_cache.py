@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def _normalize(text):
+    """Collapse whitespace and fold case."""
+    return re.sub(r"\s+", " ", str(text or "")).strip().casefold()
+
+
+def canonical_profile_key(user_input):
+    """
+    Build the cache key of a profile request.
+
+    Requests that only differ in keyword order, whitespace or letter case map to the same key.
+
+    Args:
+        user_input (dict): Profile request with `profession`, `experience_level`, `keywords`,
+            `background` and `similarity_score_input`.
+
+    Returns:
+        str: A SHA-256 hex digest identifying the request.
+    """
+    keywords = user_input.get("keywords", []) or []
+    if isinstance(keywords, str):
+        keywords = keywords.split(",")
+    background = _normalize(user_input.get("background", ""))
+    canonical = {
+        "profession": _normalize(user_input.get("profession", "a professional")),
+        "experience_level": _normalize(user_input.get("experience_level", "mid-level")),
+        "keywords": sorted({_normalize(keyword) for keyword in keywords if _normalize(keyword)}),
+        # The threshold is derived from the integer similarity score, so that integer is the bucket
+        "threshold_bucket": int(user_input.get("similarity_score_input", 50)),
+        "background_hash": hashlib.sha256(background.encode()).hexdigest(),
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+class _InFlight:
+    """A computation other identical requests can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class _LeaderCancelled(Exception):
+    """The request computing a profile was cancelled; the requests waiting on it compute it again."""
+
+
+class ProfileCache:
+    """
+    TTL + LRU cache of generated profiles with single-flight de-duplication.
+
+    Identical requests that arrive while the first one is still being generated wait for
+    its result instead of starting their own LLM call. Only successful profiles are cached.
+    Streamed requests are not coalesced, since every client expects its own token stream;
+    they only read and fill the cache through `get` and `put`.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600):
+        """
+        Args:
+            max_entries (int): Maximum number of cached profiles.
+            ttl_seconds (float): Seconds a cached profile stays valid.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._async_inflight = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        """Return a valid cached value or None. Must be called with the lock held."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key, value):
+        """Cache a successful profile, evicting the least recently used entries. Must be called with the lock held."""
+        if not isinstance(value, dict) or "error" in value:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, user_input):
+        """
+        Look up a cached profile without computing it.
+
+        Args:
+            user_input (dict): Profile request.
+
+        Returns:
+            dict: The cached profile, or None.
+        """
+        key = canonical_profile_key(user_input)
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+            return value
+
+    def put(self, user_input, value):
+        """
+        Cache a profile computed outside `get_or_compute` (e.g. by the streaming endpoint).
+
+        Args:
+            user_input (dict): Profile request.
+            value (dict): Generated profile.
+        """
+        key = canonical_profile_key(user_input)
+        with self._lock:
+            self.misses += 1
+            self._store(key, value)
+
+    def get_or_compute(self, user_input, compute):
+        """
+        Return the cached profile for a request, computing it at most once across concurrent callers.
+
+        Args:
+            user_input (dict): Profile request.
+            compute (callable): Zero-argument function generating the profile on a miss.
+
+        Returns:
+            tuple: The profile and how it was served: "hit", "miss" or "coalesced".
+        """
+        key = canonical_profile_key(user_input)
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value, "hit"
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, "coalesced"
+
+        try:
+            call.value = compute()
+            with self._lock:
+                self._store(key, call.value)
+            return call.value, "miss"
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    async def get_or_compute_async(self, user_input, compute):
+        """
+        Asynchronous counterpart of `get_or_compute` for the ASGI app.
+
+        Args:
+            user_input (dict): Profile request.
+            compute (callable): Zero-argument coroutine function generating the profile on a miss.
+
+        Returns:
+            tuple: The profile and how it was served: "hit", "miss" or "coalesced".
+        """
+        key = canonical_profile_key(user_input)
+        while True:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not None:
+                    self.hits += 1
+                    return value, "hit"
+                future = self._async_inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._async_inflight[key] = asyncio.get_running_loop().create_future()
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                break
+            try:
+                return await asyncio.shield(future), "coalesced"
+            except _LeaderCancelled:
+                # The leader's client went away; this request is still alive, so elect a new leader
+                continue
+
+        try:
+            value = await compute()
+            with self._lock:
+                self._store(key, value)
+            future.set_result(value)
+            return value, "miss"
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()  # Mark as retrieved when no other request was waiting
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved when no other request was waiting
+            raise
+        finally:
+            with self._lock:
+                del self._async_inflight[key]
+
+    def stats(self, status=None):
+        """
+        Report cache state for the `stats` block of a response.
+
+        Args:
+            status (str): How the current request was served, if any.
+
+        Returns:
+            dict: Counters, hit rate and current size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            stats = {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+        if status is not None:
+            stats["status"] = status
+        return stats
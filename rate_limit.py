@@ -0,0 +1,182 @@
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows `rate` acquisitions per second on average, with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of stored tokens. Defaults to `rate` (one second of burst).
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self, tokens=1):
+        """
+        Block until `tokens` tokens are available, then take them.
+
+        Args:
+            tokens (float): Number of tokens to take; more than `capacity` takes a full bucket.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        # A request larger than the bucket could never be served; let it drain the whole bucket instead
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = max(self._paused_until - now, (tokens - self._tokens) / self.rate)
+            time.sleep(wait)
+            waited += wait
+
+    def try_acquire(self, tokens=1):
+        """
+        Take `tokens` tokens if they are available, without waiting.
+
+        Returns:
+            bool: Whether the tokens were taken.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._paused_until and self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def pause(self, seconds):
+        """Hand out no tokens for the next `seconds`, e.g. after the server asked us to back off."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            # Resume with an empty bucket instead of a burst
+            self._tokens = 0.0
+            self._updated = max(now, self._paused_until)
+
+
+class HostRateLimiter:
+    """One token bucket per host, so requests to different hosts do not throttle each other."""
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate (float): Requests per second allowed for each host.
+            capacity (float): Burst size for each host.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url):
+        """Return the token bucket of the host of `url`."""
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.capacity)
+            return bucket
+
+    def acquire(self, url):
+        """Block until a request to the host of `url` is allowed. Returns the seconds waited."""
+        return self.bucket(url).acquire()
+
+    def pause(self, url, seconds):
+        """Stop handing out tokens for the host of `url` for `seconds`."""
+        self.bucket(url).pause(seconds)
+
+
+class RequestTokenLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits of an LLM API, enforced client-side.
+
+    Each call takes one request token and an estimate of the tokens it will use: the prompt
+    plus `completion_tokens` expected in the completion. Both buckets hold ten seconds of
+    budget, so a burst cannot use up a minute's allowance at once.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, completion_tokens=500):
+        """
+        Args:
+            requests_per_minute (float): Requests allowed per minute.
+            tokens_per_minute (float): Prompt and completion tokens allowed per minute.
+            completion_tokens (int): Tokens charged for each completion, before it is known.
+        """
+        self.requests = TokenBucket(requests_per_minute / 60, capacity=max(1, requests_per_minute / 6))
+        self.tokens = TokenBucket(tokens_per_minute / 60, capacity=tokens_per_minute / 6)
+        self.completion_tokens = completion_tokens
+
+    def acquire(self, prompt_tokens):
+        """
+        Block until one more request of `prompt_tokens` tokens fits within both limits.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        return self.requests.acquire() + self.tokens.acquire(prompt_tokens + self.completion_tokens)
+
+    def pause(self, seconds):
+        """Send no requests for the next `seconds`, e.g. after a 429 response."""
+        self.requests.pause(seconds)
+        self.tokens.pause(seconds)
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt (int): Zero-based retry attempt.
+        base (float): Delay scale in seconds.
+        cap (float): Maximum delay in seconds.
+
+    Returns:
+        float: Seconds to wait, uniformly drawn from [0, min(cap, base * 2 ** attempt)].
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def parse_retry_after(value):
+    """
+    Parse a `Retry-After` header.
+
+    Args:
+        value (str): Either a number of seconds or an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,48 @@
+import os
+
+# File name prefixes of the per-record JSON files; the rest of the name is the record ID
+INPUT_PREFIX = "user_input_"
+PROFILE_PREFIX = "profile_"
+EVALUATION_PREFIX = "evaluation_user_input_"
+
+
+def record_file_name(prefix, record_id):
+    """Return the JSON file name of a record, e.g. `profile_007.json`."""
+    return f"{prefix}{record_id}.json"
+
+
+def record_id(file_name, prefix):
+    """
+    Extract the record ID from a record file name.
+
+    Args:
+        file_name (str): File name such as "user_input_007.json".
+        prefix (str): Expected prefix, e.g. INPUT_PREFIX.
+
+    Returns:
+        str: The record ID ("007"), or None if the name does not match the prefix.
+    """
+    if not file_name.startswith(prefix) or not file_name.endswith(".json"):
+        return None
+    return file_name[len(prefix):-len(".json")] or None
+
+
+def list_records(directory, prefix):
+    """
+    Find the record files of one kind in a directory.
+
+    Args:
+        directory (str): Directory to scan; a missing directory has no records.
+        prefix (str): File name prefix of the kind of record.
+
+    Returns:
+        dict: Record ID -> file path, sorted by record ID.
+    """
+    if not os.path.isdir(directory):
+        return {}
+    records = {}
+    for file_name in os.listdir(directory):
+        rid = record_id(file_name, prefix)
+        if rid is not None:
+            records[rid] = os.path.join(directory, file_name)
+    return dict(sorted(records.items()))
@@ -0,0 +1,366 @@
+import argparse
+import datetime
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from config_loader import load_config
+from records import EVALUATION_PREFIX, INPUT_PREFIX, PROFILE_PREFIX, list_records, record_file_name
+
+# Version of the evaluation prompt in evaluate_social_profile_upgrade.py; bump it whenever get_eval_prompt
+# changes, so evaluations judged with the old prompt are redone and left out of combined results
+EVAL_PROMPT_VERSION = "1"
+
+# Every table is clustered on (run_id, record_id), so per-record lookups and per-run scans are index range reads
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY, params TEXT NOT NULL, created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS inputs (
+    run_id TEXT NOT NULL, record_id TEXT NOT NULL, data TEXT NOT NULL, created REAL NOT NULL,
+    PRIMARY KEY (run_id, record_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS profiles (
+    run_id TEXT NOT NULL, record_id TEXT NOT NULL, data TEXT NOT NULL, failed INTEGER NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (run_id, record_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS evaluations (
+    run_id TEXT NOT NULL, record_id TEXT NOT NULL, judge_model TEXT NOT NULL, prompt_version TEXT NOT NULL,
+    data TEXT NOT NULL, created REAL NOT NULL,
+    PRIMARY KEY (run_id, record_id, judge_model)
+) WITHOUT ROWID;
+"""
+
+
+def new_run_id():
+    """Return a run ID that sorts by creation time, e.g. "20250101-120000-1a2b"."""
+    return f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+
+
+class RunStore:
+    """
+    SQLite store of profile generation runs, replacing the one-JSON-file-per-record directories.
+
+    Each run holds the user inputs, the generated profiles and the judge evaluations of its
+    records, keyed by run ID and record ID. Rows are written in bulk, one transaction per batch,
+    and never deleted; a profile is only replaced when a failed record is generated again, and an
+    evaluation when the record is judged again by the same model. WAL mode lets the combine step
+    read a run while another one is still being written. Safe to share between threads.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the SQLite file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = self._connect()
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _write(self, sql, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def create_run(self, params=None, run_id=None):
+        """
+        Register a new run.
+
+        Args:
+            params (dict): Settings of the run worth keeping (number of records, seed, ...).
+            run_id (str): ID of the run; defaults to `new_run_id()`.
+
+        Returns:
+            str: The run ID.
+        """
+        run_id = run_id or new_run_id()
+        self._write("INSERT INTO runs (run_id, params, created) VALUES (?, ?, ?)",
+                    [(run_id, json.dumps(params or {}), time.time())])
+        return run_id
+
+    def runs(self):
+        """
+        List the runs, oldest first.
+
+        Returns:
+            list: Dictionaries with the run ID, parameters, creation time and record counts.
+        """
+        rows = self._query(
+            "SELECT r.run_id, r.params, r.created, "
+            "(SELECT COUNT(*) FROM inputs i WHERE i.run_id = r.run_id), "
+            "(SELECT COUNT(*) FROM profiles p WHERE p.run_id = r.run_id AND NOT p.failed), "
+            "(SELECT COUNT(*) FROM evaluations e WHERE e.run_id = r.run_id) "
+            "FROM runs r ORDER BY r.created, r.run_id"
+        )
+        return [{"run_id": run_id, "params": json.loads(params), "created": created,
+                 "inputs": inputs, "profiles": profiles, "evaluations": evaluations}
+                for run_id, params, created, inputs, profiles, evaluations in rows]
+
+    def has_run(self, run_id):
+        """Return whether a run with this ID exists."""
+        return bool(self._query("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)))
+
+    def latest_run(self):
+        """Return the ID of the most recent run, or None if the store is empty."""
+        row = self._query("SELECT run_id FROM runs ORDER BY created DESC, run_id DESC LIMIT 1")
+        return row[0][0] if row else None
+
+    def add_inputs(self, run_id, records):
+        """
+        Bulk insert user inputs.
+
+        Args:
+            run_id (str): The run.
+            records (iterable): (record ID, user input dict) pairs.
+        """
+        now = time.time()
+        self._write("INSERT INTO inputs (run_id, record_id, data, created) VALUES (?, ?, ?, ?)",
+                    [(run_id, rid, json.dumps(data), now) for rid, data in records])
+
+    def add_profiles(self, run_id, records):
+        """
+        Bulk insert generated profiles; a profile with an "error" key is stored as failed.
+
+        Args:
+            run_id (str): The run.
+            records (iterable): (record ID, profile dict) pairs.
+        """
+        now = time.time()
+        self._write("INSERT OR REPLACE INTO profiles (run_id, record_id, data, failed, created) VALUES (?, ?, ?, ?, ?)",
+                    [(run_id, rid, json.dumps(data), int("error" in data), now) for rid, data in records])
+
+    def add_evaluations(self, run_id, records, judge_model, prompt_version):
+        """
+        Bulk insert judge evaluations.
+
+        Args:
+            run_id (str): The run.
+            records (iterable): (record ID, evaluation dict) pairs.
+            judge_model (str): Model that judged the profiles.
+            prompt_version (str): Version of the evaluation prompt.
+        """
+        now = time.time()
+        self._write(
+            "INSERT OR REPLACE INTO evaluations (run_id, record_id, judge_model, prompt_version, data, created) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(run_id, rid, judge_model, prompt_version, json.dumps(data), now) for rid, data in records],
+        )
+
+    def get_record(self, run_id, record_id, judge_model=None):
+        """
+        Look up one record.
+
+        Returns:
+            tuple: User input, profile and evaluation dicts; each is None if not stored.
+        """
+        input_row = self._query("SELECT data FROM inputs WHERE run_id = ? AND record_id = ?", (run_id, record_id))
+        profile_row = self._query("SELECT data FROM profiles WHERE run_id = ? AND record_id = ?", (run_id, record_id))
+        evaluation_row = self._query(
+            "SELECT data FROM evaluations WHERE run_id = ? AND record_id = ? AND judge_model = ?",
+            (run_id, record_id, judge_model),
+        ) if judge_model else []
+        return tuple(json.loads(row[0][0]) if row else None for row in (input_row, profile_row, evaluation_row))
+
+    def missing_profiles(self, run_id):
+        """
+        Find the inputs of a run that have no profile yet, or whose generation failed.
+
+        Returns:
+            list: (record ID, user input) pairs, by record ID.
+        """
+        rows = self._query(
+            "SELECT i.record_id, i.data FROM inputs i LEFT JOIN profiles p "
+            "ON p.run_id = i.run_id AND p.record_id = i.record_id "
+            "WHERE i.run_id = ? AND (p.record_id IS NULL OR p.failed) ORDER BY i.record_id",
+            (run_id,),
+        )
+        return [(rid, json.loads(data)) for rid, data in rows]
+
+    def pending_evaluations(self, run_id, judge_model, prompt_version):
+        """
+        Find the profiles of a run not yet judged by a model with the current prompt version.
+
+        A profile generated again after it was judged is pending too.
+
+        Returns:
+            list: (record ID, user input, profile) tuples, by record ID.
+        """
+        rows = self._query(
+            "SELECT i.record_id, i.data, p.data FROM inputs i "
+            "JOIN profiles p ON p.run_id = i.run_id AND p.record_id = i.record_id AND NOT p.failed "
+            "LEFT JOIN evaluations e ON e.run_id = i.run_id AND e.record_id = i.record_id AND e.judge_model = ? "
+            "WHERE i.run_id = ? AND (e.record_id IS NULL OR e.prompt_version != ? OR e.created < p.created) "
+            "ORDER BY i.record_id",
+            (judge_model, run_id, prompt_version),
+        )
+        return [(rid, json.loads(user_input), json.loads(profile)) for rid, user_input, profile in rows]
+
+    def incomplete_records(self, run_id, judge_model, prompt_version):
+        """
+        Find the records of a run that lack a profile or an up-to-date evaluation by `judge_model`
+        with `prompt_version`.
+
+        Returns:
+            dict: Record ID -> names of what is missing ("profile", "evaluation"), by record ID.
+        """
+        rows = self._query(
+            "SELECT i.record_id, p.record_id IS NULL OR p.failed, e.record_id IS NULL FROM inputs i "
+            "LEFT JOIN profiles p ON p.run_id = i.run_id AND p.record_id = i.record_id "
+            "LEFT JOIN evaluations e ON e.run_id = i.run_id AND e.record_id = i.record_id AND e.judge_model = ? "
+            "AND e.prompt_version = ? AND e.created >= p.created "
+            "WHERE i.run_id = ? AND (p.record_id IS NULL OR p.failed OR e.record_id IS NULL) ORDER BY i.record_id",
+            (judge_model, prompt_version, run_id),
+        )
+        return {rid: [kind for kind, missing in (("profile", no_profile), ("evaluation", no_evaluation)) if missing]
+                for rid, no_profile, no_evaluation in rows}
+
+    def iter_complete(self, run_id, judge_model, prompt_version, batch_size=1000):
+        """
+        Stream the records of a run that have an input, a profile and an up-to-date evaluation by `judge_model`
+        with `prompt_version`.
+
+        Reads from its own connection, so writers are not blocked while the caller consumes rows.
+
+        Yields:
+            tuple: Record ID, user input, profile and evaluation dicts, by record ID.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "SELECT i.record_id, i.data, p.data, e.data FROM inputs i "
+                "JOIN profiles p ON p.run_id = i.run_id AND p.record_id = i.record_id AND NOT p.failed "
+                "JOIN evaluations e ON e.run_id = i.run_id AND e.record_id = i.record_id AND e.judge_model = ? "
+                "AND e.prompt_version = ? AND e.created >= p.created "
+                "WHERE i.run_id = ? ORDER BY i.record_id",
+                (judge_model, prompt_version, run_id),
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for rid, user_input, profile, evaluation in rows:
+                    yield rid, json.loads(user_input), json.loads(profile), json.loads(evaluation)
+        finally:
+            conn.close()
+
+    def export_files(self, run_id, input_dir, output_dir, evaluation_dir=None, judge_model=None,
+                     prompt_version=EVAL_PROMPT_VERSION):
+        """
+        Write a run in the per-record JSON file layout read by older tools.
+
+        Args:
+            run_id (str): The run.
+            input_dir (str): Directory of the `user_input_<id>.json` files.
+            output_dir (str): Directory of the `profile_<id>.json` files.
+            evaluation_dir (str): Directory of the `evaluation_user_input_<id>.json` files; None skips them.
+            judge_model (str): Model whose evaluations are exported.
+            prompt_version (str): Evaluation prompt version of the exported evaluations.
+
+        Returns:
+            int: Number of files written.
+        """
+        tables = [("inputs", INPUT_PREFIX, input_dir, ""), ("profiles", PROFILE_PREFIX, output_dir, "")]
+        if evaluation_dir and judge_model:
+            tables.append(("evaluations", EVALUATION_PREFIX, evaluation_dir,
+                           " AND judge_model = ? AND prompt_version = ?"))
+        written = 0
+        for table, prefix, directory, condition in tables:
+            os.makedirs(directory, exist_ok=True)
+            params = (run_id, judge_model, prompt_version) if condition else (run_id,)
+            rows = self._query(f"SELECT record_id, data FROM {table} WHERE run_id = ?{condition}", params)
+            for rid, data in rows:
+                with open(os.path.join(directory, record_file_name(prefix, rid)), "w") as f:
+                    json.dump(json.loads(data), f, indent=4)
+                written += 1
+        return written
+
+    def import_files(self, input_dir, output_dir, evaluation_dir=None, judge_model="gpt-4",
+                     prompt_version=EVAL_PROMPT_VERSION, run_id=None):
+        """
+        Load a directory of per-record JSON files as a new run.
+
+        Args:
+            input_dir (str): Directory of the `user_input_<id>.json` files.
+            output_dir (str): Directory of the `profile_<id>.json` files.
+            evaluation_dir (str): Directory of the `evaluation_user_input_<id>.json` files, if any.
+            judge_model (str): Model the evaluation files were judged by.
+            prompt_version (str): Evaluation prompt version they were judged with.
+            run_id (str): ID of the new run; defaults to `new_run_id()`.
+
+        Returns:
+            str: The run ID.
+        """
+        def load(directory, prefix):
+            records = []
+            for rid, path in list_records(directory, prefix).items():
+                with open(path, "r") as f:
+                    records.append((rid, json.load(f)))
+            return records
+
+        run_id = self.create_run({"imported_from": [input_dir, output_dir, evaluation_dir]}, run_id)
+        self.add_inputs(run_id, load(input_dir, INPUT_PREFIX))
+        self.add_profiles(run_id, load(output_dir, PROFILE_PREFIX))
+        if evaluation_dir:
+            self.add_evaluations(run_id, load(evaluation_dir, EVALUATION_PREFIX), judge_model, prompt_version)
+        return run_id
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the run store of generated profiles and evaluations.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List the runs and their record counts.")
+    export_parser = subparsers.add_parser("export", help="Write a run as per-record JSON files.")
+    export_parser.add_argument("--run-id", default=None, help="Run to export (default: the latest).")
+    export_parser.add_argument("--judge-model", default="gpt-4")
+    export_parser.add_argument("--prompt-version", default=EVAL_PROMPT_VERSION,
+                               help="Evaluation prompt version of the exported evaluations (default: the current one).")
+    import_parser = subparsers.add_parser("import", help="Load the per-record JSON files as a new run.")
+    import_parser.add_argument("--judge-model", default="gpt-4", help="Model the evaluation files were judged by.")
+    args = parser.parse_args()
+
+    config = load_config()
+    input_dir = os.path.join(config["paths"]["input_dir"], "generate_profile")
+    output_dir = os.path.join(config["paths"]["output_dir"], "generate_profile")
+    evaluation_dir = os.path.join(config["paths"]["output_dir"], "evaluate_profile_generation")
+    store = RunStore(config["paths"]["run_store"])
+
+    if args.command == "list":
+        for run in store.runs():
+            created = datetime.datetime.fromtimestamp(run["created"]).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"{run['run_id']}  {created}  {run['inputs']} inputs, {run['profiles']} profiles, "
+                  f"{run['evaluations']} evaluations  {json.dumps(run['params'])}")
+    elif args.command == "export":
+        run_id = args.run_id or store.latest_run()
+        if run_id is None:
+            print("Error: The run store is empty.")
+        else:
+            written = store.export_files(run_id, input_dir, output_dir, evaluation_dir, args.judge_model,
+                                         args.prompt_version)
+            print(f"Exported run {run_id}: {written} files")
+    else:
+        run_id = store.import_files(input_dir, output_dir, evaluation_dir, args.judge_model)
+        print(f"Imported run {run_id}")
+    store.close()
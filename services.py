@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config_loader import load_config
+from health_monitor import HealthMonitor, build_health_probes
+from profile_cache import ProfileCache
+
+
+class Services:
+    """
+    Lazily built dependencies of the web apps.
+
+    Importing the app only reads config.yml. The vector store, skills index and LLM clients
+    (and their heavy imports) are built on first use or in `warm_up`, and every phase is
+    timed for the startup report.
+    """
+
+    def __init__(self, config_file="config.yml"):
+        """
+        Args:
+            config_file (str): Path to the YAML configuration file.
+        """
+        self.config_file = config_file
+        self.timings = {}
+        self.health_monitor = None
+        self._created_at = time.perf_counter()
+        self._warm_at = None
+        self._warm_up_pid = None
+        self._services = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        with self._timed("config"):
+            self.config = load_config(config_file)
+        self.profile_cache = ProfileCache(
+            max_entries=self.config['settings']['profile_cache_size'],
+            ttl_seconds=self.config['settings']['profile_cache_ttl'],
+        )
+
+    @contextmanager
+    def _timed(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.timings[phase] = self.timings.get(phase, 0.0) + elapsed
+
+    def _get(self, name, build):
+        """Return a service, building it once even when several threads ask at the same time."""
+        service = self._services.get(name)
+        if service is not None:
+            return service
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._services:
+                self._services[name] = build()
+            return self._services[name]
+
+    def _build_vectorstore(self):
+        with self._timed("import"):
+            import langchain_chroma  # noqa: F401
+            import embedding_cache  # noqa: F401
+            import langchain_community.embeddings.ollama  # noqa: F401
+        from utils import get_vectorstore
+
+        with self._timed("vectorstore"):
+            return get_vectorstore(self.config)
+
+    def _build_skills_index(self):
+        with self._timed("import"):
+            import embedding_cache  # noqa: F401
+            import langchain_community.embeddings.ollama  # noqa: F401
+        from utils import get_skills_index
+
+        # Memory-maps the saved index; Chroma is only opened when the index has to be rebuilt
+        with self._timed("index_load"):
+            return get_skills_index(config=self.config)
+
+    def _build_client(self):
+        with self._timed("import"):
+            import openai  # noqa: F401
+        from utils import get_client
+
+        with self._timed("client"):
+            return get_client(self.config)
+
+    def _build_async_client(self):
+        with self._timed("import"):
+            import openai  # noqa: F401
+        from utils import get_async_client
+
+        with self._timed("client"):
+            return get_async_client(self.config)
+
+    @property
+    def vectorstore(self):
+        """Chroma: The vector store, with the cached query embedding model."""
+        return self._get("vectorstore", self._build_vectorstore)
+
+    @property
+    def skills_index(self):
+        """SkillsIndex: The in-memory skills index used for retrieval."""
+        return self._get("skills_index", self._build_skills_index)
+
+    @property
+    def client(self):
+        """OpenAI: The synchronous LLM client."""
+        return self._get("client", self._build_client)
+
+    @property
+    def async_client(self):
+        """AsyncOpenAI: The asynchronous LLM client used by the ASGI app."""
+        return self._get("async_client", self._build_async_client)
+
+    def warm_up(self, background=False, async_client=False, health_monitor=True):
+        """
+        Build every service and start the background health probes.
+
+        Args:
+            background (bool): Warm up on a daemon thread so the server can accept requests
+                right away; requests that need a service wait until it is built.
+            async_client (bool): Also build the asynchronous LLM client.
+            health_monitor (bool): Start the health probes. A pre-fork master warms up without
+                them and each worker calls `start_health_monitor` after the fork.
+
+        Returns:
+            threading.Thread: The warm-up thread when `background` is set, otherwise None.
+        """
+        with self._lock:
+            self._warm_up_pid = os.getpid()
+        if background:
+            thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True,
+                                      kwargs={"async_client": async_client, "health_monitor": health_monitor})
+            thread.start()
+            return thread
+
+        try:
+            self.skills_index
+            self.client
+            if async_client:
+                self.async_client
+            if health_monitor:
+                self.start_health_monitor()
+            self._warm_at = time.perf_counter()
+            print(f"Startup timing: {self.startup_report()}")
+        except Exception as e:
+            print(f"Error warming up services: {e}")
+        return None
+
+    def ensure_warm_up(self, async_client=False):
+        """
+        Start a background warm-up unless one was already started in this process.
+
+        Called on every request, so readiness does not depend on how the app was launched:
+        under `flask run`, waitress or uwsgi nothing calls `warm_up` at startup, and the first
+        request starts it (and the health probes readiness is judged by) instead.
+
+        Args:
+            async_client (bool): Also build the asynchronous LLM client.
+        """
+        with self._lock:
+            if self._warm_up_pid == os.getpid():
+                return
+        self.warm_up(background=True, async_client=async_client)
+
+    def start_health_monitor(self):
+        """Start the background health probes of this process, once."""
+        if self.health_monitor is None:
+            self.health_monitor = HealthMonitor(
+                build_health_probes(self.skills_index, self.client, self.config_file),
+                interval=self.config['settings']['health_probe_interval'],
+            ).start()
+
+    def is_ready(self):
+        """Whether warm-up has completed and every dependency passed its latest probe."""
+        return self.health_monitor is not None and self.health_monitor.is_ready()
+
+    def health_status(self):
+        """
+        Return the cached dependency status.
+
+        Returns:
+            dict: The health monitor status, or a single `services` entry while warming up.
+        """
+        if self.health_monitor is None:
+            return {"services": {"status": "unknown", "message": "Warming up.", "latency_ms": None, "age_seconds": None}}
+        return self.health_monitor.status()
+
+    def startup_report(self):
+        """
+        Report how long each startup phase took.
+
+        Returns:
+            dict: Seconds spent on heavy imports, config, vector store, index load and client
+                construction, and the total time from construction to the end of warm-up.
+        """
+        with self._lock:
+            report = {phase: round(seconds, 4) for phase, seconds in self.timings.items()}
+        if self._warm_at is not None:
+            report["warm_up_total"] = round(self._warm_at - self._created_at, 4)
+        return report
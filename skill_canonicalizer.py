@@ -0,0 +1,250 @@
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+import yaml
+
+from config_loader import load_config
+
+DEFAULT_FILLER_WORDS = ("skill", "proficiency", "expertise", "knowledge")
+
+_SEPARATORS = re.compile(r"[\s\-‐-―_]+")
+_PUNCTUATION = re.compile(r"[^\w+#./ ]")
+
+
+def singularize(token):
+    """Strip a plural ending from one lower-case token, leaving -ss/-us/-is/-ics words alone."""
+    if len(token) <= 3 or token.endswith(("ss", "us", "is", "ics")):
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def canonical_key(skill, filler_words=DEFAULT_FILLER_WORDS):
+    """
+    Reduce a skill string to the key its spelling variants share.
+
+    The key is case-folded, with "&" spelled out, hyphens and punctuation turned into
+    spaces (keeping the `+#./` of names like C++, C#, Node.js and CI/CD), every word made
+    singular and trailing filler words ("skills", "proficiency", ...) dropped.
+
+    Args:
+        skill (str): The skill as scraped or typed.
+        filler_words (tuple): Singular words dropped from the end of the key.
+
+    Returns:
+        str: The key, e.g. "programming language" for "Programming Languages".
+    """
+    text = _SEPARATORS.sub(" ", skill.casefold().replace("&", " and "))
+    tokens = [singularize(token.strip("./")) for token in _PUNCTUATION.sub(" ", text).split()]
+    tokens = [token for token in tokens if token]
+    while len(tokens) > 1 and tokens[-1] in filler_words:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def load_aliases(path):
+    """
+    Read the alias file.
+
+    Args:
+        path (str): YAML file with an `aliases` mapping (canonical name -> list of variants)
+            and optional `filler_words`.
+
+    Returns:
+        tuple: The alias mapping and the filler words. Empty aliases and the default filler
+            words if the file does not exist.
+    """
+    if not path or not os.path.exists(path):
+        return {}, DEFAULT_FILLER_WORDS
+    with open(path, "r") as file:
+        data = yaml.safe_load(file) or {}
+    return data.get("aliases") or {}, tuple(data.get("filler_words") or DEFAULT_FILLER_WORDS)
+
+
+class SkillCanonicalizer:
+    """
+    Maps each skill spelling to one canonical form.
+
+    The table is built offline from the scraped skills: variants that share a canonical key,
+    or that the alias file lists together, form a group displayed as its alias name or else
+    its most frequent spelling without filler words. At serving time known spellings are a dictionary lookup, and
+    unseen ones fall back to computing their key.
+    """
+
+    def __init__(self, table=None, keys=None, filler_words=DEFAULT_FILLER_WORDS):
+        """
+        Args:
+            table (dict): Known spelling -> canonical skill.
+            keys (dict): Canonical key -> canonical skill, for spellings not in `table`.
+            filler_words (tuple): Filler words used to compute keys.
+        """
+        self.table = table or {}
+        self.keys = keys or {}
+        self.filler_words = tuple(filler_words)
+
+    def __len__(self):
+        return len(set(self.table.values()))
+
+    @classmethod
+    def build(cls, skills, aliases=None, filler_words=DEFAULT_FILLER_WORDS):
+        """
+        Build the canonicalization table from observed skills.
+
+        Args:
+            skills (iterable): Skill strings as they occur in the dataset, repeats included;
+                frequencies decide the display form of each group.
+            aliases (dict): Canonical name -> list of variants.
+            filler_words (tuple): Filler words used to compute keys.
+
+        Returns:
+            SkillCanonicalizer: The canonicalizer.
+        """
+        # Keys of every alias variant resolve to the key of its canonical name
+        alias_groups, alias_names = {}, {}
+        for name, variants in (aliases or {}).items():
+            group = canonical_key(name, filler_words)
+            alias_names[group] = name
+            for variant in [name, *(variants or [])]:
+                alias_groups[canonical_key(variant, filler_words)] = group
+
+        counts = Counter(skill.strip() for skill in skills if isinstance(skill, str) and skill.strip())
+        groups = {}
+        for skill, count in counts.items():
+            key = canonical_key(skill, filler_words)
+            groups.setdefault(alias_groups.get(key, key), Counter())[skill] += count
+
+        def preferred(spellings):
+            # Prefer spellings without filler words ("Cloud" over "Cloud skills"), then the most frequent
+            return min(spellings, key=lambda skill: (
+                skill.casefold().rstrip("s").endswith(tuple(" " + word for word in filler_words)),
+                -spellings[skill], len(skill)))
+
+        display = {group: alias_names.get(group) or preferred(spellings) for group, spellings in groups.items()}
+        display.update({group: name for group, name in alias_names.items() if group not in display})
+        table = {}
+        for group, spellings in groups.items():
+            for skill in spellings:
+                table[skill] = display[group]
+        keys = {key: display[group] for key, group in alias_groups.items()}
+        for group, name in display.items():
+            keys.setdefault(group, name)
+            keys.setdefault(canonical_key(name, filler_words), name)
+        return cls(table, keys, filler_words)
+
+    def canonicalize(self, skill):
+        """
+        Return the canonical form of a skill.
+
+        Args:
+            skill (str): The skill as scraped or typed.
+
+        Returns:
+            str: Its canonical form; an unknown skill is returned stripped.
+        """
+        canonical = self.table.get(skill)
+        if canonical is None:
+            skill = skill.strip()
+            canonical = self.table.get(skill) or self.keys.get(canonical_key(skill, self.filler_words), skill)
+        return canonical
+
+    def canonicalize_all(self, skills):
+        """
+        Canonicalize a list of skills and drop the duplicates that produces.
+
+        Args:
+            skills (iterable): Skill strings.
+
+        Returns:
+            list: Distinct canonical skills, in first-seen order.
+        """
+        return list(dict.fromkeys(
+            self.canonicalize(skill) for skill in skills if isinstance(skill, str) and skill.strip()
+        ))
+
+    def compile(self, vocabulary):
+        """
+        Precompute the canonical keyword ID of every vocabulary entry.
+
+        Canonical forms missing from the vocabulary are interned into it (in memory).
+
+        Args:
+            vocabulary (KeywordVocabulary): Vocabulary of the skills index.
+
+        Returns:
+            np.ndarray: int32 array mapping each keyword ID to the ID of its canonical form.
+        """
+        canonical_ids = [vocabulary.intern(self.canonicalize(keyword)) for keyword in list(vocabulary.keywords)]
+        # Entries interned above are canonical forms, so they map to themselves
+        canonical_ids.extend(range(len(canonical_ids), len(vocabulary)))
+        return np.array(canonical_ids, dtype=np.int32)
+
+    def save(self, path):
+        """Write the canonicalization table to a JSON file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump({"filler_words": self.filler_words, "table": self.table, "keys": self.keys}, file, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a table written by `save`.
+
+        Args:
+            path (str): Path of the table JSON file.
+
+        Returns:
+            SkillCanonicalizer: The canonicalizer, or None if the file does not exist.
+        """
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r") as file:
+            data = json.load(file)
+        return cls(data["table"], data["keys"], data["filler_words"])
+
+
+def get_canonicalizer(config):
+    """
+    Load the canonicalizer configured in config.yml.
+
+    Args:
+        config (dict): Loaded configuration.
+
+    Returns:
+        SkillCanonicalizer: The table built with the vector database, or, before the first
+            build, one derived from the alias file alone.
+    """
+    canonicalizer = SkillCanonicalizer.load(config['paths']['skill_canonical_table'])
+    if canonicalizer is None:
+        aliases, filler_words = load_aliases(config['paths']['skill_aliases'])
+        canonicalizer = SkillCanonicalizer.build([], aliases, filler_words)
+    return canonicalizer
+
+
+_default_canonicalizer = None
+_default_canonicalizer_lock = threading.Lock()
+
+
+def default_canonicalizer(config_file="config.yml"):
+    """
+    Return the process-wide canonicalizer, loading it on first use.
+
+    Args:
+        config_file (str): Configuration used when the canonicalizer is loaded.
+
+    Returns:
+        SkillCanonicalizer: The shared canonicalizer.
+    """
+    global _default_canonicalizer
+    with _default_canonicalizer_lock:
+        if _default_canonicalizer is None:
+            _default_canonicalizer = get_canonicalizer(load_config(config_file))
+        return _default_canonicalizer
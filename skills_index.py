@@ -0,0 +1,367 @@
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import numpy as np
+
+from ann_backends import ExactBackend
+from keyword_vocab import (
+    KEYWORD_IDS_METADATA_KEY,
+    KeywordVocabulary,
+    decode_ids,
+    metadata_keywords,
+)
+
+# Arrays written by SkillsIndex.save; the manifest marks a complete index
+INDEX_ARRAYS = ("vectors", "squared_norms", "keyword_offsets", "keyword_ids")
+INDEX_MANIFEST = "manifest.json"
+
+
+def _chroma_fingerprint(path):
+    # Record count and highest sequence IDs change on every add, update and delete, but not when
+    # Chroma merely opens (and rewrites) the file, as the file's mtime does
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        seq_ids = conn.execute("SELECT segment_id, seq_id FROM max_seq_id ORDER BY segment_id").fetchall()
+        queued = conn.execute("SELECT MAX(seq_id) FROM embeddings_queue").fetchone()[0]
+    finally:
+        conn.close()
+    as_int = lambda seq_id: int.from_bytes(seq_id, "big") if isinstance(seq_id, bytes) else seq_id
+    return {"rows": count, "max_seq_ids": {segment: as_int(seq_id) for segment, seq_id in seq_ids},
+            "queue_seq_id": as_int(queued)}
+
+
+def source_fingerprint(sources):
+    """
+    Fingerprint the files a skills index is built from.
+
+    A Chroma database (`chroma.sqlite3`) is identified by its record count and sequence IDs,
+    any other file by the SHA-256 of its contents, so neither touching nor restoring an older
+    copy of a file is mistaken for a change or for no change.
+
+    Args:
+        sources (list): Paths the index is derived from, e.g. the Chroma database file.
+
+    Returns:
+        dict: Path -> fingerprint, None for missing files. None if a database could not be read.
+    """
+    fingerprint = {}
+    for source in sources:
+        if not os.path.exists(source):
+            fingerprint[source] = None
+        elif os.path.basename(source) == "chroma.sqlite3":
+            try:
+                fingerprint[source] = _chroma_fingerprint(source)
+            except sqlite3.Error as e:
+                print(f"Error fingerprinting {source}: {e}")
+                return None
+        else:
+            with open(source, "rb") as file:
+                fingerprint[source] = hashlib.sha256(file.read()).hexdigest()
+    return fingerprint
+
+
+def index_is_current(directory, fingerprint):
+    """
+    Check whether a saved index exists and was built from sources with the given fingerprint.
+
+    Args:
+        directory (str): Directory written by `SkillsIndex.save`.
+        fingerprint (dict): Current `source_fingerprint` of the sources.
+
+    Returns:
+        bool: True if the saved index can be loaded as is.
+    """
+    manifest = os.path.join(directory, INDEX_MANIFEST)
+    if fingerprint is None or not os.path.exists(manifest):
+        return False
+    with open(manifest, "r") as file:
+        return json.load(file).get("sources") == fingerprint
+
+
+def _remove_old_versions(parent, name, keep):
+    # Only complete versions are removed: one without a manifest may still be written by another process
+    current = os.readlink(os.path.join(parent, name))
+    for entry in os.listdir(parent):
+        path = os.path.join(parent, entry)
+        if (entry.startswith(f"{name}.") and entry not in keep and entry != current and not os.path.islink(path)
+                and os.path.exists(os.path.join(path, INDEX_MANIFEST))):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class SkillsIndex:
+    """
+    Read-only, in-memory index over the job skills collection.
+
+    All vectors are held in one contiguous float32 matrix. By default a top-k query is an
+    exact search: a single matrix-vector product followed by `argpartition`. `set_backend`
+    swaps in an approximate index (see `ann_backends.py`). Distances are squared L2, the same
+    metric the Chroma collection uses, so `1 / (1 + distance)` relevance scores are unchanged.
+    """
+
+    def __init__(self, titles, vectors, keyword_ids, vocabulary, embedding=None):
+        """
+        Args:
+            titles (list): Job title of each row.
+            vectors (array-like): Embedding of each row, shape (n_rows, dim).
+            keyword_ids (list): Array of interned keyword IDs for each row.
+            vocabulary (KeywordVocabulary): Vocabulary the keyword IDs refer to.
+            embedding (Embeddings): Model used to embed query strings.
+        """
+        self.titles = list(titles)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.vectors.ndim != 2:
+            self.vectors = self.vectors.reshape(len(self.titles), -1)
+        self.squared_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        # Keyword IDs of all rows are stored back to back; row i owns keyword_ids[offsets[i]:offsets[i + 1]]
+        lengths = np.fromiter((len(ids) for ids in keyword_ids), dtype=np.int64, count=len(keyword_ids))
+        self.keyword_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.keyword_offsets[1:])
+        self.keyword_ids = (
+            np.concatenate([np.asarray(ids, dtype=np.int32) for ids in keyword_ids])
+            if len(keyword_ids) else np.empty(0, dtype=np.int32)
+        )
+        self.vocabulary = vocabulary
+        self.embedding = embedding
+        self.canonical_ids = None
+        self.backend = ExactBackend().build(self.vectors, self.squared_norms)
+
+    @classmethod
+    def from_keywords(cls, titles, vectors, keywords, embedding=None):
+        """
+        Build an index from plain keyword lists, interning them into a new vocabulary.
+
+        Args:
+            titles (list): Job title of each row.
+            vectors (array-like): Embedding of each row.
+            keywords (list): Keyword list of each row.
+            embedding (Embeddings): Model used to embed query strings.
+
+        Returns:
+            SkillsIndex: The built index.
+        """
+        vocabulary = KeywordVocabulary()
+        keyword_ids = [vocabulary.encode(row) for row in keywords]
+        return cls(titles, vectors, keyword_ids, vocabulary, embedding=embedding)
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, vocabulary_path=None):
+        """
+        Load every vector and keyword ID array from a Chroma vectorstore.
+
+        Rows ingested before keyword IDs existed only carry the keyword list; those are
+        parsed once here and interned into the same vocabulary.
+
+        Args:
+            vectorstore (Chroma): The initialized ChromaDB instance.
+            vocabulary_path (str): Path of the keyword vocabulary saved at ingestion time.
+
+        Returns:
+            SkillsIndex: The loaded index, sharing the vectorstore's embedding function.
+        """
+        data = vectorstore.get(include=["embeddings", "metadatas", "documents"])
+        vocabulary = KeywordVocabulary.load(vocabulary_path)
+        keyword_ids = []
+        for metadata in data["metadatas"]:
+            metadata = metadata or {}
+            if KEYWORD_IDS_METADATA_KEY in metadata and len(vocabulary):
+                keyword_ids.append(decode_ids(metadata[KEYWORD_IDS_METADATA_KEY]))
+            else:
+                keyword_ids.append(vocabulary.encode(metadata_keywords(metadata)))
+        vectors = np.asarray(data["embeddings"], dtype=np.float32)
+        if vectors.size == 0:
+            vectors = vectors.reshape(0, 0)
+        return cls(data["documents"], vectors, keyword_ids, vocabulary, embedding=vectorstore.embeddings)
+
+    @classmethod
+    def _from_arrays(cls, titles, vectors, squared_norms, keyword_offsets, keyword_ids, vocabulary, embedding=None):
+        """Wrap prebuilt arrays (e.g. memory-mapped files) without copying them."""
+        index = cls.__new__(cls)
+        index.titles = titles
+        index.vectors = vectors
+        index.squared_norms = squared_norms
+        index.keyword_offsets = keyword_offsets
+        index.keyword_ids = keyword_ids
+        index.vocabulary = vocabulary
+        index.embedding = embedding
+        index.canonical_ids = None
+        index.backend = ExactBackend().build(vectors, squared_norms)
+        return index
+
+    def save(self, directory, fingerprint=None):
+        """
+        Write the index to a directory of .npy files that `load` can memory-map.
+
+        The files go to a new sibling directory and `directory` becomes a symlink to it, swapped
+        in one `os.replace`. Files that other processes have memory-mapped are never rewritten;
+        earlier versions are removed, except the one just replaced, which readers may still be
+        opening.
+
+        Args:
+            directory (str): Path of the index. An existing index is replaced.
+            fingerprint (dict): `source_fingerprint` of the sources the index was built from.
+        """
+        parent, name = os.path.split(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        version = tempfile.mkdtemp(prefix=f"{name}.", dir=parent)
+        try:
+            for array in INDEX_ARRAYS:
+                np.save(os.path.join(version, f"{array}.npy"), getattr(self, array))
+            with open(os.path.join(version, "titles.json"), "w") as file:
+                json.dump(self.titles, file)
+            self.vocabulary.save(os.path.join(version, "vocabulary.json"))
+            # The manifest is written last, so a partially written index is never considered current
+            with open(os.path.join(version, INDEX_MANIFEST), "w") as file:
+                json.dump({"rows": len(self), "dim": int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0,
+                           "sources": fingerprint}, file)
+            os.chmod(version, 0o755)  # mkdtemp creates it private to this user
+            link = f"{version}.link"
+            os.symlink(os.path.basename(version), link)
+        except BaseException:
+            shutil.rmtree(version, ignore_errors=True)
+            raise
+        previous = None
+        if os.path.islink(directory):
+            previous = os.readlink(directory)
+        elif os.path.isdir(directory):
+            # An index saved before versioning: move it aside so the link can take its place
+            previous = f"{name}.unversioned"
+            os.rename(directory, os.path.join(parent, previous))
+        os.replace(link, directory)
+        _remove_old_versions(parent, name, keep={os.path.basename(version), previous})
+
+    @classmethod
+    def load(cls, directory, embedding=None, mmap=True):
+        """
+        Load an index written by `save`.
+
+        With `mmap` the arrays are memory-mapped read-only, so every worker process that
+        loads the same files shares one copy of the pages through the OS page cache.
+
+        Args:
+            directory (str): Directory written by `save`.
+            embedding (Embeddings): Model used to embed query strings.
+            mmap (bool): Memory-map the arrays instead of reading them into private memory.
+
+        Returns:
+            SkillsIndex: The loaded index.
+        """
+        # Resolved once, so every file comes from the same version even if `save` swaps the link meanwhile
+        directory = os.path.realpath(directory)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in INDEX_ARRAYS
+        }
+        with open(os.path.join(directory, "titles.json"), "r") as file:
+            titles = json.load(file)
+        vocabulary = KeywordVocabulary.load(os.path.join(directory, "vocabulary.json"))
+        return cls._from_arrays(titles, vocabulary=vocabulary, embedding=embedding, **arrays)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def search(self, query_vector, k=50):
+        """
+        Find the k nearest rows to a query vector.
+
+        Args:
+            query_vector (array-like): The query embedding.
+            k (int): Number of neighbours to return.
+
+        Returns:
+            tuple: Row indices and squared L2 distances, both sorted by increasing distance.
+        """
+        if len(self) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return self.backend.search(np.asarray(query_vector, dtype=np.float32), k)
+
+    def set_backend(self, backend):
+        """
+        Search with another ANN backend from now on.
+
+        Args:
+            backend (ExactBackend | HNSWBackend | IVFPQBackend): An unbuilt backend; it is built
+                over this index's vectors here.
+        """
+        if len(self):
+            backend.build(self.vectors, self.squared_norms)
+        self.backend = backend
+
+    def set_canonicalizer(self, canonicalizer):
+        """
+        Merge keywords by canonical form from now on.
+
+        Args:
+            canonicalizer (SkillCanonicalizer): Table compiled into a keyword ID -> canonical ID array.
+        """
+        self.canonical_ids = canonicalizer.compile(self.vocabulary)
+
+    def _row_keyword_ids(self, rows):
+        """
+        Gather the keyword IDs of several rows, canonicalized once `set_canonicalizer` was called.
+
+        Returns:
+            tuple: The keyword IDs in row order, and the position in `rows` of the row owning each.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.keyword_offsets[rows]
+        lengths = self.keyword_offsets[rows + 1] - starts
+        # Position of every keyword ID owned by the selected rows, without a Python loop
+        positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(int(lengths.sum()))
+        ids = self.keyword_ids[positions].astype(np.int64)
+        if self.canonical_ids is not None:
+            ids = self.canonical_ids[ids].astype(np.int64)
+        return ids, np.repeat(np.arange(len(rows)), lengths)
+
+    def merge_keywords(self, rows):
+        """
+        Union the keywords of several rows.
+
+        Args:
+            rows (array-like): Row indices, e.g. the hits of `search` above the relevance threshold.
+
+        Returns:
+            list: The distinct keywords of those rows, in canonical form once `set_canonicalizer` was called.
+        """
+        ids, _ = self._row_keyword_ids(rows)
+        if len(ids) == 0:
+            return []
+        return self.vocabulary.decode(np.unique(ids))
+
+    def rank_keywords(self, rows, weights, top_n=None):
+        """
+        Rank the keywords of several rows by similarity-weighted frequency.
+
+        Each keyword scores the sum of the weights of the rows listing it (counted once per row,
+        after canonicalization); the top_n best are picked with a heap.
+
+        Args:
+            rows (array-like): Row indices, nearest first, e.g. the hits of `search` above the relevance threshold.
+            weights (array-like): Weight of each row, e.g. its relevance score `1 / (1 + distance)`.
+            top_n (int): Number of keywords to return; None returns them all.
+
+        Returns:
+            list: Distinct keywords, highest score first; ties go to the keyword of the nearer row.
+        """
+        ids, hit = self._row_keyword_ids(rows)
+        if len(ids) == 0:
+            return []
+
+        # Drop repeats of a keyword within one row, keeping the original (nearest-first) order
+        _, first = np.unique(hit * (int(ids.max()) + 1) + ids, return_index=True)
+        first.sort()
+        ids, hit = ids[first], hit[first]
+        scores = np.bincount(ids, weights=np.asarray(weights, dtype=np.float64)[hit])
+
+        candidates, first_seen = np.unique(ids, return_index=True)
+        candidates = candidates[np.argsort(first_seen)].tolist()
+        if top_n:
+            candidates = heapq.nlargest(top_n, candidates, key=scores.__getitem__)
+        else:
+            candidates.sort(key=scores.__getitem__, reverse=True)
+        return self.vocabulary.decode(np.asarray(candidates, dtype=np.int64))
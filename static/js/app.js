@@ -91,54 +91,20 @@ document.addEventListener("DOMContentLoaded", () => {
             const background = document.getElementById("background").value;
             const similarityScore = document.getElementById("similarity-score").value;
             
-            try {
-                // Call the API
-                const response = await fetch("/api/generate-profile", {
-                    method: "POST",
-                    headers: {
-                        "Content-Type": "application/json",
-                    },
-                    body: JSON.stringify({
-                        profession,
-                        experience_level: experienceLevel,
-                        keywords,
-                        background,
-                        similarity_score_input: similarityScore,
-                    }),
-                });
+            const payload = {
+                profession,
+                experience_level: experienceLevel,
+                keywords,
+                background,
+                similarity_score_input: similarityScore,
+            };
 
-                const data = await response.json();
-                console.log("Response data: ", data);
-
-                if (response.ok && data.profile) {
-                    // Display output section
-                    outputSection.style.display = "block";
-
-                    // Populate Elevator Pitch
-                    elevatorPitchContent.innerHTML = data.profile.elevator_pitch || "No elevator pitch generated.";
-
-                    // Populate About Me
-                    aboutMeContent.innerHTML = data.profile["About Me"] || "No About Me section generated.";
-
-                    // Populate Retrieved Keywords
-                    if (data.profile.retrieved_keywords && Array.isArray(data.profile.retrieved_keywords)) {
-                        retrievedKeywordsSection.style.display = "block";
-                        retrievedKeywordsContent.querySelector("p").innerText = data.profile.retrieved_keywords.join(", ");
-                    } else {
-                        retrievedKeywordsSection.style.display = "none";
-                    }
-
-                    // Populate Reason (optional)
-                    if (data.profile.reason) {
-                        reasonContainer.style.display = "block"; // Show the reason container
-                        reasonContent.querySelector("p").innerText = data.profile.reason;
-                        reasonContent.style.display = "none"; // Keep content initially hidden for toggle
-                    } else {
-                        reasonContainer.style.display = "none"; // Hide the entire container if no reason is provided
-                    }
+            try {
+                // Prefer the streaming endpoint; fall back to the single JSON response if streams are unsupported
+                if (window.ReadableStream && window.TextDecoder) {
+                    await generateProfileStream(payload);
                 } else {
-                    console.error("API response error: ", data);
-                    alert(`Error: ${data.error || "Unexpected response from the server."}`);
+                    await generateProfile(payload);
                 }
             } catch (error) {
                 console.error("Error generating profile: ", error);
@@ -147,6 +113,135 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    // Call /api/generate-profile and render the complete response
+    async function generateProfile(payload) {
+        const response = await fetch("/api/generate-profile", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+            },
+            body: JSON.stringify(payload),
+        });
+
+        const data = await response.json();
+        console.log("Response data: ", data);
+
+        if (response.ok && data.profile) {
+            renderProfile(data.profile);
+        } else {
+            console.error("API response error: ", data);
+            alert(`Error: ${data.error || "Unexpected response from the server."}`);
+        }
+    }
+
+    // Call /api/generate-profile/stream and render each server-sent event as it arrives
+    async function generateProfileStream(payload) {
+        const streamStatus = document.getElementById("stream-status");
+        const streamPreview = document.getElementById("stream-preview");
+
+        const response = await fetch("/api/generate-profile/stream", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+            },
+            body: JSON.stringify(payload),
+        });
+        if (!response.ok || !response.body) {
+            throw new Error(`Streaming request failed with status ${response.status}`);
+        }
+
+        // Reset the output section for the new profile
+        outputSection.style.display = "block";
+        elevatorPitchContent.innerHTML = "";
+        aboutMeContent.innerHTML = "";
+        reasonContainer.style.display = "none";
+        streamStatus.innerText = "Retrieving trending skills...";
+        streamPreview.innerText = "";
+        streamPreview.style.display = "none";
+
+        const handlers = {
+            retrieval: (data) => {
+                streamStatus.innerText = "Writing your profile...";
+                if (data.keywords && data.keywords.length) {
+                    retrievedKeywordsSection.style.display = "block";
+                    retrievedKeywordsContent.querySelector("p").innerText = data.keywords.join(", ");
+                }
+            },
+            token: (data) => {
+                streamPreview.style.display = "block";
+                streamPreview.innerText += data.text;
+            },
+            profile: (data) => {
+                streamStatus.innerText = "";
+                streamPreview.style.display = "none";
+                if (data.profile && !data.profile.error) {
+                    renderProfile(data.profile);
+                } else {
+                    alert(`Error: ${(data.profile && data.profile.error) || "Unexpected response from the server."}`);
+                }
+            },
+            error: (data) => {
+                streamStatus.innerText = "";
+                alert(`Error: ${data.error || "Unexpected response from the server."}`);
+            },
+        };
+
+        // Parse the text/event-stream framing: events are separated by a blank line
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let eventName = "message";
+                const dataLines = [];
+                rawEvent.split("\n").forEach((line) => {
+                    if (line.startsWith("event:")) eventName = line.slice(6).trim();
+                    else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+                });
+                if (handlers[eventName] && dataLines.length) {
+                    handlers[eventName](JSON.parse(dataLines.join("\n")));
+                }
+            }
+        }
+    }
+
+    // Populate the output section with a generated profile
+    function renderProfile(profile) {
+        // Display output section
+        outputSection.style.display = "block";
+
+        // Populate Elevator Pitch
+        elevatorPitchContent.innerHTML = profile.elevator_pitch || "No elevator pitch generated.";
+
+        // Populate About Me
+        aboutMeContent.innerHTML = profile["About Me"] || "No About Me section generated.";
+
+        // Populate Retrieved Keywords
+        if (profile.retrieved_keywords && Array.isArray(profile.retrieved_keywords)) {
+            retrievedKeywordsSection.style.display = "block";
+            retrievedKeywordsContent.querySelector("p").innerText = profile.retrieved_keywords.join(", ");
+        } else {
+            retrievedKeywordsSection.style.display = "none";
+        }
+
+        // Populate Reason (optional)
+        if (profile.reason) {
+            reasonContainer.style.display = "block"; // Show the reason container
+            reasonContent.querySelector("p").innerText = profile.reason;
+            reasonContent.style.display = "none"; // Keep content initially hidden for toggle
+        } else {
+            reasonContainer.style.display = "none"; // Hide the entire container if no reason is provided
+        }
+    }
+
     // Handle Keywords Toggle
     if (toggleKeywordsButton) {
         toggleKeywordsButton.addEventListener("click", () => {
@@ -0,0 +1,104 @@
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from rate_limit import TokenBucket
+
+SKILLS = ["Python", "SQL", "Communication", "Cloud computing", "Machine learning", "Project management",
+          "Data analysis", "Kubernetes", "Leadership", "Problem solving", "Docker", "Agile"]
+
+
+class StubSERPHandler(BaseHTTPRequestHandler):
+    """Serves search result pages in the markup `fetch_trending_keywords` parses."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if not urlparse(self.path).path.rstrip("/").endswith("/search"):
+            self._send(404, "Not found")
+            return
+
+        # Throttle above the allowed rate, or at random, like a search engine would
+        if not server.bucket.try_acquire() or random.random() < server.error_rate:
+            with server.lock:
+                server.throttled += 1
+            self._send(429, "Too Many Requests", {"Retry-After": str(server.retry_after)})
+            return
+
+        time.sleep(server.latency)
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        rng = random.Random(query)
+        items = "".join(f'<div class="B0jnne">{skill}</div>' for skill in rng.sample(SKILLS, 6))
+        self._send(200, f"<html><body>{items}</body></html>")
+
+
+class StubSERPServer(ThreadingHTTPServer):
+    """Threaded stub search server that counts requests and throttled responses."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.2, max_rps=20, error_rate=0.0, retry_after=1):
+    """
+    Start the stub search server in a background thread.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind; 0 picks a free port.
+        latency (float): Seconds to wait before answering each accepted request.
+        max_rps (float): Requests per second accepted before answering 429.
+        error_rate (float): Probability of answering 429 to an otherwise accepted request.
+        retry_after (float): Value of the Retry-After header sent with 429 responses.
+
+    Returns:
+        StubSERPServer: The running server. Its search URL template is
+            `http://host:port/search?q={query}`.
+    """
+    server = StubSERPServer((host, port), StubSERPHandler)
+    server.latency = latency
+    server.error_rate = error_rate
+    server.retry_after = retry_after
+    server.bucket = TokenBucket(max_rps, max_rps)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.throttled = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stub search server for scraper tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per accepted request.")
+    parser.add_argument("--max-rps", type=float, default=20, help="Requests per second before answering 429.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a random 429.")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds sent with 429.")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.host, args.port, args.latency, args.max_rps, args.error_rate, args.retry_after)
+    print(f"Stub search server listening on http://{args.host}:{server.server_port}/search?q={{query}}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
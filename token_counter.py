@@ -0,0 +1,56 @@
+import functools
+import re
+import threading
+
+# Rough stand-in for a BPE tokenizer: words, numbers and single punctuation marks, with long
+# words split every four characters. Used only when tiktoken or its encoding files are unavailable.
+_APPROXIMATE_PIECES = re.compile(r"[A-Za-z]{1,4}|\d{1,3}|[^\sA-Za-z\d]")
+
+
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding(model):
+    # lru_cache does not stop concurrent first calls from each loading (or failing to download) the encoding
+    with _encoding_lock:
+        return _load_encoding(model)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(model):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Models tiktoken does not know, e.g. local ones, are counted with the GPT-3.5/4 encoding
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The encoding files are downloaded on first use, which fails offline
+        print(f"Error loading tiktoken encoding for {model}, approximating token counts: {e}")
+        return None
+
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """
+    Count the tokens of a text for a model.
+
+    Args:
+        text (str): The text to measure.
+        model (str): Model whose tokenizer is used.
+
+    Returns:
+        int: The token count: exact with tiktoken, otherwise an approximation.
+    """
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(_APPROXIMATE_PIECES.findall(text))
+
+
+def is_exact(model="gpt-3.5-turbo"):
+    """Return whether `count_tokens` uses the model's real tokenizer."""
+    return _get_encoding(model) is not None
@@ -1,32 +1,101 @@
-import requests
 from bs4 import BeautifulSoup
-from langchain_chroma import Chroma
-from langchain_community.embeddings.ollama import OllamaEmbeddings
-from openai import OpenAI
+from ann_backends import create_backend
 from config_loader import load_config
+from http_cache import default_session
+from keyword_ranking import fit_to_token_budget, prompt_settings, score_keywords, top_keywords
+from keyword_vocab import metadata_keywords
+from llm_backends import create_llm_backend
+from metrics import FALLBACKS, JSON_PARSE_FAILURES, LLM_ERRORS, LLM_RETRIES, StageTimer
+from rate_limit import backoff_delay, parse_retry_after
+from skill_canonicalizer import canonical_key, default_canonicalizer, get_canonicalizer
+from skills_index import SkillsIndex, index_is_current, source_fingerprint
+from token_counter import count_tokens
 import json
-def chat_gpt(prompt, client, model = "gpt-3.5-turbo"):
+import os
+import time
+import numpy as np
+def is_transient_llm_error(error):
+    """
+    Check whether a failed LLM call is worth retrying.
+
+    Args:
+        error (Exception): The exception raised by the OpenAI client.
+
+    Returns:
+        bool: True for rate limiting, timeouts, connection failures and 5xx responses.
+    """
+    import openai
+
+    return isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError))
+
+
+def chat_gpt(prompt, client, model = "gpt-3.5-turbo", limiter=None, max_retries=0, backoff_base=1.0, backoff_max=60.0):
     """
     Generates a response using GPT-3.5 Turbo.
     
     Args:
         prompt (str): The input prompt for GPT.
         client (OpenAI): An initialized OpenAI client.
+        model (str): Chat model to call.
+        limiter (RequestTokenLimiter): Requests/tokens per minute limits to wait for before each attempt.
+        max_retries (int): Retries after transient errors (429, timeouts, 5xx).
+        backoff_base (float): Base of the exponential backoff between retries, in seconds.
+        backoff_max (float): Maximum backoff between retries, in seconds.
     
     Returns:
-        str: The generated content from GPT.
+        str: The generated content from GPT, or "" if the call failed.
+    """
+    prompt_tokens = count_tokens(prompt, model) if limiter is not None else 0
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire(prompt_tokens)
+        try:
+            response = client.chat.completions.create(
+                model= model,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            if attempt == max_retries or not is_transient_llm_error(e):
+                LLM_ERRORS.inc()
+                print(f"Error in chat_gpt: {e}")
+                return ""
+            response = getattr(e, "response", None)
+            wait = parse_retry_after(response.headers.get("retry-after") if response is not None else None)
+            if wait is None:
+                wait = backoff_delay(attempt, backoff_base, backoff_max)
+            if limiter is not None and getattr(e, "status_code", None) == 429:
+                # Hold back every worker sharing the limiter, not just this one
+                limiter.pause(wait)
+            LLM_RETRIES.inc()
+            print(f"Transient error in chat_gpt ({e}). Retrying in {wait:.1f} seconds...")
+            time.sleep(wait)
+
+def chat_gpt_stream(prompt, client, model = "gpt-3.5-turbo"):
+    """
+    Generates a response using GPT-3.5 Turbo, yielding the content as it is produced.
+
+    Args:
+        prompt (str): The input prompt for GPT.
+        client (OpenAI): An initialized OpenAI client.
+
+    Yields:
+        str: Successive pieces of the generated content.
     """
     try:
-        response = client.chat.completions.create(
+        stream = client.chat.completions.create(
             model= model,
-            messages=[{"role": "user", "content": prompt}]
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
         )
-        return response.choices[0].message.content.strip()
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
     except Exception as e:
-        print(f"Error in chat_gpt: {e}")
-        return ""
+        LLM_ERRORS.inc()
+        print(f"Error in chat_gpt_stream: {e}")
 
-def fetch_trending_keywords(profession, headers, max_keywords=10):
+def fetch_trending_keywords(profession, headers, max_keywords=10, session=None):
     """
     Fetch trending keywords for a given profession.
 
@@ -34,13 +103,16 @@ def fetch_trending_keywords(profession, headers, max_keywords=10):
         profession (str): The profession to fetch keywords for.
         headers (dict): Headers for the HTTP request.
         max_keywords (int): Maximum number of keywords to fetch.
+        session (CachedSession): Pooled session with the response cache. The process-wide one is used if omitted.
 
     Returns:
         list: A list of trending keywords.
     """
     try:
+        if session is None:
+            session = default_session()
         search_url = f"https://www.google.com/search?q=trending+skills+for+{profession.replace(' ', '+')}"
-        response = requests.get(search_url, headers=headers)
+        response = session.get(search_url, headers=headers, timeout=10)
         response.raise_for_status()
 
         soup = BeautifulSoup(response.text, "html.parser")
@@ -51,82 +123,175 @@ def fetch_trending_keywords(profession, headers, max_keywords=10):
         print(f"Error fetching trending keywords for {profession}: {e}")
         return []
 
-def retrieve_skills_from_chroma(profession, vectorstore, threshold=1e-5):
+def retrieve_skills_from_chroma(profession, vectorstore, threshold=1e-5, timings=None):
     """
     Retrieve trending skills from ChromaDB for a given profession.
 
     Args:
         profession (str): The profession to search for.
-        vectorstore (Chroma): The initialized ChromaDB instance.
+        vectorstore (SkillsIndex | Chroma): The in-memory skills index, or an initialized ChromaDB instance.
         threshold (float): Minimum acceptable relevance score.
+        timings (StageTimer): Records the embed, vector search and keyword merge stages.
 
     Returns:
-        tuple: A list of trending keywords, minimum similarity score, and maximum similarity score.
+        tuple: Trending keywords ranked by similarity-weighted frequency (at most
+            `settings.max_prompt_keywords`), minimum similarity score, and maximum similarity score.
     """
+    if timings is None:
+        timings = StageTimer()
     try:
-        results = vectorstore.similarity_search_with_score(profession, k=50)
-        # print(f"Results from similarity search: {results}")
-
-        fetched_keywords = []
-        min_similarity = float('inf')  # Start with a very high value
-        max_similarity = float('-inf')  # Start with a very low value
-
-        for result, similarity_score in results:
-            # Update the min and max similarity scores
-            if similarity_score < min_similarity:
-                min_similarity = similarity_score
-            if similarity_score > max_similarity:
-                max_similarity = similarity_score
-
-            # Convert similarity score to relevance score
-            relevance_score = 1 / (1 + similarity_score)
-            # print(f"Similarity Score: {similarity_score:5f}, Relevance Score: {relevance_score:5f}, threshold: {threshold}")
-
-            # Filter based on the relevance score threshold
-            if relevance_score >= threshold:
-                keywords = eval(result.metadata.get('trending_keywords', '[]'))
-                fetched_keywords.extend(keywords)
-
-        # Deduplicate keywords and return along with min and max similarity scores
-        return list(set(fetched_keywords)), min_similarity, max_similarity
+        if isinstance(vectorstore, SkillsIndex):
+            with timings.stage("embed"):
+                query_vector = vectorstore.embedding.embed_query(profession)
+            return retrieve_skills_from_index(query_vector, vectorstore, threshold, timings)
+
+        # Chroma embeds the query inside the search, so both count as vector search here
+        with timings.stage("vector_search"):
+            results = vectorstore.similarity_search_with_score(profession, k=50)
+        similarity_scores = np.array([similarity_score for _, similarity_score in results])
+        if len(similarity_scores) == 0:
+            return [], float('inf'), float('-inf')
+
+        # Convert similarity scores to relevance scores and filter based on the threshold
+        relevance = 1 / (1 + similarity_scores)
+        relevant = relevance >= threshold
+        with timings.stage("keyword_merge"):
+            # Spelling variants ("Problem solving skills", "Problem-solving") collapse to one skill,
+            # and skills shared by more and closer hits rank first
+            scores = score_keywords(
+                [metadata_keywords(result.metadata) for (result, _), keep in zip(results, relevant) if keep],
+                relevance[relevant], canonicalize=default_canonicalizer().canonicalize_all)
+            fetched_keywords = top_keywords(scores, prompt_settings()[0])
+
+        # Return ranked keywords along with min and max similarity scores
+        return fetched_keywords, float(similarity_scores.min()), float(similarity_scores.max())
     except Exception as e:
         print(f"Error retrieving skills from ChromaDB: {e}")
         return [], None, None
 
 
-def generate_profile(user_input, vectorstore, client):
+def retrieve_skills_from_index(query_vector, skills_index, threshold=1e-5, timings=None):
     """
-    Generate a professional profile using user input and ChromaDB.
+    Retrieve trending skills from the in-memory skills index for an already embedded query.
 
     Args:
-        user_input (dict): Dictionary with keys `profession`, `experience_level`, `keywords`, and optionally `background`.
-        vectorstore (Chroma): Initialized ChromaDB instance.
-        client (OpenAI): Initialized OpenAI client.
+        query_vector (list): Embedding of the profession.
+        skills_index (SkillsIndex): The in-memory skills index.
+        threshold (float): Minimum acceptable relevance score.
+        timings (StageTimer): Records the vector search and keyword merge stages.
 
     Returns:
-        dict: Generated elevator pitch and project descriptions.
+        tuple: Trending keywords ranked by similarity-weighted frequency, minimum similarity score,
+            and maximum similarity score.
     """
-    profession = user_input.get("profession", "a professional")
-    experience_level = user_input.get("experience_level", "mid-level")
-    user_keywords = user_input.get("keywords", [])
-    background = user_input.get("background", "").strip()  # Optional user-provided background
+    if timings is None:
+        timings = StageTimer()
+    with timings.stage("vector_search"):
+        indices, similarity_scores = skills_index.search(query_vector, k=50)
+    if len(similarity_scores) == 0:
+        return [], float('inf'), float('-inf')
+
+    # Convert similarity scores to relevance scores and filter based on the threshold
+    relevance = 1 / (1 + similarity_scores)
+    relevant = relevance >= threshold
+
+    # Keyword sets are interned ID arrays, so scoring them is vectorized
+    with timings.stage("keyword_merge"):
+        fetched_keywords = skills_index.rank_keywords(indices[relevant], relevance[relevant], prompt_settings()[0])
+    return fetched_keywords, float(similarity_scores.min()), float(similarity_scores.max())
+
+
+def parse_user_input(user_input):
+    """
+    Read the profile request fields, applying defaults.
+
+    Args:
+        user_input (dict): Dictionary with keys `profession`, `experience_level`, `keywords`, and optionally `background`.
 
+    Returns:
+        dict: The profession, experience level, user keywords, background and relevance threshold.
+    """
     # Higher similarity_score_input means a stricter threshold (fewer keywords)
     threshold_similarity = int(user_input.get("similarity_score_input", 50))
-    threshold_relevance = 1 - (threshold_similarity / 100)
+    return {
+        "profession": user_input.get("profession", "a professional"),
+        "experience_level": user_input.get("experience_level", "mid-level"),
+        "user_keywords": user_input.get("keywords", []),
+        "background": user_input.get("background", "").strip(),  # Optional user-provided background
+        "threshold_relevance": 1 - (threshold_similarity / 100),
+    }
+
+
+def build_keywords_str(user_keywords, trending_keywords, max_tokens=None):
+    """
+    Combine user and retrieved keywords into the string used in the prompt, one entry per canonical skill.
+
+    The user's keywords are kept as typed; retrieved keywords are canonicalized, and dropped when
+    they name the same skill as a user keyword or an earlier retrieved one.
+
+    Args:
+        user_keywords (list): Keywords typed by the user; always kept, first.
+        trending_keywords (list): Retrieved keywords, most relevant first.
+        max_tokens (int): Token budget for the string; retrieved keywords are dropped from the end to fit.
+
+    Returns:
+        str: Comma-separated keywords.
+    """
+    canonicalizer = default_canonicalizer()
+    user_keywords = [keyword for keyword in user_keywords if isinstance(keyword, str) and keyword.strip()]
+    # Canonical forms are only compared, so "Backend" typed by the user is not rewritten in the prompt
+    def key(keyword):
+        return canonical_key(canonicalizer.canonicalize(keyword), canonicalizer.filler_words)
+
+    seen = {key(keyword) for keyword in user_keywords}
+    trending_keywords = [keyword for keyword in canonicalizer.canonicalize_all(trending_keywords)
+                         if key(keyword) not in seen]
+    if max_tokens is not None:
+        # The user's keywords and the ", " joining them to the retrieved ones come first
+        used = count_tokens(", ".join(user_keywords)) + 1 if user_keywords else 0
+        trending_keywords = fit_to_token_budget(trending_keywords, max(0, max_tokens - used))
+    all_keywords = user_keywords + trending_keywords
+    return ", ".join(all_keywords) if all_keywords else "relevant skills and expertise"
 
-    trending_keywords, min_score, max_score = retrieve_skills_from_chroma(
-        profession, vectorstore, threshold = threshold_relevance)
-    if not trending_keywords:
-        print(f"Fetching trending keywords for {profession}...")
-        headers = {"User-Agent": user_input.get("headers")}
-        trending_keywords = fetch_trending_keywords(profession, headers)
-        print(f"Trending keywords: {trending_keywords}")
 
-    all_keywords = list(set(user_keywords + trending_keywords))
-    keywords_str = ", ".join(all_keywords) if all_keywords else "relevant skills and expertise"
-    prompt = create_prompt(profession, experience_level, keywords_str, background)
-    generated_text = chat_gpt(prompt, client)
+def build_prompt(fields, trending_keywords, token_budget=None):
+    """
+    Build the profile prompt, trimming the retrieved keywords to a token budget.
+
+    Args:
+        fields (dict): Request fields from `parse_user_input`.
+        trending_keywords (list): Retrieved keywords, most relevant first.
+        token_budget (int): Maximum prompt tokens; defaults to `settings.prompt_token_budget` (None for no limit).
+
+    Returns:
+        str: The prompt.
+    """
+    if token_budget is None:
+        token_budget = prompt_settings()[1]
+    keyword_tokens = None
+    if token_budget is not None:
+        # Whatever the rest of the prompt leaves of the budget goes to the keywords
+        template = create_prompt(fields["profession"], fields["experience_level"], "", fields["background"])
+        keyword_tokens = max(0, token_budget - count_tokens(template))
+    keywords_str = build_keywords_str(fields["user_keywords"], trending_keywords, max_tokens=keyword_tokens)
+    return create_prompt(fields["profession"], fields["experience_level"], keywords_str, fields["background"])
+
+
+def parse_profile_response(generated_text, min_score, max_score):
+    """
+    Parse the JSON completion returned for a profile prompt.
+
+    Args:
+        generated_text (str): The raw completion.
+        min_score (float): Minimum similarity score of the retrieved rows.
+        max_score (float): Maximum similarity score of the retrieved rows.
+
+    Returns:
+        dict: Generated elevator pitch and project descriptions, or an error.
+    """
+    if not generated_text:
+        # The LLM call failed and was already counted in LLM_ERRORS; it is not a parse failure
+        return {"error": "The LLM returned no response."}
     try:
         response_json = json.loads(generated_text)
         return {
@@ -138,22 +303,134 @@ def generate_profile(user_input, vectorstore, client):
                                   "max_score": max_score}
         }
     except Exception as e:
+        JSON_PARSE_FAILURES.inc()
         print(f"Error generating profile: {e}")
         return {"error": str(e)}
 
+
+def generate_profile(user_input, vectorstore, client, timings=None, llm_options=None):
+    """
+    Generate a professional profile using user input and ChromaDB.
+
+    Args:
+        user_input (dict): Dictionary with keys `profession`, `experience_level`, `keywords`, and optionally `background`.
+        vectorstore (SkillsIndex | Chroma): The in-memory skills index or an initialized ChromaDB instance.
+        client (OpenAI): Initialized OpenAI client.
+        timings (StageTimer): Collects the time spent in each pipeline stage.
+        llm_options (dict): Extra `chat_gpt` arguments, e.g. a limiter and retry settings.
+
+    Returns:
+        dict: Generated elevator pitch and project descriptions.
+    """
+    if timings is None:
+        timings = StageTimer()
+    fields = parse_user_input(user_input)
+    profession = fields["profession"]
+
+    trending_keywords, min_score, max_score = retrieve_skills_from_chroma(
+        profession, vectorstore, threshold = fields["threshold_relevance"], timings=timings)
+    if not trending_keywords:
+        print(f"Fetching trending keywords for {profession}...")
+        FALLBACKS.inc()
+        headers = {"User-Agent": user_input.get("headers")}
+        with timings.stage("fallback_scrape"):
+            trending_keywords = fetch_trending_keywords(profession, headers)
+        print(f"Trending keywords: {trending_keywords}")
+
+    with timings.stage("prompt_build"):
+        prompt = build_prompt(fields, trending_keywords)
+    with timings.stage("llm_call"):
+        generated_text = chat_gpt(prompt, client, **(llm_options or {}))
+    with timings.stage("json_parse"):
+        return parse_profile_response(generated_text, min_score, max_score)
+
+
+def generate_profile_events(user_input, vectorstore, client, timings=None):
+    """
+    Generate a professional profile as a sequence of progress events, for streaming responses.
+
+    Events are yielded as soon as each stage finishes:
+    `retrieval` (keywords and similarity scores), then one `token` per LLM content delta,
+    then `profile` with the same fields `generate_profile` returns.
+
+    Args:
+        user_input (dict): Dictionary with keys `profession`, `experience_level`, `keywords`, and optionally `background`.
+        vectorstore (SkillsIndex | Chroma): The in-memory skills index or an initialized ChromaDB instance.
+        client (OpenAI): Initialized OpenAI client.
+        timings (StageTimer): Collects the time spent in each pipeline stage.
+
+    Yields:
+        tuple: (event name, JSON-serializable payload).
+    """
+    if timings is None:
+        timings = StageTimer()
+    fields = parse_user_input(user_input)
+    profession = fields["profession"]
+
+    trending_keywords, min_score, max_score = retrieve_skills_from_chroma(
+        profession, vectorstore, threshold = fields["threshold_relevance"], timings=timings)
+    source = "vector_store"
+    if not trending_keywords:
+        FALLBACKS.inc()
+        headers = {"User-Agent": user_input.get("headers")}
+        with timings.stage("fallback_scrape"):
+            trending_keywords = fetch_trending_keywords(profession, headers)
+        source = "web_search"
+    yield "retrieval", {
+        "keywords": trending_keywords,
+        "source": source,
+        "similarity_scores": {"min_score": min_score, "max_score": max_score},
+    }
+
+    with timings.stage("prompt_build"):
+        prompt = build_prompt(fields, trending_keywords)
+    tokens = []
+    llm_start = time.perf_counter()
+    for token in chat_gpt_stream(prompt, client):
+        tokens.append(token)
+        yield "token", {"text": token}
+    # Includes the time spent sending the tokens to the client
+    timings.record("llm_call", time.perf_counter() - llm_start)
+
+    with timings.stage("json_parse"):
+        profile = parse_profile_response("".join(tokens).strip(), min_score, max_score)
+    yield "profile", profile
+
+
+def format_sse(event, data):
+    """
+    Encode one server-sent event.
+
+    Args:
+        event (str): Event name.
+        data (dict): JSON-serializable payload.
+
+    Returns:
+        str: The event in text/event-stream framing.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
     
-def get_vectorstore():
+def get_vectorstore(config=None):
     """
     Initialize and return the Chroma vectorstore.
 
+    Args:
+        config (dict): Loaded configuration. config.yml is read if omitted.
+
     Returns:
         Chroma: An initialized Chroma vectorstore instance.
     """
-    config = load_config("config.yml")
-    embedding_model = config['settings']['embedding_model']
+    # langchain_chroma and the embedding stack are slow to import, so only pay for them when needed
+    from langchain_chroma import Chroma
+    from embedding_cache import get_cached_embedding
+
+    if config is None:
+        config = load_config("config.yml")
     persist_directory = config['paths']['persist_directory']
 
-    embedding = OllamaEmbeddings(model=embedding_model)
+    # Query embeddings are served from the two-tier embedding cache
+    embedding = get_cached_embedding(config)
     vectorstore = Chroma(
         collection_name=config['settings']['collection_name'],
         embedding_function=embedding,
@@ -162,16 +439,78 @@ def get_vectorstore():
     return vectorstore
 
 
-def get_client():
+def get_skills_index(vectorstore=None, config=None):
+    """
+    Load the serving-side skills index.
+
+    The index is memory-mapped from `paths.skills_index`, so worker processes share its pages.
+    If those files are missing or were built from a different Chroma database or keyword
+    vocabulary (see `source_fingerprint`), the index is rebuilt from the vectorstore and saved
+    for the next start.
+
+    Args:
+        vectorstore (Chroma): An initialized vectorstore. A new one is created if a rebuild is needed and it is omitted.
+        config (dict): Loaded configuration. config.yml is read if omitted.
+
+    Returns:
+        SkillsIndex: The in-memory index, searched with the `ann.backend` set in config.yml.
+    """
+    if config is None:
+        config = load_config("config.yml")
+    index_path = config['paths']['skills_index']
+    sources = [
+        os.path.join(config['paths']['persist_directory'], "chroma.sqlite3"),
+        config['paths']['keyword_vocab'],
+    ]
+    # Taken before a rebuild reads the store, so a write during the rebuild triggers another one next time
+    fingerprint = source_fingerprint(sources)
+    if index_is_current(index_path, fingerprint):
+        from embedding_cache import get_cached_embedding
+
+        skills_index = SkillsIndex.load(index_path, embedding=get_cached_embedding(config))
+    else:
+        if vectorstore is None:
+            vectorstore = get_vectorstore(config)
+        skills_index = SkillsIndex.from_vectorstore(vectorstore, vocabulary_path=config['paths']['keyword_vocab'])
+        try:
+            skills_index.save(index_path, fingerprint)
+        except OSError as e:
+            print(f"Error saving skills index to {index_path}: {e}")
+    # Merge near-duplicate skills (case, plurals, aliases) with a precompiled ID lookup
+    skills_index.set_canonicalizer(get_canonicalizer(config))
+    if config['ann']['backend'] != "exact":
+        skills_index.set_backend(create_backend(config))
+    return skills_index
+
+
+def get_client(config=None):
+    """
+    Initialize and return the client of the LLM backend selected in config.yml (`llm.backend`).
+
+    Args:
+        config (dict): Loaded configuration. config.yml is read if omitted.
+
+    Returns:
+        OpenAI: An initialized OpenAI-compatible client instance.
+    """
+    if config is None:
+        config = load_config("config.yml")
+    return create_llm_backend(config).client()
+
+
+def get_async_client(config=None):
     """
-    Initialize and return the OpenAI client.
+    Initialize and return the asynchronous client of the configured LLM backend, used by the ASGI app.
+
+    Args:
+        config (dict): Loaded configuration. config.yml is read if omitted.
 
     Returns:
-        OpenAI: An initialized OpenAI client instance.
+        AsyncOpenAI: An initialized AsyncOpenAI-compatible client instance.
     """
-    from config import open_ai_api_key  # Import API key from config
-    client = OpenAI(api_key=open_ai_api_key)
-    return client
+    if config is None:
+        config = load_config("config.yml")
+    return create_llm_backend(config).async_client()
 
 def create_prompt(profession, experience_level, keywords_str, background):
     if background: